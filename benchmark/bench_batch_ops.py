@@ -0,0 +1,113 @@
+"""Row-by-row versus batched deletes/moves/inserts
+
+    python -m benchmark.bench_batch_ops [--sizes 10000,100000]
+
+The "row" columns replay what the GUI did before: one removeRow or
+move_interval per selected row. Two selections are measured, every
+other row (as many ranges as rows) and one contiguous block of the
+same size. Qt rows run on a DurationsListModel, no view attached.
+"""
+import argparse
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication
+
+from core import ModelData, Moment
+from ui import DurationsListModel
+
+
+def make_model_data(count: int) -> ModelData:
+    model_data = ModelData()
+    begin, end = Moment(0, 0, 1), Moment(0, 0, 2)
+    model_data.insert_intervals(0, [(begin, end)] * count)
+    return model_data
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def selections(count: int):
+    half = count // 2
+    return [('every other row', list(range(0, count, 2))),
+            ('contiguous block', list(range(count // 4, count // 4 + half)))]
+
+
+def bench_core(count: int):
+    rows = []
+    for name, selected in selections(count):
+        def delete_rows(model_data=make_model_data(count)):
+            for row in reversed(selected):
+                model_data.del_interval(row)
+
+        def move_rows(model_data=make_model_data(count)):
+            for row in selected:
+                model_data.move_interval(row, -1)
+
+        rows.append(('delete, ' + name,
+                     timed(delete_rows),
+                     timed(lambda md=make_model_data(count):
+                           md.del_intervals(selected))))
+        rows.append(('move up, ' + name,
+                     timed(move_rows),
+                     timed(lambda md=make_model_data(count):
+                           md.move_intervals(selected, -1))))
+
+    begin, end = Moment(0, 0, 3), Moment(0, 0, 4)
+
+    def insert_rows(model_data=make_model_data(count)):
+        for i in range(count // 2):
+            model_data.insert_interval(count // 2 + i, begin, end)
+
+    rows.append(('insert n/2 in the middle',
+                 timed(insert_rows),
+                 timed(lambda md=make_model_data(count):
+                       md.insert_intervals(count // 2,
+                                           [(begin, end)] * (count // 2)))))
+    return rows
+
+
+def bench_qt(count: int):
+    rows = []
+    for name, selected in selections(count):
+        def delete_rows(model=DurationsListModel(make_model_data(count))):
+            for row in reversed(selected):
+                model.removeRow(row)
+
+        def move_rows(model=DurationsListModel(make_model_data(count))):
+            for row in selected:
+                model.move_interval(row, -1)
+
+        rows.append(('qt delete, ' + name,
+                     timed(delete_rows),
+                     timed(lambda model=DurationsListModel(
+                         make_model_data(count)):
+                         model.remove_intervals(selected))))
+        rows.append(('qt move up, ' + name,
+                     timed(move_rows),
+                     timed(lambda model=DurationsListModel(
+                         make_model_data(count)):
+                         model.move_intervals(selected, -1))))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000')
+    args = parser.parse_args()
+    app = QCoreApplication(sys.argv)  # noqa: F841
+
+    for count in map(int, args.sizes.split(',')):
+        print('== %d rows ==' % count)
+        print('%-34s %10s %10s %8s' % ('case', 'row ms', 'batch ms',
+                                       'speedup'))
+        for name, t_row, t_batch in bench_core(count) + bench_qt(count):
+            print('%-34s %10.1f %10.1f %7.1fx'
+                  % (name, t_row * 1000, t_batch * 1000, t_row / t_batch))
+
+
+if __name__ == '__main__':
+    main()
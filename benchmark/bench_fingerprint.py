@@ -0,0 +1,67 @@
+"""Sampled versus full fingerprints by file size
+
+    python -m benchmark.bench_fingerprint [--sizes 1,64,1024,16384,262144]
+                                          [--full-max 1024]
+
+Sizes are in MiB. The files are sparse (``truncate``), so even the
+largest ones take no disk space, and every sampled block but the
+first is a hole. Sampled fingerprints read the same number of blocks
+whatever the size and should take about the same time; the full hash
+grows linearly and is only run up to ``--full-max`` MiB. The result
+cache is bypassed, a cached lookup is a single stat.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from core.fingerprint import fingerprint, full_digest, sample_digest
+
+
+def make_file(path: str, size: int):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(min(size, 1 << 20)))
+        f.truncate(size)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1,64,1024,16384,262144')
+    parser.add_argument('--full-max', type=int, default=1024,
+                        help='largest size in MiB to hash fully')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='vcut_fingerprint_')
+    try:
+        print('%12s %12s %12s %12s' % ('size MiB', 'sampled ms',
+                                       'cached us', 'full ms'))
+        for size in map(int, args.sizes.split(',')):
+            path = os.path.join(root, '%d.bin' % size)
+            make_file(path, size << 20)
+            sampled = best_of(lambda: sample_digest(path), args.repeat)
+            fingerprint(path)
+            cached = best_of(lambda: fingerprint(path), args.repeat)
+            full = '-'
+            if size <= args.full_max:
+                full = '%12.1f' % (best_of(lambda: full_digest(path), 1)
+                                   * 1000)
+            print('%12d %12.3f %12.1f %12s'
+                  % (size, sampled * 1000, cached * 1e6, full))
+            os.remove(path)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Build, update and query cost of IntervalIndex
+
+    python -m benchmark.bench_interval_index [--sizes 10000,100000]
+
+Intervals are random cuts of up to 10 minutes over a 10 hour source,
+so most of them overlap a few neighbours.
+"""
+import argparse
+import random
+import time
+
+from core.interval_index import IntervalIndex, merge_intervals
+
+
+def make_intervals(count: int, rng: random.Random):
+    intervals = []
+    for _ in range(count):
+        begin = rng.randrange(36000)
+        intervals.append((begin, begin + rng.randrange(600)))
+    return intervals
+
+
+def per_op_us(func, args) -> float:
+    start = time.perf_counter()
+    for arg in args:
+        func(*arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def bench(count: int):
+    rng = random.Random(count)
+    intervals = make_intervals(count, rng)
+    start = time.perf_counter()
+    index = IntervalIndex(intervals)
+    t_build = time.perf_counter() - start
+
+    samples = rng.sample(intervals, 1000)
+    extra = make_intervals(1000, rng)
+    rows = [
+        ('build', t_build * 1e6),
+        ('overlap_count', per_op_us(index.overlap_count, samples)),
+        ('duplicate_count', per_op_us(index.duplicate_count, samples)),
+        ('add', per_op_us(index.add, extra)),
+        ('remove', per_op_us(index.remove, extra)),
+        ('stats', per_op_us(index.stats, [()] * 1000)),
+    ]
+    start = time.perf_counter()
+    merge_intervals(intervals)
+    rows.append(('merge pass', (time.perf_counter() - start) * 1e6))
+
+    print('== %d intervals, %d s overlapping ==' % (count,
+                                                   index.overlap_length))
+    for name, elapsed in rows:
+        print('%-16s %12.1f us' % (name, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000')
+    args = parser.parse_args()
+    for count in map(int, args.sizes.split(',')):
+        bench(count)
+
+
+if __name__ == '__main__':
+    main()
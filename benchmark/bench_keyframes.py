@@ -0,0 +1,55 @@
+"""Snapping many intervals against the keyframe index of a long source
+
+    python -m benchmark.bench_keyframes [--hours 2] [--gop 0.5] [-n 10000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core import KeyframeIndex
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hours', type=float, default=2)
+    parser.add_argument('--gop', type=float, default=0.5,
+                        help='seconds between keyframes')
+    parser.add_argument('-n', '--intervals', type=int, default=10000)
+    args = parser.parse_args()
+
+    duration = args.hours * 3600
+    count = int(duration / args.gop)
+    index = KeyframeIndex(i * args.gop for i in range(count))
+    rng = random.Random(0)
+    intervals = []
+    for _ in range(args.intervals):
+        begin = rng.randrange(int(duration))
+        intervals.append((begin, min(duration, begin + rng.randrange(600))))
+
+    start = time.perf_counter()
+    index.snap_intervals(intervals)
+    snap = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'index.kfi')
+        start = time.perf_counter()
+        with open(path, 'wb') as f:
+            index.times.tofile(f)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = KeyframeIndex()
+        with open(path, 'rb') as f:
+            loaded.times.frombytes(f.read())
+        load = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+    print('%d keyframes, index %.1f KiB' % (len(index), size / 1024))
+    print('snap %d intervals: %8.2f ms' % (len(intervals), snap * 1000))
+    print('cache save:        %8.2f ms' % (save * 1000))
+    print('cache load:        %8.2f ms' % (load * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Memory and time of ModelData interval storage
+
+    python -m benchmark.bench_model_data [--sizes 1000,100000,1000000]
+
+The "nested lists" rows measure the former ``[[h, m, s], [h, m, s]]``
+representation for comparison.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from core import ModelData, Moment
+
+
+def make_kv(count: int) -> dict:
+    rng = random.Random(count)
+    intervals = []
+    for _ in range(count):
+        begin = rng.randrange(36000)
+        end = begin + rng.randrange(600)
+        intervals.append([[begin // 3600, begin // 60 % 60, begin % 60],
+                          [end // 3600, end // 60 % 60, end % 60]])
+    return {'src_filename': 'a.mp4', 'src_path_dir': '/src',
+            'dst_path_dir': '/dst', 'intervals': intervals}
+
+
+def measure(func):
+    # 计时与内存分开测量，tracemalloc本身会显著拖慢分配
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def bench(count: int):
+    kv = make_kv(count)
+    text = json.dumps(kv)
+
+    nested, t_nested, m_nested = measure(lambda: json.loads(text))
+    model, t_model, m_model = measure(lambda: ModelData(kv, check=False))
+    del nested
+
+    rows = [
+        ('nested lists: build', t_nested, m_nested),
+        ('arrays: build from kv', t_model, m_model),
+    ]
+
+    def timed(name, func):
+        start = time.perf_counter()
+        func()
+        rows.append((name, time.perf_counter() - start, None))
+
+    timed('arrays: to_json', model.to_json)
+    timed('arrays: iterate secs',
+          lambda: sum(e - b for b, e in model.intervals_secs_iter()))
+    timed('arrays: iterate nested',
+          lambda: sum(1 for _ in model.intervals_iter()))
+    timed('nested lists: iterate', lambda: sum(
+        (e[0] * 3600 + e[1] * 60 + e[2]) - (b[0] * 3600 + b[1] * 60 + b[2])
+        for b, e in kv['intervals']))
+    begin, end = Moment(0, 0, 1), Moment(0, 0, 2)
+    empty = ModelData()
+    timed('arrays: add_interval x n',
+          lambda: [empty.add_interval(begin, end) for _ in range(count)])
+
+    print('== %d intervals ==' % count)
+    for name, elapsed, size in rows:
+        print('%-26s %10.2f ms %s'
+              % (name, elapsed * 1000,
+                 '' if size is None else '%10.1f KiB' % (size / 1024)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,100000,1000000')
+    args = parser.parse_args()
+    for count in map(int, args.sizes.split(',')):
+        bench(count)
+
+
+if __name__ == '__main__':
+    main()
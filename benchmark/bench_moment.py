@@ -0,0 +1,124 @@
+"""Moment micro-benchmarks on the patterns of its call sites
+
+    python -m benchmark.bench_moment [-n 100000]
+
+``LegacyMoment`` is the former h/m/s attribute implementation, kept
+here as the reference.
+"""
+import argparse
+import random
+import timeit
+from functools import reduce, total_ordering
+
+from core import Moment
+
+
+@total_ordering
+class LegacyMoment:
+    def __init__(self, hour: int = 0, mins: int = 0, secs: int = 0):
+        self.hour = hour
+        self.mins = mins
+        self.secs = secs
+
+    def __add__(self, other):
+        z = self.to_secs() + other.to_secs()
+        return LegacyMoment(z // 3600, z // 60 % 60, z % 60)
+
+    def __sub__(self, other):
+        x, y = self.to_secs(), other.to_secs()
+        z = x - y if x > y else 0
+        return LegacyMoment(z // 3600, z // 60 % 60, z % 60)
+
+    def __lt__(self, other):
+        return self.to_secs() < other.to_secs()
+
+    def __eq__(self, other):
+        return self.to_secs() == other.to_secs()
+
+    @staticmethod
+    def validate(hour: int, mins: int, secs: int) -> bool:
+        return hour >= 0 and 0 <= mins <= 59 and 0 <= secs <= 59
+
+    @classmethod
+    def from_args(cls, hour: int, mins: int, secs: int):
+        return cls(hour, mins, secs) \
+            if cls.validate(hour, mins, secs) \
+            else None
+
+    @classmethod
+    def from_list(cls, lst):
+        return cls.from_args(*lst) if len(lst) == 3 else None
+
+    @classmethod
+    def from_secs(cls, z: int):
+        return cls(z // 3600, z // 60 % 60, z % 60)
+
+    def to_secs(self) -> int:
+        return reduce(lambda x, y: x * 60 + y,
+                      (self.hour, self.mins, self.secs))
+
+    def to_hms(self):
+        return self.hour, self.mins, self.secs
+
+
+def cases(cls, intervals, secs):
+    def validate():
+        # ModelData.validate
+        for begin, end in intervals:
+            if cls.from_list(begin) > cls.from_list(end):
+                return False
+        return True
+
+    def savings():
+        # MainWindow.refresh_src_meta
+        total = 0
+        for begin, end in intervals:
+            total += (cls.from_list(end) - cls.from_list(begin)).to_secs()
+        return total
+
+    def output():
+        # CommandBuilder / update_output
+        for begin, end in secs:
+            b, e = cls.from_secs(begin), cls.from_secs(end)
+            d = e - b
+            '%02d:%02d:%02d' % b.to_hms()
+            '%02d:%02d:%02d' % d.to_hms()
+
+    def add():
+        # ModelData.add_interval
+        for begin, end in intervals:
+            cls(*begin).to_secs()
+            cls(*end).to_secs()
+
+    return [('validate', validate), ('savings', savings),
+            ('output', output), ('add_interval', add)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--intervals', type=int, default=100000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    secs, intervals = [], []
+    for _ in range(args.intervals):
+        begin = rng.randrange(36000)
+        end = begin + rng.randrange(600)
+        secs.append((begin, end))
+        intervals.append(([begin // 3600, begin // 60 % 60, begin % 60],
+                          [end // 3600, end // 60 % 60, end % 60]))
+
+    print('%-14s %12s %12s %8s' % ('case', 'legacy ms', 'moment ms', 'speedup'))
+    for (name, legacy), (_, current) in zip(
+            cases(LegacyMoment, intervals, secs),
+            cases(Moment, intervals, secs)):
+        t_legacy = min(timeit.repeat(legacy, number=1, repeat=args.repeat))
+        t_current = min(timeit.repeat(current, number=1, repeat=args.repeat))
+        print('%-14s %12.1f %12.1f %7.2fx' % (name, t_legacy * 1000,
+                                              t_current * 1000,
+                                              t_legacy / t_current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Per-interval commands versus one multi-output command per source
+
+    python -m benchmark.bench_multi_output [--minutes 20] [--intervals 200]
+
+Needs ffmpeg in PATH. A synthetic source is rendered once with lavfi,
+then both modes cut it and report wall time plus blocks read by the
+ffmpeg children (ru_inblock, 512 bytes each). Run as root with
+--drop-caches to measure cold reads instead of the page cache.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from core import ModelData, Moment, CommandBuilder
+from core.command import MODE_PER_INTERVAL, MODE_MULTI_OUTPUT
+
+
+def render_source(path: str, minutes: int):
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', 'testsrc2=size=1280x720:rate=30',
+        '-f', 'lavfi', '-i', 'sine=frequency=440',
+        '-t', str(minutes * 60),
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60',
+        '-c:a', 'aac', path,
+    ], check=True)
+
+
+def build_model(src: str, dst_dir: str, minutes: int, count: int,
+                contiguous: bool) -> ModelData:
+    model_data = ModelData()
+    model_data.src_path_dir, model_data.src_filename = os.path.split(src)
+    model_data.dst_path_dir = dst_dir
+    step = minutes * 60 // count
+    for i in range(count):
+        begin = i * step
+        end = begin + (step if contiguous else step // 2)
+        model_data.add_interval(Moment.from_secs(begin),
+                                Moment.from_secs(end))
+    return model_data
+
+
+def drop_caches():
+    os.sync()
+    with open('/proc/sys/vm/drop_caches', 'w') as f:
+        f.write('3\n')
+
+
+def run_mode(model_data: ModelData, mode: str, dst_dir: str, cold: bool):
+    shutil.rmtree(dst_dir, ignore_errors=True)
+    os.makedirs(dst_dir)
+    if cold:
+        drop_caches()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    jobs = list(CommandBuilder(model_data, mode).jobs())
+    for job in jobs:
+        argv = job.argv()
+        argv[1:1] = ['-v', 'error', '-y']
+        subprocess.run(argv, check=True)
+    elapsed = time.perf_counter() - start
+    blocks = resource.getrusage(resource.RUSAGE_CHILDREN).ru_inblock \
+        - usage.ru_inblock
+    return len(jobs), elapsed, blocks * 512
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=int, default=20)
+    parser.add_argument('--intervals', type=int, default=200)
+    parser.add_argument('--drop-caches', action='store_true')
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        print('ffmpeg not found in PATH', file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'source.mp4')
+        render_source(src, args.minutes)
+        print('source: %.1f MiB' % (os.path.getsize(src) / 1048576))
+        dst = os.path.join(tmp, 'out')
+        for contiguous in (False, True):
+            model_data = build_model(src, dst, args.minutes,
+                                     args.intervals, contiguous)
+            for mode in (MODE_PER_INTERVAL, MODE_MULTI_OUTPUT):
+                processes, elapsed, read = run_mode(model_data, mode, dst,
+                                                    args.drop_caches)
+                print('%-10s %-12s %4d processes %8.2f s %10.1f MiB read'
+                      % ('contiguous' if contiguous else 'gapped', mode,
+                         processes, elapsed, read / 1048576))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Peak memory and time of loading a large project file
+
+    python -m benchmark.bench_project_loader [--megabytes 100]
+
+Writes a project file of about the given size, then loads it in fresh
+child processes with ``ModelData.from_json`` (whole text, nested lists)
+and with ``ProjectLoader`` (streamed). Peak RSS is ru_maxrss of each
+child.
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from core import ModelData, ProjectLoader
+
+
+def write_project(path: str, megabytes: int) -> int:
+    rng = random.Random(0)
+    count = 0
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('{"src_filename": "a.mp4", "src_path_dir": "/src", '
+                '"dst_path_dir": "/dst", "intervals": [')
+        while f.tell() < megabytes << 20:
+            lines = []
+            for _ in range(10000):
+                begin = rng.randrange(36000)
+                end = begin + rng.randrange(600)
+                lines.append('[[%d, %d, %d], [%d, %d, %d]]'
+                             % (begin // 3600, begin // 60 % 60, begin % 60,
+                                end // 3600, end // 60 % 60, end % 60))
+            f.write((', ' if count else '') + ', '.join(lines))
+            count += len(lines)
+        f.write(']}')
+    return count
+
+
+def child(method: str, path: str):
+    start = time.perf_counter()
+    if method == 'from_json':
+        with open(path, 'r', encoding='utf8') as f:
+            model_data = ModelData.from_json(f.read())
+    else:
+        model_data = ProjectLoader(path).load()
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%d %f %d' % (model_data.intervals_size(), elapsed, rss))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--megabytes', type=int, default=100)
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'project.json')
+        count = write_project(path, args.megabytes)
+        print('%d intervals, %.1f MiB' % (count,
+                                          os.path.getsize(path) / 1048576))
+        for method in ('from_json', 'loader'):
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmark.bench_project_loader',
+                 '--child', method, path],
+                check=True, stdout=subprocess.PIPE, universal_newlines=True
+            ).stdout.split()
+            size, elapsed, rss = int(out[0]), float(out[1]), int(out[2])
+            assert size == count
+            print('%-10s %8.2f s %10.1f MiB peak RSS'
+                  % (method, elapsed, rss / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Per-device limits of the executor on simulated disks
+
+    python -m benchmark.bench_scheduler [--workers 8] [--penalty 0.6]
+                                        [--intervals 6] [--scale 0.002]
+
+Runs offline with a fake ffmpeg. Every top level directory of a
+temporary root is a simulated disk with a bandwidth of one interval
+second per ``--scale`` seconds, shared by the jobs running on it. Each
+additional job on a disk costs ``--penalty`` of its throughput for
+seeking, like a spinning disk. A job reads its source disk and writes
+its destination disk and advances at the speed of the slower one.
+
+Layouts: all sources and outputs on one disk, three source disks with
+the outputs next to the sources, three source disks writing to a
+fourth. Every layout is run with no per-device limit and with limits
+of 1 and 2, always ``--workers`` processes at most.
+"""
+import argparse
+import os
+import random
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from core import CommandBuilder, JobExecutor, ModelData, Moment
+
+FAKE_ROOT_ENV = 'VCUT_FAKE_DISKS'
+TICK = 0.005
+
+# 模拟的ffmpeg不导入core，避免启动开销计入任务时间
+_FAKE_FFMPEG = '''#!%(python)s
+"""Copy -t seconds from the -i disk to the output disk
+
+Running jobs register in <disk>/.active so each job can see how many
+others share its disks.
+"""
+import os
+import sys
+import time
+
+argv = sys.argv[1:]
+root = os.environ[%(root_env)r]
+scale = float(os.environ['VCUT_FAKE_SCALE'])
+penalty = float(os.environ['VCUT_FAKE_PENALTY'])
+hours, mins, secs = map(int, argv[argv.index('-t') + 1].split(':'))
+work = (hours * 3600 + mins * 60 + secs) * scale
+disks = {os.path.relpath(path, root).split(os.sep)[0]
+         for path in (argv[argv.index('-i') + 1], argv[-1])}
+tokens = []
+for disk in disks:
+    active = os.path.join(root, disk, '.active')
+    os.makedirs(active, exist_ok=True)
+    tokens.append(os.path.join(active, str(os.getpid())))
+    open(tokens[-1], 'w').close()
+try:
+    done = 0.0
+    last = time.monotonic()
+    while done < work:
+        time.sleep(%(tick)r)
+        speed = 1.0
+        for disk in disks:
+            n = len(os.listdir(os.path.join(root, disk, '.active')))
+            speed = min(speed, 1.0 / (n * (1.0 + penalty * (n - 1))))
+        now = time.monotonic()
+        done += (now - last) * speed
+        last = now
+    open(argv[-1], 'w').close()
+finally:
+    for token in tokens:
+        os.remove(token)
+'''
+
+
+def disk_of(root: str, path: str) -> str:
+    return os.path.relpath(os.path.abspath(path), root).split(os.sep)[0]
+
+
+def write_fake_ffmpeg(root: str) -> str:
+    path = os.path.join(root, 'ffmpeg')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write(_FAKE_FFMPEG % {'python': sys.executable,
+                                'root_env': FAKE_ROOT_ENV, 'tick': TICK})
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def make_jobs(root: str, layout: List[Tuple[str, str]],
+              intervals: int) -> List:
+    jobs = []
+    rng = random.Random(intervals)
+    for i, (src_disk, dst_disk) in enumerate(layout):
+        model_data = ModelData()
+        model_data.src_path_dir = os.path.join(root, src_disk)
+        model_data.src_filename = 'src%d.mp4' % i
+        model_data.dst_path_dir = os.path.join(root, dst_disk, 'out')
+        os.makedirs(model_data.dst_path_dir, exist_ok=True)
+        for _ in range(intervals):
+            begin = rng.randrange(3600)
+            model_data.add_interval(
+                Moment.from_secs(begin),
+                Moment.from_secs(begin + rng.randrange(10, 120)))
+        jobs.extend(CommandBuilder(model_data).jobs())
+    return jobs
+
+
+LAYOUTS = {
+    'one disk': [('disk0', 'disk0')] * 3,
+    'three disks': [('disk0', 'disk0'), ('disk1', 'disk1'),
+                    ('disk2', 'disk2')],
+    'three disks -> out disk': [('disk0', 'out'), ('disk1', 'out'),
+                                ('disk2', 'out')],
+}
+
+
+def run(root: str, ffmpeg: str, jobs: List, workers: int,
+        per_device: int) -> float:
+    # 所有模拟磁盘位于同一文件系统，以顶层目录区分设备
+    disks = {}  # type: Dict[str, int]
+
+    def device_of(path: str) -> int:
+        return disks.setdefault(disk_of(root, path), len(disks))
+
+    start = time.perf_counter()
+    results = JobExecutor(jobs, workers=workers, ffmpeg=ffmpeg,
+                          overwrite=True, per_device=per_device,
+                          device_of=device_of).run()
+    elapsed = time.perf_counter() - start
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError(failed[0].stderr)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--penalty', type=float, default=0.6,
+                        help='throughput lost per additional job on a disk')
+    parser.add_argument('--intervals', type=int, default=6,
+                        help='intervals per source')
+    parser.add_argument('--scale', type=float, default=0.002,
+                        help='seconds to copy one interval second')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='vcut_disks_')
+    os.environ[FAKE_ROOT_ENV] = root
+    os.environ['VCUT_FAKE_SCALE'] = str(args.scale)
+    os.environ['VCUT_FAKE_PENALTY'] = str(args.penalty)
+    try:
+        ffmpeg = write_fake_ffmpeg(root)
+        print('%-26s %6s %12s %12s %12s'
+              % ('layout', 'jobs', 'no limit s', '1/disk s', '2/disk s'))
+        for name, layout in LAYOUTS.items():
+            jobs = make_jobs(root, layout, args.intervals)
+            times = [run(root, ffmpeg, jobs, args.workers, per_device)
+                     for per_device in (0, 1, 2)]
+            print('%-26s %6d %12.2f %12.2f %12.2f'
+                  % ((name, len(jobs)) + tuple(times)))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Cold start of the headless CLI versus the GUI
+
+    python -m benchmark.bench_startup [-n 10] [--projects 100]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUI_SNIPPET = '''
+import sys
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from ui.MainWindow import MainWindow
+win = MainWindow()
+'''
+
+NO_QT_SNIPPET = '''
+import sys
+from cli.main import main
+sys.stdout = open(__import__('os').devnull, 'w')
+main(sys.argv[1:])
+assert 'PyQt5' not in sys.modules, 'PyQt5 imported'
+assert 'pymediainfo' not in sys.modules, 'pymediainfo imported'
+'''
+
+
+def write_projects(dir_path: str, count: int, intervals: int):
+    paths = []
+    for i in range(count):
+        path = os.path.join(dir_path, 'project_%d.json' % i)
+        with open(path, 'w', encoding='utf8') as f:
+            json.dump({
+                'src_filename': 'video_%d.mp4' % i,
+                'src_path_dir': '/data/src',
+                'dst_path_dir': '/data/dst',
+                'intervals': [[[0, j, 0], [0, j, 30]]
+                              for j in range(intervals)],
+            }, f)
+        paths.append(path)
+    return paths
+
+
+def timeit(argv, repeat: int, env=None) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--repeat', type=int, default=10)
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--intervals', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        projects = write_projects(tmp, args.projects, args.intervals)
+        results = {
+            'python': timeit([sys.executable, '-c', 'pass'], args.repeat),
+            'cli (1 project)': timeit(
+                [sys.executable, '-c', NO_QT_SNIPPET, 'generate',
+                 projects[0]], args.repeat),
+            'cli (%d projects)' % len(projects): timeit(
+                [sys.executable, '-c', NO_QT_SNIPPET, 'generate']
+                + projects, args.repeat),
+        }
+        try:
+            env = dict(os.environ)
+            env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            results['gui (QApplication + MainWindow)'] = timeit(
+                [sys.executable, '-c', GUI_SNIPPET], args.repeat, env)
+        except subprocess.CalledProcessError:
+            print('gui: PyQt5 not available, skipped', file=sys.stderr)
+
+    for name, secs in results.items():
+        print('%-36s %8.1f ms' % (name, secs * 1000))
+
+
+if __name__ == '__main__':
+    main()
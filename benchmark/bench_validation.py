@@ -0,0 +1,85 @@
+"""ModelData.validate versus the former schema + Moment pass
+
+    python -m benchmark.bench_validation [--sizes 20000,200000]
+
+``legacy_validate`` is the former implementation: the (cached) schema
+validator over the whole document, then two ``Moment`` per interval.
+The pure-Python row disables NumPy even when it is installed.
+"""
+import argparse
+import random
+import time
+
+import jsonschema
+
+from core import ModelData, Moment
+from core import validation
+
+
+def legacy_validate(kv: dict) -> bool:
+    try:
+        ModelData._schema_validator().validate(kv)
+        for begin, end in kv['intervals']:
+            begin = Moment.from_list(begin)
+            end = Moment.from_list(end)
+            if begin is None or end is None or begin > end:
+                return False
+        return True
+    except jsonschema.ValidationError:
+        return False
+
+
+def make_kv(count: int, broken: int = None) -> dict:
+    rng = random.Random(count)
+    intervals = []
+    for _ in range(count):
+        begin = rng.randrange(36000)
+        end = begin + rng.randrange(600)
+        intervals.append([[begin // 3600, begin // 60 % 60, begin % 60],
+                          [end // 3600, end // 60 % 60, end % 60]])
+    if broken is not None:
+        intervals[broken].reverse()
+    return {'src_filename': 'a.mp4', 'src_path_dir': '/src',
+            'dst_path_dir': '/dst', 'intervals': intervals}
+
+
+def timed(func, repeat: int = 3):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='20000,200000')
+    args = parser.parse_args()
+
+    numpy = validation._numpy()
+    print('numpy: %s' % (numpy.__version__ if numpy else 'not installed'))
+    for count in map(int, args.sizes.split(',')):
+        print('== %d intervals ==' % count)
+        for label, kv in (('valid', make_kv(count)),
+                          ('invalid at n/2', make_kv(count, count // 2))):
+            expected, t_legacy = timed(lambda: legacy_validate(kv), 1)
+            rows = [('legacy', expected, t_legacy)]
+            if numpy is not None:
+                rows.append(('numpy',) + timed(lambda: ModelData.validate(kv)))
+            import_numpy = validation._numpy
+            validation._numpy = lambda: None
+            try:
+                rows.append(('pure python',)
+                            + timed(lambda: ModelData.validate(kv)))
+            finally:
+                validation._numpy = import_numpy
+            for name, result, elapsed in rows:
+                assert result == expected, name
+                print('%-16s %-12s %10.1f ms %7.1fx'
+                      % (label, name, elapsed * 1000, t_legacy / elapsed))
+
+
+if __name__ == '__main__':
+    main()
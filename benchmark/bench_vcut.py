@@ -0,0 +1,71 @@
+"""Save/load time and file size of JSON versus ``.vcut`` projects
+
+    python -m benchmark.bench_vcut [--sizes 100000,1000000,4000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from array import array
+
+from core import ModelData, ProjectLoader, save_project
+from core.vcut import load_vcut
+
+
+def make_model_data(count: int) -> ModelData:
+    rng = random.Random(count)
+    begins = array('q', (rng.randrange(36000) for _ in range(count)))
+    ends = array('q', (begin + rng.randrange(600) for begin in begins))
+    return ModelData.from_arrays({'src_filename': 'a.mp4',
+                                  'src_path_dir': '/src',
+                                  'dst_path_dir': '/dst'}, begins, ends)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def read_json(path: str) -> ModelData:
+    with open(path, 'r', encoding='utf8') as f:
+        return ModelData.from_json(f.read())
+
+
+def bench(count: int, tmp: str):
+    model_data = make_model_data(count)
+    expected = list(model_data.intervals_secs_iter())
+    json_path = os.path.join(tmp, 'project.json')
+    vcut_path = os.path.join(tmp, 'project.vcut')
+
+    _, t_save_json = timed(lambda: save_project(model_data, json_path))
+    _, t_save_vcut = timed(lambda: save_project(model_data, vcut_path))
+    rows = [('save', 'json', t_save_json, os.path.getsize(json_path)),
+            ('save', 'vcut', t_save_vcut, os.path.getsize(vcut_path))]
+    for name, func in (('from_json', lambda: read_json(json_path)),
+                       ('ProjectLoader json',
+                        lambda: ProjectLoader(json_path).load()),
+                       ('load_vcut', lambda: load_vcut(vcut_path))):
+        loaded, elapsed = timed(func)
+        assert list(loaded.intervals_secs_iter()) == expected, name
+        rows.append(('load', name, elapsed, None))
+
+    print('== %d intervals ==' % count)
+    for op, name, elapsed, size in rows:
+        print('%-5s %-20s %10.1f ms %s'
+              % (op, name, elapsed * 1000,
+                 '' if size is None else '%10.1f MiB' % (size / 1048576)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100000,1000000,4000000')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in map(int, args.sizes.split(',')):
+            bench(count, tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark suite of the core data paths with a saved baseline
+
+    python -m benchmark.suite run [--sizes 10,1000,100000,1000000]
+                                  [--cases 'model_data.*'] [-o result.json]
+                                  [--baseline baseline.json]
+    python -m benchmark.suite compare baseline.json result.json
+
+Every case is timed at every size. A case builds its data once per
+size and returns the statement to time, which must leave the data as
+it found it (mutations are paired with their inverse). The best of
+``--repeat`` rounds is kept, each round runs the statement often
+enough to take about 0.2 s. ``compare`` flags cases that got slower
+than the baseline by more than ``--threshold`` and exits with 1.
+Qt cases are skipped when PyQt5 is not installed.
+"""
+import argparse
+import datetime
+import fnmatch
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from functools import reduce
+from operator import add
+from typing import Callable, Dict, List
+
+from core import CommandBuilder, ModelData, Moment
+from core.command import MODE_MULTI_OUTPUT
+
+SIZES = (10, 1000, 100000, 1000000)
+# 单次操作类的用例在每个规模下重复的次数
+OPS = 1000
+
+CASES = {}  # type: Dict[str, Callable[[int], Callable[[], object]]]
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def make_kv(count: int) -> dict:
+    rng = random.Random(count)
+    intervals = []
+    for _ in range(count):
+        begin = rng.randrange(36000)
+        end = begin + rng.randrange(600)
+        intervals.append([[begin // 3600, begin // 60 % 60, begin % 60],
+                          [end // 3600, end // 60 % 60, end % 60]])
+    return {'src_filename': 'a.mp4', 'src_path_dir': '/src',
+            'dst_path_dir': '/dst', 'intervals': intervals}
+
+
+def sample_rows(count: int) -> List[int]:
+    return random.Random(count).choices(range(count), k=OPS)
+
+
+@case('moment.add')
+def moment_add(count: int):
+    moments = [Moment.from_secs(secs) for secs in range(count)]
+    return lambda: reduce(add, moments)
+
+
+@case('moment.compare')
+def moment_compare(count: int):
+    rng = random.Random(count)
+    moments = [Moment.from_secs(rng.randrange(36000)) for _ in range(count)]
+    return lambda: sorted(moments)
+
+
+@case('model_data.validate')
+def model_data_validate(count: int):
+    kv = make_kv(count)
+    return lambda: ModelData.validate(kv)
+
+
+@case('model_data.from_json')
+def model_data_from_json(count: int):
+    text = json.dumps(make_kv(count))
+    return lambda: ModelData.from_json(text)
+
+
+@case('model_data.to_json')
+def model_data_to_json(count: int):
+    model_data = ModelData(make_kv(count), check=False)
+    return model_data.to_json
+
+
+@case('ops.insert_delete')
+def ops_insert_delete(count: int):
+    model_data = ModelData(make_kv(count), check=False)
+    begin, end = Moment(0, 0, 1), Moment(0, 0, 2)
+    rows = sample_rows(count)
+
+    def run():
+        for row in rows:
+            model_data.insert_interval(row, begin, end)
+            model_data.del_interval(row)
+    return run
+
+
+@case('ops.move')
+def ops_move(count: int):
+    model_data = ModelData(make_kv(count), check=False)
+    rows = [max(row, 1) for row in sample_rows(count)]
+
+    def run():
+        for row in rows:
+            model_data.move_interval(row, -1)
+            model_data.move_interval(row - 1, 1)
+    return run
+
+
+@case('ops.batch_move')
+def ops_batch_move(count: int):
+    model_data = ModelData(make_kv(count), check=False)
+    # 每隔一行选中一行，共OPS行（不足时全选）
+    rows = list(range(1, count, 2))[:OPS]
+
+    def run():
+        model_data.move_intervals(rows, -1)
+        model_data.move_intervals([row - 1 for row in rows], 1)
+    return run
+
+
+@case('qt.data')
+def qt_data(count: int):
+    from PyQt5.QtCore import Qt
+    from ui import DurationsListModel
+
+    model = DurationsListModel(ModelData(make_kv(count), check=False))
+    indexes = [model.index(row, row % 2) for row in sample_rows(count)]
+    return lambda: [model.data(index, Qt.DisplayRole) for index in indexes]
+
+
+@case('qt.setData')
+def qt_set_data(count: int):
+    from PyQt5.QtCore import Qt
+    from ui import DurationsListModel
+
+    model = DurationsListModel(ModelData(make_kv(count), check=False))
+    edits = []
+    for row in sample_rows(count):
+        # 写回原值，数据保持不变
+        index = model.index(row, row % 2)
+        edits.append((index, model.data(index, Qt.DisplayRole).value()))
+
+    def run():
+        for index, value in edits:
+            model.setData(index, value, Qt.EditRole)
+    return run
+
+
+@case('commands.per_interval')
+def commands_per_interval(count: int):
+    builder = CommandBuilder(ModelData(make_kv(count), check=False))
+    return lambda: list(builder.commands())
+
+
+@case('commands.multi_output')
+def commands_multi_output(count: int):
+    builder = CommandBuilder(ModelData(make_kv(count), check=False),
+                             MODE_MULTI_OUTPUT)
+    return lambda: list(builder.commands())
+
+
+def measure(stmt: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(stmt)
+    number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return {'best': min(times), 'median': statistics.median(times),
+            'number': number}
+
+
+def run(sizes: List[int], patterns: List[str], repeat: int,
+        out=sys.stdout) -> dict:
+    names = [name for name in CASES
+             if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+    if any(name.startswith('qt.') for name in names):
+        try:
+            from PyQt5.QtCore import QCoreApplication
+            app = QCoreApplication.instance() \
+                or QCoreApplication(sys.argv[:1])  # noqa: F841
+        except ImportError:
+            print('PyQt5 is not installed, skipping qt.* cases', file=out)
+            names = [name for name in names if not name.startswith('qt.')]
+
+    results = []
+    for name in names:
+        for size in sizes:
+            stats = measure(CASES[name](size), repeat)
+            results.append(dict(stats, case=name, size=size))
+            print('%-24s %8d %14.3f ms' % (name, size, stats['best'] * 1000),
+                  file=out)
+            out.flush()
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float,
+            out=sys.stdout) -> int:
+    """Print the ratio of every case, returns the number of regressions"""
+    base = {(r['case'], r['size']): r['best'] for r in baseline['results']}
+    regressions = 0
+    print('%-24s %8s %12s %12s %8s' % ('case', 'size', 'baseline ms',
+                                       'current ms', 'ratio'), file=out)
+    for r in current['results']:
+        key = (r['case'], r['size'])
+        if key not in base:
+            print('%-24s %8d %12s %12.3f %8s'
+                  % (key + ('-', r['best'] * 1000, 'new')), file=out)
+            continue
+        ratio = r['best'] / base[key] if base[key] else float('inf')
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1.0 / (1.0 + threshold):
+            flag = '  faster'
+        print('%-24s %8d %12.3f %12.3f %7.2fx%s'
+              % (key + (base[key] * 1000, r['best'] * 1000, ratio, flag)),
+              file=out)
+    print('%d regression(s) above %.0f %%' % (regressions, threshold * 100),
+          file=out)
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmark.suite')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    p_run = subparsers.add_parser('run', help='run the benchmarks')
+    p_run.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    p_run.add_argument('--cases', nargs='+', default=['*'], metavar='GLOB',
+                       help='case names to run, e.g. "model_data.*"')
+    p_run.add_argument('--repeat', type=int, default=3)
+    p_run.add_argument('-o', '--output', help='write results as JSON')
+    p_run.add_argument('--baseline', help='compare with a saved result')
+    p_run.add_argument('--threshold', type=float, default=0.1,
+                       help='allowed slowdown ratio (default: 0.1)')
+
+    p_compare = subparsers.add_parser('compare',
+                                      help='compare two saved results')
+    p_compare.add_argument('baseline')
+    p_compare.add_argument('current')
+    p_compare.add_argument('--threshold', type=float, default=0.1,
+                           help='allowed slowdown ratio (default: 0.1)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return 1 if compare(load(args.baseline), load(args.current),
+                            args.threshold) else 0
+
+    baseline = load(args.baseline) if args.baseline else None
+    result = run([int(size) for size in args.sizes.split(',')],
+                 args.cases, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump(result, f, indent=2)
+    if baseline is not None:
+        return 1 if compare(baseline, result, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
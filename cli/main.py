@@ -0,0 +1,425 @@
+"""Headless entry point, never imports PyQt5
+
+    python -m cli generate project.json [project.json ...]
+    python -m cli run -j 4 project.json [project.json ...]
+    python -m cli run -j 8 day.vbatch projects_dir/
+    python -m cli run --no-journal project.json
+    python -m cli run --cache --cache-size 50 project.json
+    python -m cli run --concat --scratch /tmp/parts project.json
+    python -m cli convert project.json project.vcut
+    python -m cli batch day.vbatch recordings_dir/ --dst cuts_dir/
+    python -m cli script cut.sh -j 8 day.vbatch
+"""
+import argparse
+import sys
+from typing import List, Optional, Tuple
+
+from core import ModelData, CommandBuilder, JobExecutor, JobResult, \
+    MediaMetaCache, ProjectLoader, save_project, ConcatStage, ConcatIOReport, \
+    ingest, load_batch, save_batch, profiler, script_stages, write_script, \
+    JobJournal, journal_path, OutputCache
+from core.batch import BATCH_EXT, PROJECT_EXTS, expand_paths, is_batch_path, \
+    probe_sources, source_path, output_collisions, collision_message
+from core.command import MODE_PER_INTERVAL, MODE_MULTI_OUTPUT
+from core.executor import JOB_SKIPPED
+
+
+def load_project(path: str) -> Optional[ModelData]:
+    # JSON与.vcut均可，JSON以流式解析
+    loader = ProjectLoader(path, max_errors=5)
+    model_data = loader.load()
+    if model_data is None:
+        print('%s: %s' % (path, loader.report), file=sys.stderr)
+    return model_data
+
+
+def load_sources(paths: List[str]) -> Tuple[List[Tuple[str, ModelData]], int]:
+    """``(file, source)`` of project and batch files, and exit status
+
+    Directories are searched for project and batch files. Sources whose
+    outputs would overwrite those of an earlier source are left out.
+    """
+    sources = []
+    status = 0
+    for path in expand_paths(paths, PROJECT_EXTS + (BATCH_EXT,)):
+        if is_batch_path(path):
+            try:
+                batch = load_batch(path, max_errors=5)
+            except (OSError, ValueError) as e:
+                print('%s: %s' % (path, e), file=sys.stderr)
+                status = 1
+                continue
+            sources.extend((path, source) for source in batch.sources)
+            continue
+        model_data = load_project(path)
+        if model_data is None:
+            print('%s: invalid project file' % path, file=sys.stderr)
+            status = 1
+            continue
+        sources.append((path, model_data))
+    model_datas = [model_data for _, model_data in sources]
+    collisions = output_collisions(model_datas)
+    for first, other in collisions:
+        print('%s: %s' % (sources[other][0],
+                          collision_message(model_datas, first, other)),
+              file=sys.stderr)
+        status = 1
+    rejected = {other for _, other in collisions}
+    return [source for i, source in enumerate(sources)
+            if i not in rejected], status
+
+
+def command_builder(model_data: ModelData, args) -> CommandBuilder:
+    return CommandBuilder(model_data,
+                          MODE_MULTI_OUTPUT
+                          if args.multi_output
+                          else MODE_PER_INTERVAL)
+
+
+def concat_stage(model_data: ModelData, args) -> ConcatStage:
+    return ConcatStage(model_data,
+                       MODE_MULTI_OUTPUT
+                       if args.multi_output
+                       else MODE_PER_INTERVAL,
+                       scratch_dir=args.scratch)
+
+
+def format_io_report(report: ConcatIOReport) -> str:
+    return '%d parts, stream copy I/O %.1f MiB (parts %.1f MiB, output ' \
+           '%.1f MiB), re-encoding about %.1f MiB' \
+           % (report.parts, report.copy_bytes / 1048576,
+              report.part_bytes / 1048576, report.output_bytes / 1048576,
+              report.reencode_bytes / 1048576)
+
+
+def cmd_generate(args) -> int:
+    out = args.output
+    sources, status = load_sources(args.projects)
+    metas = None
+    if args.probe:
+        # MediaMetaCache仅在未命中时才导入pymediainfo，各源文件并发探测
+        try:
+            metas = probe_sources([model_data for _, model_data in sources],
+                                  MediaMetaCache())
+        except ImportError as e:
+            print(e, file=sys.stderr)
+    for i, (path, model_data) in enumerate(sources):
+        if len(sources) > 1:
+            out.write('# %s\n' % (path if not is_batch_path(path)
+                                  else '%s: %s' % (path,
+                                                   source_path(model_data))))
+        if metas is not None:
+            if metas[i] is None:
+                print('%s: cannot access %s'
+                      % (path, source_path(model_data)), file=sys.stderr)
+            else:
+                out.write('# duration: %s ms\n' % metas[i].duration)
+        if args.concat:
+            # 列表文件需要在运行命令之前写好
+            stage = concat_stage(model_data, args)
+            try:
+                stage.prepare()
+            except OSError as e:
+                print('%s: %s' % (stage.list_path, e), file=sys.stderr)
+                status = 1
+                continue
+            builder = stage
+        else:
+            builder = command_builder(model_data, args)
+        for command in builder.commands(args.ffmpeg):
+            out.write(command)
+            out.write('\n')
+    out.flush()
+    return status
+
+
+def output_cache(args) -> Optional[OutputCache]:
+    if not args.cache:
+        return None
+    return OutputCache(args.cache_dir, int(args.cache_size * (1 << 30)))
+
+
+def save_cache_index(cache: Optional[OutputCache]) -> None:
+    if cache is None:
+        return
+    try:
+        cache.save_index()
+    except OSError as e:
+        print('%s: %s' % (cache.root, e), file=sys.stderr)
+    if cache.hits:
+        print('%d jobs linked from the cache' % cache.hits, file=sys.stderr)
+
+
+def run_concat(model_datas: List[ModelData], args, on_finish,
+               cache: OutputCache = None) -> int:
+    total = failed = 0
+    for model_data in model_datas:
+        if not model_data.intervals_size():
+            continue
+        stage = concat_stage(model_data, args)
+        try:
+            results = stage.run(workers=args.jobs, ffmpeg=args.ffmpeg,
+                                overwrite=args.overwrite,
+                                on_finish=on_finish,
+                                per_device=args.per_device,
+                                output_cache=cache)
+        except KeyboardInterrupt:
+            return 1
+        except OSError as e:
+            print('%s: %s' % (stage.list_path, e), file=sys.stderr)
+            return 1
+        # 有切割失败时不会运行合并，仍计为一个失败的任务
+        count = model_data.intervals_size() + 1
+        total += count
+        failed += count - sum(1 for result in results if result.ok)
+        print('%s: %s' % (stage.dst_path, format_io_report(stage.report)),
+              file=sys.stderr)
+    print('%d/%d jobs succeeded' % (total - failed, total), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_run(args) -> int:
+    sources, status = load_sources(args.projects)
+    model_datas = [model_data for _, model_data in sources]
+    # 所有源文件的任务放在同一个列表中，由执行器统一调度
+    jobs = [] if args.concat else \
+        [job for model_data in model_datas
+         for job in command_builder(model_data, args).jobs()]
+
+    def on_finish(result: JobResult):
+        print('[%s] %s (%.1fs)' % (result.status,
+                                   result.job.dst_path,
+                                   result.elapsed),
+              file=sys.stderr)
+        if not result.ok and result.stderr and not args.quiet:
+            print(result.stderr.rstrip(), file=sys.stderr)
+
+    cache = output_cache(args)
+    if args.concat:
+        try:
+            return run_concat(model_datas, args, on_finish, cache) or status
+        finally:
+            save_cache_index(cache)
+
+    journal = None
+    if not args.no_journal:
+        # 默认写在第一个项目文件旁边，再次运行时跳过已完成的任务
+        journal = JobJournal(args.journal or journal_path(args.projects[0]))
+    executor = JobExecutor(jobs, workers=args.jobs, ffmpeg=args.ffmpeg,
+                           overwrite=args.overwrite, on_finish=on_finish,
+                           per_device=args.per_device, journal=journal,
+                           output_cache=cache)
+    executor.start()
+    try:
+        while not executor.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        executor.cancel()
+        executor.wait()
+    finally:
+        if journal is not None:
+            journal.close()
+        save_cache_index(cache)
+    failed = sum(1 for result in executor.results if not result.ok)
+    skipped = sum(1 for result in executor.results
+                  if result.status == JOB_SKIPPED)
+    print('%d/%d jobs succeeded%s'
+          % (len(jobs) - failed, len(jobs),
+             ' (%d already complete)' % skipped if skipped else ''),
+          file=sys.stderr)
+    return 1 if failed or status else 0
+
+
+def cmd_convert(args) -> int:
+    model_data = load_project(args.src)
+    if model_data is None:
+        return 1
+    try:
+        save_project(model_data, args.dst, indent=args.indent)
+    except OSError as e:
+        print('%s: %s' % (args.dst, e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_batch(args) -> int:
+    batch, failures = ingest(args.paths, dst_path_dir=args.dst)
+    for path, message in failures:
+        print('%s: %s' % (path, message), file=sys.stderr)
+    try:
+        save_batch(batch, args.batch, indent=args.indent)
+    except OSError as e:
+        print('%s: %s' % (args.batch, e), file=sys.stderr)
+        return 1
+    print('%d sources, %d intervals' % (len(batch), batch.intervals_size()),
+          file=sys.stderr)
+    return 1 if failures else 0
+
+
+def cmd_script(args) -> int:
+    sources, status = load_sources(args.projects)
+    builders = []
+    for _, model_data in sources:
+        if not args.concat:
+            builders.append(command_builder(model_data, args))
+            continue
+        # 列表文件由脚本在合并之前写入
+        builders.append(concat_stage(model_data, args))
+    stages, cleanup = script_stages(builders)
+    try:
+        write_script(args.script, stages, jobs=args.jobs, ffmpeg=args.ffmpeg,
+                     overwrite=args.overwrite, log_dir=args.log_dir,
+                     cleanup=cleanup)
+    except OSError as e:
+        print('%s: %s' % (args.script, e), file=sys.stderr)
+        return 1
+    print('%d jobs' % sum(map(len, stages)), file=sys.stderr)
+    return status
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m cli',
+        description='ffmpeg multi-interval lossless cut command generator'
+    )
+    parser.add_argument('--profile', metavar='TRACE', default=None,
+                        help='record timings and write them to TRACE '
+                             '(CSV when it ends with .csv, JSON otherwise)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    p_generate = subparsers.add_parser(
+        'generate', help='print ffmpeg commands of project files'
+    )
+    p_generate.add_argument('projects', nargs='+', metavar='PROJECT',
+                            help='project or %s batch file, directories '
+                                 'are searched for both' % BATCH_EXT)
+    p_generate.add_argument('-o', '--output', type=argparse.FileType(
+        'w', encoding='utf8'), default=sys.stdout)
+    p_generate.add_argument('--ffmpeg', default='ffmpeg',
+                            help='ffmpeg executable (default: ffmpeg)')
+    p_generate.add_argument('--probe', action='store_true',
+                            help='probe source duration with pymediainfo')
+    p_generate.add_argument('--multi-output', action='store_true',
+                            help='one ffmpeg process per source')
+    p_generate.add_argument('--concat', action='store_true',
+                            help='cut into the scratch directory and join '
+                                 'the parts into <name>_concat<ext>, '
+                                 'writes the concat list file')
+    p_generate.add_argument('--scratch', metavar='DIR', default=None,
+                            help='directory of intermediate files '
+                                 '(default: user cache directory)')
+    p_generate.set_defaults(func=cmd_generate)
+
+    p_run = subparsers.add_parser(
+        'run', help='run ffmpeg commands of project files in parallel'
+    )
+    p_run.add_argument('projects', nargs='+', metavar='PROJECT',
+                       help='project or %s batch file, directories '
+                            'are searched for both' % BATCH_EXT)
+    p_run.add_argument('-j', '--jobs', type=int, default=4,
+                       help='number of concurrent ffmpeg processes')
+    p_run.add_argument('-J', '--per-device', type=int, default=0,
+                       metavar='N',
+                       help='at most N concurrent processes per disk, '
+                            'counting source and destination (default: 0, '
+                            'no limit)')
+    p_run.add_argument('-y', '--overwrite', action='store_true',
+                       help='overwrite existing output files')
+    p_run.add_argument('-q', '--quiet', action='store_true',
+                       help='do not print ffmpeg errors')
+    p_run.add_argument('--journal', metavar='FILE', default=None,
+                       help='job journal, jobs it records as complete are '
+                            'skipped (default: <first PROJECT>.journal)')
+    p_run.add_argument('--no-journal', action='store_true',
+                       help='run every job and do not write a journal')
+    p_run.add_argument('--cache', action='store_true',
+                       help='link segments cut before from the output '
+                            'cache and add new ones to it')
+    p_run.add_argument('--cache-dir', metavar='DIR', default=None,
+                       help='output cache directory '
+                            '(default: user cache directory)')
+    p_run.add_argument('--cache-size', metavar='GIB', type=float,
+                       default=20, help='size limit of the output cache, '
+                                        'least recently used segments are '
+                                        'deleted first (default: 20)')
+    p_run.add_argument('--ffmpeg', default='ffmpeg',
+                       help='ffmpeg executable (default: ffmpeg)')
+    p_run.add_argument('--multi-output', action='store_true',
+                       help='one ffmpeg process per source')
+    p_run.add_argument('--concat', action='store_true',
+                       help='join the cut parts into <name>_concat<ext> '
+                            'with stream copy, parts are deleted afterwards')
+    p_run.add_argument('--scratch', metavar='DIR', default=None,
+                       help='directory of intermediate files '
+                            '(default: user cache directory)')
+    p_run.set_defaults(func=cmd_run)
+
+    p_convert = subparsers.add_parser(
+        'convert', help='convert a project between JSON and .vcut'
+    )
+    p_convert.add_argument('src', metavar='SRC')
+    p_convert.add_argument('dst', metavar='DST',
+                           help='written as .vcut when it ends with .vcut, '
+                                'JSON otherwise')
+    p_convert.add_argument('--indent', type=int, default=None,
+                           help='indent of JSON output')
+    p_convert.set_defaults(func=cmd_convert)
+
+    p_batch = subparsers.add_parser(
+        'batch', help='collect media, project and batch files into one '
+                      '%s batch file' % BATCH_EXT
+    )
+    p_batch.add_argument('batch', metavar='BATCH')
+    p_batch.add_argument('paths', nargs='+', metavar='PATH',
+                         help='files or directories, searched recursively')
+    p_batch.add_argument('--dst', default=None,
+                         help='output directory of new sources '
+                              '(default: next to the source)')
+    p_batch.add_argument('--indent', type=int, default=None,
+                         help='indent of JSON output')
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_script = subparsers.add_parser(
+        'script', help='write a bash script running the ffmpeg commands '
+                       'of project files in parallel'
+    )
+    p_script.add_argument('script', metavar='SCRIPT')
+    p_script.add_argument('projects', nargs='+', metavar='PROJECT',
+                          help='project or %s batch file, directories '
+                               'are searched for both' % BATCH_EXT)
+    p_script.add_argument('-j', '--jobs', type=int, default=4,
+                          help='default number of concurrent ffmpeg '
+                               'processes, JOBS=N overrides it')
+    p_script.add_argument('-y', '--overwrite', action='store_true',
+                          help='overwrite existing output files')
+    p_script.add_argument('--log-dir', default=None,
+                          help='directory of the job logs '
+                               '(default: <SCRIPT>_logs next to SCRIPT)')
+    p_script.add_argument('--ffmpeg', default='ffmpeg',
+                          help='ffmpeg executable (default: ffmpeg)')
+    p_script.add_argument('--multi-output', action='store_true',
+                          help='one ffmpeg process per source')
+    p_script.add_argument('--concat', action='store_true',
+                          help='join the cut parts into <name>_concat<ext>, '
+                               'writes the concat list files')
+    p_script.add_argument('--scratch', metavar='DIR', default=None,
+                          help='directory of intermediate files '
+                               '(default: user cache directory)')
+    p_script.set_defaults(func=cmd_script)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.profile is None:
+        return args.func(args)
+    profiler.enabled = True
+    try:
+        return args.func(args)
+    finally:
+        try:
+            profiler.dump(args.profile)
+        except OSError as e:
+            print('%s: %s' % (args.profile, e), file=sys.stderr)
@@ -1,2 +1,17 @@
 from core.moment import Moment
+from core.profiling import Profiler, TimingStats, profiler, timed
 from core.model_data import ModelData
+from core.validation import ValidationReport, validate_intervals
+from core.command import CommandBuilder, CutJob, MultiCutJob
+from core.scheduler import DeviceScheduler
+from core.fingerprint import FingerprintCache, fingerprint_cache
+from core.journal import JobJournal, journal_path
+from core.output_cache import OutputCache
+from core.executor import JobExecutor, JobResult
+from core.concat import ConcatStage, ConcatJob, ConcatIOReport
+from core.keyframes import KeyframeIndex
+from core.interval_index import IntervalIndex
+from core.media_cache import MediaMeta, MediaMetaCache
+from core.project_loader import ProjectLoader, save_project
+from core.batch import BatchProject, ingest, load_batch, save_batch
+from core.script import render_script, script_stages, write_script
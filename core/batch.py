@@ -0,0 +1,262 @@
+"""Batch projects: many sources, each with its own intervals
+
+A batch file (``.vbatch``) is a JSON object::
+
+    {"dst_path_dir": "...", "sources": [<project>, ...]}
+
+Every source is a regular project object, a source without its own
+``dst_path_dir`` writes to the one of the batch. The commands of all
+sources form one job list, so they are scheduled together. Outputs are
+named after the source file, so two sources with the same file name
+must not share a destination directory (see ``output_collisions``).
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from core.command import CommandBuilder, MODE_PER_INTERVAL
+from core.media_cache import MediaMeta, MediaMetaCache
+from core.model_data import ModelData
+from core.project_loader import ProjectLoader
+from core.validation import ValidationReport
+from core.vcut import VCUT_EXT
+
+BATCH_EXT = '.vbatch'
+PROJECT_EXTS = ('.json', VCUT_EXT)
+MEDIA_EXTS = ('.mp4', '.mkv', '.mov', '.avi', '.flv', '.ts', '.m2ts',
+              '.mts', '.m4v', '.webm', '.wmv', '.mpg', '.mpeg', '.3gp')
+
+
+def _ext(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+
+def is_batch_path(path: str) -> bool:
+    return _ext(path) == BATCH_EXT
+
+
+def expand_paths(paths: Iterable[str],
+                 exts: Iterable[str] = None) -> List[str]:
+    """Files of ``paths`` with directories walked in sorted order
+
+    Files found in directories are kept when their extension is in
+    ``exts``, by default media, project and batch files. Files given
+    explicitly are always kept.
+    """
+    if exts is None:
+        exts = MEDIA_EXTS + PROJECT_EXTS + (BATCH_EXT,)
+    exts = frozenset(exts)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if _ext(name) in exts)
+        else:
+            files.append(path)
+    return files
+
+
+def source_path(model_data: ModelData) -> str:
+    return os.path.join(model_data.src_path_dir, model_data.src_filename)
+
+
+def output_key(model_data: ModelData) -> str:
+    """Outputs of sources with equal keys overwrite each other"""
+    return os.path.normcase(os.path.abspath(os.path.join(
+        model_data.dst_path_dir, model_data.src_filename)))
+
+
+def output_collisions(sources: Iterable[ModelData]) -> List[Tuple[int, int]]:
+    """``(first, other)`` indices of sources writing the same outputs"""
+    first = {}
+    collisions = []
+    for i, source in enumerate(sources):
+        key = output_key(source)
+        if key in first:
+            collisions.append((first[key], i))
+        else:
+            first[key] = i
+    return collisions
+
+
+def collision_message(sources: List[ModelData], first: int,
+                      other: int) -> str:
+    return 'source %d (%s) writes the same outputs as source %d (%s) in ' \
+           '%s' % (other, source_path(sources[other]), first,
+                   source_path(sources[first]),
+                   sources[other].dst_path_dir or '.')
+
+
+class BatchProject:
+    """An ordered list of sources (``ModelData``) sharing a job list"""
+
+    def __init__(self, sources: Iterable[ModelData] = (),
+                 dst_path_dir: str = ''):
+        self.sources = list(sources)  # type: List[ModelData]
+        self.dst_path_dir = dst_path_dir
+
+    def __len__(self):
+        return len(self.sources)
+
+    def add_media(self, path: str, dst_path_dir: str = None) -> ModelData:
+        """Append a source without intervals
+
+        Outputs go next to the source unless ``dst_path_dir`` is given.
+        """
+        src_path_dir, src_filename = os.path.split(os.path.abspath(path))
+        model_data = ModelData()
+        model_data.src_path_dir = src_path_dir
+        model_data.src_filename = src_filename
+        model_data.dst_path_dir = src_path_dir if dst_path_dir is None \
+            else dst_path_dir
+        self.sources.append(model_data)
+        return model_data
+
+    def intervals_size(self) -> int:
+        return sum(source.intervals_size() for source in self.sources)
+
+    def jobs(self, mode: str = MODE_PER_INTERVAL) -> Iterator:
+        return chain.from_iterable(CommandBuilder(source, mode).jobs()
+                                   for source in self.sources)
+
+    def commands(self, mode: str = MODE_PER_INTERVAL,
+                 ffmpeg: str = 'ffmpeg') -> Iterator[str]:
+        for job in self.jobs(mode):
+            yield job.command(ffmpeg)
+
+    @classmethod
+    def check(cls, kv: dict, max_errors: int = 10) -> ValidationReport:
+        report = ValidationReport(max_errors)
+        if not isinstance(kv, dict) or not isinstance(kv.get('sources'),
+                                                      list):
+            report.add(-1, 'expected an object with a "sources" array')
+            return report
+        if not isinstance(kv.get('dst_path_dir', ''), str):
+            report.add(-1, 'dst_path_dir is not a string')
+        for i, source in enumerate(kv['sources']):
+            if report.full:
+                break
+            for index, message in ModelData.check(
+                    source, max_errors - len(report.errors)).errors:
+                # 时间段的序号只在所属的源内有意义
+                report.add(-1, 'source %d: %s' % (i, message if index < 0
+                                                  else 'interval %d: %s'
+                                                  % (index, message)))
+        return report
+
+    @classmethod
+    def from_dict(cls, kv: dict) -> 'BatchProject':
+        """Build from a document that passed ``check``"""
+        dst_path_dir = kv.get('dst_path_dir', '')
+        sources = []
+        for source in kv['sources']:
+            if 'dst_path_dir' not in source:
+                source = dict(source, dst_path_dir=dst_path_dir)
+            sources.append(ModelData(source, check=False))
+        return cls(sources, dst_path_dir)
+
+    def to_json(self, indent: int = None) -> str:
+        return json.dumps({
+            'dst_path_dir': self.dst_path_dir,
+            'sources': [source.to_dict() for source in self.sources],
+        }, ensure_ascii=False, indent=indent)
+
+
+def load_batch(path: str, max_errors: int = 10) -> BatchProject:
+    """Raises ValueError when the file is not a valid batch"""
+    with open(path, 'r', encoding='utf8') as f:
+        kv = json.load(f)
+    report = BatchProject.check(kv, max_errors)
+    if not report.ok:
+        raise ValueError(str(report))
+    return BatchProject.from_dict(kv)
+
+
+def save_batch(batch: BatchProject, path: str, indent: int = None) -> None:
+    with open(path, 'w', encoding='utf8') as f:
+        f.write(batch.to_json(indent=indent))
+
+
+def ingest(paths: Iterable[str], batch: BatchProject = None,
+           dst_path_dir: str = None,
+           max_errors: int = 5) -> Tuple[BatchProject, List[Tuple[str, str]]]:
+    """Add everything found under ``paths`` to a batch
+
+    Projects and batches contribute their sources, any other file
+    becomes a source without intervals unless a project already refers
+    to it. A new source whose outputs would collide with another one
+    in ``dst_path_dir`` writes to a subdirectory named after its own
+    directory instead, created when its jobs run. Returns the batch and
+    ``(path, message)`` of unusable files and of colliding sources.
+    """
+    if batch is None:
+        batch = BatchProject(dst_path_dir=dst_path_dir or '')
+    failures = []
+    media = []
+    for path in expand_paths(paths):
+        ext = _ext(path)
+        if ext == BATCH_EXT:
+            try:
+                batch.sources.extend(load_batch(path, max_errors).sources)
+            except (OSError, ValueError) as e:
+                failures.append((path, str(e)))
+        elif ext in PROJECT_EXTS:
+            loader = ProjectLoader(path, max_errors=max_errors)
+            if loader.load() is None:
+                failures.append((path, str(loader.report)))
+            else:
+                batch.sources.append(loader.model_data)
+        else:
+            media.append(path)
+    known = {os.path.abspath(source_path(source)) for source in batch.sources}
+    outputs = {output_key(source) for source in batch.sources}
+    for path in media:
+        if os.path.abspath(path) in known:
+            continue
+        known.add(os.path.abspath(path))
+        model_data = batch.add_media(path, dst_path_dir)
+        if output_key(model_data) in outputs:
+            model_data.dst_path_dir = _unique_dst_dir(model_data, outputs)
+        outputs.add(output_key(model_data))
+    for first, other in output_collisions(batch.sources):
+        failures.append((source_path(batch.sources[other]),
+                         collision_message(batch.sources, first, other)))
+    return batch, failures
+
+
+def _unique_dst_dir(model_data: ModelData, outputs: set) -> str:
+    # 同名源文件各自输出到以其所在目录命名的子目录
+    name = os.path.basename(model_data.src_path_dir) or 'source'
+    dst_path_dir = model_data.dst_path_dir
+    candidate = os.path.join(dst_path_dir, name)
+    n = 1
+    while os.path.normcase(os.path.abspath(os.path.join(
+            candidate, model_data.src_filename))) in outputs:
+        n += 1
+        candidate = os.path.join(dst_path_dir, '%s_%d' % (name, n))
+    return candidate
+
+
+def probe_sources(sources: Iterable[ModelData], meta_cache: MediaMetaCache,
+                  workers: int = 4) -> List[Optional[MediaMeta]]:
+    """Probe all sources concurrently, None for inaccessible files
+
+    ``MediaMetaCache`` is thread safe and the prober mostly waits for
+    file I/O, so threads are enough. New entries are flushed once at
+    the end.
+    """
+    def probe(source: ModelData) -> Optional[MediaMeta]:
+        try:
+            return meta_cache.get(source_path(source))
+        except OSError:
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return list(pool.map(probe, sources))
+    finally:
+        meta_cache.flush()
@@ -0,0 +1,201 @@
+import os
+import shlex
+import subprocess
+from typing import Iterator, List, Sequence
+
+from core.moment import Moment
+from core.model_data import ModelData
+
+
+# 每个时间段各自调用一次ffmpeg
+MODE_PER_INTERVAL = 'per_interval'
+# 同一源文件只读取一次，由一个ffmpeg进程输出所有时间段
+MODE_MULTI_OUTPUT = 'multi_output'
+
+
+def to_native_separators(path: str) -> str:
+    """Same as QDir.toNativeSeparators, without importing PyQt5"""
+    return path.replace('/', os.sep) if os.sep != '/' else path
+
+
+def format_moment(moment: Moment) -> str:
+    return '%02d:%02d:%02d' % moment.to_hms()
+
+
+def quote_argv(argv: Sequence[str]) -> str:
+    """Command line of ``argv`` quoted for the shell of the platform"""
+    if os.name == 'nt':
+        return subprocess.list2cmdline(argv)
+    return ' '.join(shlex.quote(arg) for arg in argv)
+
+
+class CutJob:
+    """A single ffmpeg invocation that cuts one interval out of the source"""
+
+    def __init__(self, index: int, begin: Moment, end: Moment,
+                 src_path: str, dst_path: str):
+        self.index = index
+        self.begin = begin
+        self.end = end
+        self.src_path = src_path
+        self.dst_path = dst_path
+
+    @property
+    def duration(self) -> Moment:
+        return self.end - self.begin
+
+    def argv(self, ffmpeg: str = 'ffmpeg') -> List[str]:
+        return [
+            ffmpeg,
+            '-ss', format_moment(self.begin),
+            '-t', format_moment(self.duration),
+            '-i', self.src_path,
+            '-vcodec', 'copy', '-acodec', 'copy',
+            self.dst_path,
+        ]
+
+    def command(self, ffmpeg: str = 'ffmpeg') -> str:
+        return quote_argv(self.argv(ffmpeg))
+
+
+class MultiCutJob:
+    """A single ffmpeg invocation for many cuts of one source
+
+    The source is opened and seeked once. Contiguous, ordered cuts of
+    non-zero length are split by the segment muxer. Otherwise every
+    output gets its own output-side ``-ss``/``-t``, which with
+    ``-c copy`` would drop the packets before the first keyframe of
+    each cut. ``-copyinkf`` keeps them, so no frames are lost, but a
+    cut that does not start on a keyframe begins with frames that
+    cannot be decoded until the next keyframe. Per-interval mode
+    seeks on the input instead and starts on the preceding keyframe.
+    """
+
+    def __init__(self, cuts: Sequence[CutJob], dst_pattern: str):
+        self.cuts = list(cuts)
+        self.index = self.cuts[0].index
+        self.src_path = self.cuts[0].src_path
+        self.dst_path = dst_pattern
+
+    @property
+    def duration(self) -> Moment:
+        total = Moment()
+        for cut in self.cuts:
+            total = total + cut.duration
+        return total
+
+    def is_contiguous(self) -> bool:
+        """Whether the segment muxer can split the cuts
+
+        Its split times have to be strictly increasing, so a cut of
+        zero length makes the job fall back to one output per cut.
+        """
+        if any(cut.end <= cut.begin for cut in self.cuts):
+            return False
+        for i in range(1, len(self.cuts)):
+            prev, cut = self.cuts[i - 1], self.cuts[i]
+            if prev.end != cut.begin or cut.index != prev.index + 1:
+                return False
+        return True
+
+    def argv(self, ffmpeg: str = 'ffmpeg') -> List[str]:
+        if len(self.cuts) > 1 and self.is_contiguous():
+            return self._argv_segment(ffmpeg)
+        return self._argv_multi_output(ffmpeg)
+
+    def _argv_segment(self, ffmpeg: str) -> List[str]:
+        first, last = self.cuts[0], self.cuts[-1]
+        offset = first.begin.to_secs()
+        return [
+            ffmpeg,
+            '-ss', format_moment(first.begin),
+            '-i', self.src_path,
+            '-t', format_moment(last.end - first.begin),
+            '-vcodec', 'copy', '-acodec', 'copy',
+            '-f', 'segment',
+            '-segment_times', ','.join(str(cut.end.to_secs() - offset)
+                                       for cut in self.cuts[:-1]),
+            '-segment_start_number', str(first.index),
+            '-reset_timestamps', '1',
+            self.dst_path,
+        ]
+
+    def _argv_multi_output(self, ffmpeg: str) -> List[str]:
+        # 输入端跳转到最早的起点，之后的时间均相对于该起点
+        start = min(cut.begin for cut in self.cuts)
+        argv = [ffmpeg, '-ss', format_moment(start), '-i', self.src_path]
+        for cut in self.cuts:
+            argv.extend([
+                '-ss', format_moment(cut.begin - start),
+                '-t', format_moment(cut.duration),
+                '-vcodec', 'copy', '-acodec', 'copy', '-copyinkf',
+                cut.dst_path,
+            ])
+        return argv
+
+    def command(self, ffmpeg: str = 'ffmpeg') -> str:
+        return quote_argv(self.argv(ffmpeg))
+
+
+class CommandBuilder:
+    """Turn the intervals of a ModelData into ffmpeg cut jobs
+
+    Paths are resolved once on construction, create a new builder
+    after src/dst paths have been changed. ``dst_path_dir`` overrides
+    the destination directory of the project.
+    """
+
+    def __init__(self, model_data: ModelData,
+                 mode: str = MODE_PER_INTERVAL, dst_path_dir: str = None):
+        self._model_data = model_data
+        self.mode = mode
+        src_filename = model_data.src_filename
+        self.src_path = to_native_separators(
+            os.path.join(model_data.src_path_dir, src_filename)
+        )
+        self.dst_path_dir = to_native_separators(
+            model_data.dst_path_dir if dst_path_dir is None else dst_path_dir
+        )
+        self.dst_prefix, self.dst_suffix = os.path.splitext(src_filename)
+
+    @property
+    def model_data(self) -> ModelData:
+        return self._model_data
+
+    def dst_path(self, index: int) -> str:
+        return os.path.join(
+            self.dst_path_dir,
+            '%s_%d%s' % (self.dst_prefix, index, self.dst_suffix)
+        )
+
+    def dst_pattern(self) -> str:
+        """Output path as an ffmpeg pattern, ``%d`` is the interval index"""
+        return os.path.join(
+            self.dst_path_dir,
+            '%s_%%d%s' % (self.dst_prefix.replace('%', '%%'),
+                          self.dst_suffix.replace('%', '%%'))
+        )
+
+    def job(self, index: int, begin: int, end: int) -> CutJob:
+        return CutJob(index,
+                      Moment.from_secs(begin),
+                      Moment.from_secs(end),
+                      self.src_path,
+                      self.dst_path(index))
+
+    def cut_jobs(self) -> Iterator[CutJob]:
+        for index, (begin, end) in \
+                enumerate(self._model_data.intervals_secs_iter()):
+            yield self.job(index, begin, end)
+
+    def jobs(self) -> Iterator:
+        if self.mode == MODE_MULTI_OUTPUT:
+            cuts = list(self.cut_jobs())
+            if cuts:
+                yield MultiCutJob(cuts, self.dst_pattern())
+        else:
+            yield from self.cut_jobs()
+
+    def commands(self, ffmpeg: str = 'ffmpeg') -> Iterator[str]:
+        for job in self.jobs():
+            yield job.command(ffmpeg)
@@ -0,0 +1,196 @@
+"""Join the cut intervals into one output with the concat demuxer
+
+Every interval is first cut into a scratch directory as usual, then a
+single ``-f concat -c copy`` pass writes the joined file. Both passes
+are stream copies, nothing is re-encoded.
+"""
+import hashlib
+import os
+import shutil
+from typing import Callable, Iterator, List, NamedTuple
+
+from core.command import CommandBuilder, MODE_PER_INTERVAL, quote_argv
+from core.executor import JobExecutor, JobResult
+from core.model_data import ModelData
+from core.output_cache import OutputCache
+from core.paths import user_cache_dir
+
+# 与CommandBuilder的模式并列，仅用于区分输出的渲染方式
+MODE_CONCAT = 'concat'
+
+
+def concat_list_line(path: str) -> str:
+    """``file`` directive of the concat demuxer, single quotes escaped"""
+    return "file '%s'" % path.replace("'", "'\\''")
+
+
+class ConcatJob:
+    """The final ffmpeg invocation joining all parts listed in a file"""
+
+    def __init__(self, list_path: str, parts: List[str], dst_path: str):
+        self.list_path = list_path
+        self.parts = parts
+        self.dst_path = dst_path
+
+    def list_lines(self) -> List[str]:
+        # 相对路径会相对于列表文件所在的目录解析
+        return [concat_list_line(os.path.abspath(part))
+                for part in self.parts]
+
+    def write_list(self) -> None:
+        with open(self.list_path, 'w', encoding='utf8') as f:
+            for line in self.list_lines():
+                f.write(line)
+                f.write('\n')
+
+    def argv(self, ffmpeg: str = 'ffmpeg') -> List[str]:
+        # 列表中为绝对路径，需要-safe 0
+        return [
+            ffmpeg,
+            '-f', 'concat', '-safe', '0',
+            '-i', self.list_path,
+            '-c', 'copy',
+            self.dst_path,
+        ]
+
+    def command(self, ffmpeg: str = 'ffmpeg') -> str:
+        return quote_argv(self.argv(ffmpeg))
+
+
+class ConcatIOReport(NamedTuple):
+    """Bytes moved by the concat stage, measured before cleanup
+
+    Stream copy reads about as much of the source as it writes, so a
+    part costs its size once for reading and once for writing, and is
+    read again by the concat pass. Re-encoding the same ranges in one
+    pass reads the source ranges and writes the output once, assuming
+    the same bitrate, but decodes and encodes every frame.
+    """
+    parts: int
+    part_bytes: int
+    output_bytes: int
+
+    @property
+    def copy_bytes(self) -> int:
+        return 3 * self.part_bytes + self.output_bytes
+
+    @property
+    def reencode_bytes(self) -> int:
+        return self.part_bytes + self.output_bytes
+
+
+class ConcatStage:
+    """Cut every interval into ``scratch_dir`` and join the parts
+
+    Every stage works in its own ``stage_dir`` below ``scratch_dir``,
+    so sources with the same file name do not clobber each other. Its
+    name is derived from the source and destination paths, so the
+    commands shown before a run are the ones that run. It is created
+    by ``prepare``. Parts keep the usual ``<name>_<index><ext>``
+    names and are joined in row order into ``dst_path``, by default
+    ``<name>_concat<ext>`` in the destination directory. ``cleanup``
+    deletes the stage directory, nothing else in the scratch directory
+    is touched.
+    """
+
+    def __init__(self, model_data: ModelData,
+                 mode: str = MODE_PER_INTERVAL,
+                 scratch_dir: str = None, dst_path: str = None):
+        if scratch_dir is None:
+            scratch_dir = user_cache_dir('scratch')
+        self.scratch_dir = os.path.abspath(scratch_dir)
+        default = CommandBuilder(model_data)
+        prefix, suffix = default.dst_prefix, default.dst_suffix
+        if dst_path is None:
+            dst_path = os.path.join(default.dst_path_dir,
+                                    '%s_concat%s' % (prefix, suffix))
+        self.dst_path = dst_path
+        key = '\0'.join((os.path.abspath(default.src_path),
+                         os.path.abspath(dst_path)))
+        self.stage_dir = os.path.join(self.scratch_dir, '%s_%s' % (
+            prefix, hashlib.sha1(key.encode('utf8')).hexdigest()[:12]))
+        self.builder = CommandBuilder(model_data, mode,
+                                      dst_path_dir=self.stage_dir)
+        self.list_path = os.path.join(self.stage_dir,
+                                      '%s_concat.txt' % prefix)
+        self.report = None  # type: ConcatIOReport
+
+    @property
+    def mode(self) -> str:
+        return MODE_CONCAT
+
+    @property
+    def model_data(self) -> ModelData:
+        return self.builder.model_data
+
+    def parts(self) -> List[str]:
+        return [cut.dst_path for cut in self.builder.cut_jobs()]
+
+    def cut_jobs(self) -> Iterator:
+        return self.builder.jobs()
+
+    def concat_job(self) -> ConcatJob:
+        return ConcatJob(self.list_path, self.parts(), self.dst_path)
+
+    def commands(self, ffmpeg: str = 'ffmpeg') -> Iterator[str]:
+        yield from self.builder.commands(ffmpeg)
+        if self.model_data.intervals_size():
+            yield self.concat_job().command(ffmpeg)
+
+    def prepare(self) -> ConcatJob:
+        """Create the stage directory and write the list file"""
+        os.makedirs(self.stage_dir, exist_ok=True)
+        job = self.concat_job()
+        job.write_list()
+        return job
+
+    def io_report(self) -> ConcatIOReport:
+        parts = [part for part in self.parts() if os.path.isfile(part)]
+        output_bytes = os.path.getsize(self.dst_path) \
+            if os.path.isfile(self.dst_path) else 0
+        return ConcatIOReport(len(parts),
+                              sum(map(os.path.getsize, parts)),
+                              output_bytes)
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+
+    def run(self, workers: int = 4, ffmpeg: str = 'ffmpeg',
+            overwrite: bool = False,
+            on_finish: Callable[[JobResult], None] = None,
+            per_device: int = 0,
+            output_cache: OutputCache = None) -> List[JobResult]:
+        """Run both passes, the concat pass only when all cuts succeeded
+
+        ``report`` is filled in and the intermediate files are deleted
+        even if the run fails or is interrupted.
+        """
+        try:
+            job = self.prepare()
+            # 临时目录中的残留文件总是覆盖
+            results = self.__wait(JobExecutor(
+                self.cut_jobs(), workers=workers, ffmpeg=ffmpeg,
+                overwrite=True, on_finish=on_finish, per_device=per_device,
+                output_cache=output_cache
+            ))
+            if results and all(result.ok for result in results):
+                results.extend(self.__wait(JobExecutor(
+                    [job], workers=1, ffmpeg=ffmpeg,
+                    overwrite=overwrite, on_finish=on_finish
+                )))
+        finally:
+            self.report = self.io_report()
+            self.cleanup()
+        return results
+
+    @staticmethod
+    def __wait(executor: JobExecutor) -> List[JobResult]:
+        executor.start()
+        try:
+            while not executor.wait(0.2):
+                pass
+        except KeyboardInterrupt:
+            executor.cancel()
+            executor.wait()
+            raise
+        return executor.results
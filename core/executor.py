@@ -0,0 +1,226 @@
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.journal import JobJournal, job_outputs
+from core.output_cache import OutputCache
+from core.scheduler import DeviceScheduler, device_of
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_SKIPPED = 'skipped'
+JOB_CACHED = 'cached'
+
+
+class JobResult:
+    """Execution state of one job, updated in place by the executor"""
+
+    def __init__(self, job):
+        self.job = job
+        self.status = JOB_PENDING
+        self.returncode = None  # type: Optional[int]
+        self.elapsed = 0.0
+        self.stderr = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (JOB_DONE, JOB_SKIPPED, JOB_CACHED)
+
+
+class JobExecutor:
+    """Run ffmpeg jobs on a pool of worker threads, one process per job
+
+    Each job only has to provide ``argv(ffmpeg)``. Stream copy cuts are
+    I/O bound, so threads waiting on child processes are enough.
+    Jobs are started longest first, ``per_device`` limits the jobs
+    running on one disk (see ``DeviceScheduler``). With a ``journal``
+    jobs completed by an earlier run are skipped and every start and
+    finish is recorded. With an ``output_cache`` cached segments are
+    linked instead of cut, and new ones are added to it. Missing output
+    directories are created. Callbacks are invoked from worker threads.
+    """
+
+    def __init__(self, jobs: Iterable, workers: int = 4,
+                 ffmpeg: str = 'ffmpeg', overwrite: bool = False,
+                 on_start: Callable[[JobResult], None] = None,
+                 on_finish: Callable[[JobResult], None] = None,
+                 per_device: int = 0, device_limits: Dict[int, int] = None,
+                 device_of: Callable[[str], int] = device_of,
+                 journal: JobJournal = None,
+                 output_cache: OutputCache = None):
+        self._results = [JobResult(job) for job in jobs]
+        self._workers = max(1, workers)
+        self._ffmpeg = ffmpeg
+        self._overwrite = overwrite
+        self._on_start = on_start
+        self._on_finish = on_finish
+        self._per_device = per_device
+        self._device_limits = device_limits
+        self._device_of = device_of
+        self._journal = journal
+        self._output_cache = output_cache
+        self._scheduler = None  # type: DeviceScheduler
+        self._threads = []  # type: List[threading.Thread]
+        self._procs = {}  # type: dict
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def results(self) -> List[JobResult]:
+        return self._results
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def overwrites(self, job) -> bool:
+        # 日志中记录过开始的任务的输出可能只写了一半，总是覆盖
+        return self._overwrite or (self._journal is not None
+                                   and self._journal.owns(job))
+
+    def argv(self, job) -> List[str]:
+        argv = job.argv(self._ffmpeg)
+        # 禁止ffmpeg从stdin读取确认，由overwrite决定是否覆盖已有文件
+        argv[1:1] = ['-nostdin', '-y' if self.overwrites(job) else '-n']
+        return argv
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._scheduler = DeviceScheduler(self._results, self._per_device,
+                                          self._device_limits,
+                                          self._device_of)
+        if self._cancelled.is_set():
+            self._scheduler.cancel()
+        for _ in range(min(self._workers, len(self._results))):
+            thread = threading.Thread(target=self._work, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None
+                        else max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                return False
+        return True
+
+    def run(self) -> List[JobResult]:
+        self.start()
+        self.wait()
+        return self._results
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+        with self._lock:
+            for proc in self._procs.values():
+                proc.terminate()
+
+    def _work(self) -> None:
+        while True:
+            result = self._scheduler.acquire()
+            if result is None:
+                return
+            if self._cancelled.is_set():
+                self._scheduler.release(result)
+                result.status = JOB_CANCELLED
+                self._notify(self._on_finish, result)
+                continue
+            if self._journal is not None \
+                    and self._journal.is_complete(result.job):
+                self._scheduler.release(result)
+                result.status = JOB_SKIPPED
+                self._notify(self._on_finish, result)
+                continue
+            if self._output_cache is not None and self._output_cache.fetch(
+                    result.job, self.overwrites(result.job)):
+                self._scheduler.release(result)
+                result.status = JOB_CACHED
+                self.__journal_finish(result)
+                self._notify(self._on_finish, result)
+                continue
+            try:
+                self._execute(result)
+            finally:
+                self._scheduler.release(result)
+
+    def _execute(self, result: JobResult) -> None:
+        result.status = JOB_RUNNING
+        self._notify(self._on_start, result)
+        begin = time.monotonic()
+        fresh = False
+        try:
+            # 批处理中同名源文件的输出子目录在运行时才创建
+            for path in {os.path.dirname(path)
+                         for path in job_outputs(result.job)}:
+                if path:
+                    os.makedirs(path, exist_ok=True)
+            if self._output_cache is not None:
+                fresh = self.__unlink_outputs(result.job)
+            with self._lock:
+                if self._cancelled.is_set():
+                    raise InterruptedError()
+                if self._journal is not None:
+                    self._journal.start(result.job)
+                proc = subprocess.Popen(self.argv(result.job),
+                                        stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE)
+                self._procs[id(result)] = proc
+            try:
+                _, stderr = proc.communicate()
+            finally:
+                with self._lock:
+                    del self._procs[id(result)]
+            result.returncode = proc.returncode
+            result.stderr = stderr.decode('utf8', 'replace')
+            if self._cancelled.is_set() and proc.returncode != 0:
+                result.status = JOB_CANCELLED
+            else:
+                result.status = JOB_DONE if proc.returncode == 0 \
+                    else JOB_FAILED
+        except InterruptedError:
+            result.status = JOB_CANCELLED
+        except OSError as e:
+            result.status = JOB_FAILED
+            result.stderr = str(e)
+        result.elapsed = time.monotonic() - begin
+        if fresh and result.ok:
+            self._output_cache.store(result.job)
+        if result.status != JOB_CANCELLED:
+            self.__journal_finish(result)
+        self._notify(self._on_finish, result)
+
+    def __unlink_outputs(self, job) -> bool:
+        """Whether ffmpeg will write every output of ``job`` itself"""
+        outputs = [path for path in job_outputs(job)
+                   if os.path.lexists(path)]
+        if not outputs:
+            return True
+        if not self.overwrites(job):
+            # 不覆盖时ffmpeg保留已有的文件，它们不能加入缓存
+            return False
+        # 输出可能是缓存条目的硬链接，先断开再覆盖
+        for path in outputs:
+            os.remove(path)
+        return True
+
+    def __journal_finish(self, result: JobResult) -> None:
+        if self._journal is not None:
+            try:
+                self._journal.finish(result)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _notify(callback, result: JobResult) -> None:
+        if callback is not None:
+            callback(result)
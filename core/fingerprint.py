@@ -0,0 +1,124 @@
+"""Sampled fingerprints of large files
+
+Hashing a whole recording costs more than cutting it. A fingerprint
+combines the size and mtime with a hash of the first and last blocks
+and of ``SAMPLES`` evenly spaced blocks in between, so it reads the
+same amount of data whatever the file size. Blocks are read with
+``os.pread`` (``mmap`` where it is missing), the file is never copied
+as a whole. ``full=True`` hashes every byte instead, for verification.
+
+Results are cached per ``(path, st_ino, st_mtime_ns)``, a replaced or
+modified file gets a new entry.
+"""
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterator, Tuple
+
+BLOCK = 1 << 16
+SAMPLES = 16
+# 全量模式下每次交给hash的数据量
+FULL_CHUNK = 1 << 24
+
+
+def _offsets(size: int, block: int, samples: int) -> Iterator[int]:
+    yield 0
+    span = size - block
+    for i in range(1, samples + 1):
+        yield span * i // (samples + 1)
+    yield span
+
+
+def _blocks(fd: int, offsets: Iterator[int],
+            block: int) -> Iterator[bytes]:
+    if hasattr(os, 'pread'):
+        for offset in offsets:
+            yield os.pread(fd, block, offset)
+        return
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+        for offset in offsets:
+            yield mm[offset:offset + block]
+
+
+def sample_digest(path: str, block: int = BLOCK,
+                  samples: int = SAMPLES) -> Tuple[int, str]:
+    """``(size, hex digest)`` of the sampled blocks, content only"""
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+        if size <= block * (samples + 2):
+            # 小文件直接读取全部内容
+            offsets = iter(range(0, size, block))
+        else:
+            offsets = _offsets(size, block, samples)
+        if size:
+            for data in _blocks(fd, offsets, block):
+                digest.update(data)
+        return size, digest.hexdigest()
+    finally:
+        os.close(fd)
+
+
+def full_digest(path: str) -> Tuple[int, str]:
+    """``(size, hex digest)`` of every byte"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(str(size).encode())
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, FULL_CHUNK):
+                        digest.update(view[offset:offset + FULL_CHUNK])
+                finally:
+                    view.release()
+    return size, digest.hexdigest()
+
+
+class FingerprintCache:
+    """Thread safe LRU cache of fingerprints"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # type: OrderedDict[tuple, str]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, path: str, full: bool = False) -> str:
+        """``<size>-<mtime_ns>-<digest>``, ``full-`` prefixed in full mode
+
+        Raises OSError when the file cannot be read.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (path, st.st_ino, st.st_mtime_ns, full)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        size, digest = full_digest(path) if full else sample_digest(path)
+        value = '%s%d-%d-%s' % ('full-' if full else '', size,
+                                st.st_mtime_ns, digest)
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+fingerprint_cache = FingerprintCache()
+
+
+def fingerprint(path: str, full: bool = False) -> str:
+    return fingerprint_cache.get(path, full)
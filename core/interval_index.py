@@ -0,0 +1,172 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+class IntervalStats(NamedTuple):
+    count: int
+    total: int
+    union: int
+    longest: int
+    shortest: int
+
+
+class IntervalIndex:
+    """Sorted begin/end seconds of all intervals, independent of row order
+
+    Intervals are half-open ``[begin, end)``, two of them overlap when
+    they share a positive amount of time. Counting the intervals that
+    overlap a given one takes two bisections, O(log n).
+
+    Updates are not O(log n). ``add``/``remove`` insert into or delete
+    from two sorted arrays, an O(n) memmove, and keep the union length
+    up to date by sweeping the k interval boundaries inside the changed
+    interval, O(k log k). Longest/shortest lengths come from two heaps
+    with lazy deletion, O(log n) amortized.
+
+    A segment tree would bring the union update down to O(log n), but
+    its coordinates are not known in advance: almost every edit adds
+    new begin/end seconds, so a tree over compressed coordinates would
+    have to be rebuilt, O(n), on most updates. A sparse tree over raw
+    seconds costs dozens of Python-level node visits per update, which
+    is slower than the C-level memmove for any realistic project.
+    ``benchmark/bench_interval_index.py`` measures 55 us per update at
+    10k densely overlapping intervals and 0.4 ms at 100k, dominated by
+    the sweep (k is in the thousands there). Sparse projects with few
+    overlaps stay in the microseconds.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        pairs = list(intervals)
+        self._begins = array('q', sorted(begin for begin, _ in pairs))
+        self._ends = array('q', sorted(end for _, end in pairs))
+        self._pairs = Counter(pairs)
+        self._total = sum(end - begin for begin, end in pairs)
+        self._union = sum(end - begin for begin, end in merge_intervals(pairs))
+        self._lengths = Counter(end - begin for begin, end in pairs)
+        self.__rebuild_heaps()
+
+    def __rebuild_heaps(self):
+        # 丢弃已被惰性删除的长度
+        self._shortest = [length for length in self._lengths]
+        heapq.heapify(self._shortest)
+        self._longest = [-length for length in self._lengths]
+        heapq.heapify(self._longest)
+
+    def __len__(self):
+        return len(self._begins)
+
+    @property
+    def total_length(self) -> int:
+        return self._total
+
+    @property
+    def union_length(self) -> int:
+        return self._union
+
+    @property
+    def longest_length(self) -> int:
+        heap = self._longest
+        # 惰性删除：堆顶的长度可能已经不存在了
+        while heap and not self._lengths[-heap[0]]:
+            heapq.heappop(heap)
+        return -heap[0] if heap else 0
+
+    @property
+    def shortest_length(self) -> int:
+        heap = self._shortest
+        while heap and not self._lengths[heap[0]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else 0
+
+    def stats(self) -> IntervalStats:
+        return IntervalStats(len(self._begins), self._total, self._union,
+                             self.longest_length, self.shortest_length)
+
+    @property
+    def overlap_length(self) -> int:
+        """Time that is cut more than once, counted once per extra cut"""
+        return self._total - self._union
+
+    def __uncovered(self, begin: int, end: int) -> int:
+        """Length of ``[begin, end)`` not covered by any interval"""
+        begins, ends = self._begins, self._ends
+        depth = bisect_right(begins, begin) - bisect_right(ends, begin)
+        events = sorted(
+            [(t, 1) for t in begins[bisect_right(begins, begin):
+                                    bisect_left(begins, end)]]
+            + [(t, -1) for t in ends[bisect_right(ends, begin):
+                                     bisect_left(ends, end)]]
+        )
+        uncovered, prev = 0, begin
+        for t, delta in events:
+            if depth == 0:
+                uncovered += t - prev
+            depth += delta
+            prev = t
+        if depth == 0:
+            uncovered += end - prev
+        return uncovered
+
+    def add(self, begin: int, end: int) -> None:
+        if begin < end:
+            self._union += self.__uncovered(begin, end)
+        insort(self._begins, begin)
+        insort(self._ends, end)
+        self._pairs[begin, end] += 1
+        self._total += end - begin
+        length = end - begin
+        if not self._lengths[length]:
+            if len(self._shortest) > 2 * len(self._lengths) + 16:
+                self.__rebuild_heaps()
+            heapq.heappush(self._shortest, length)
+            heapq.heappush(self._longest, -length)
+        self._lengths[length] += 1
+
+    def remove(self, begin: int, end: int) -> None:
+        del self._begins[bisect_left(self._begins, begin)]
+        del self._ends[bisect_left(self._ends, end)]
+        self._pairs[begin, end] -= 1
+        if not self._pairs[begin, end]:
+            del self._pairs[begin, end]
+        self._total -= end - begin
+        self._lengths[end - begin] -= 1
+        if not self._lengths[end - begin]:
+            del self._lengths[end - begin]
+        if begin < end:
+            self._union -= self.__uncovered(begin, end)
+
+    def overlap_count(self, begin: int, end: int) -> int:
+        """Number of other indexed intervals overlapping ``[begin, end)``
+
+        The interval itself must be indexed. An empty interval overlaps
+        the intervals it lies strictly inside of.
+        """
+        if begin >= end:
+            # begin_j < t < end_j，减去的部分中包含所有位于t的空区间
+            return bisect_left(self._begins, begin) \
+                - bisect_right(self._ends, begin) \
+                + self._pairs.get((begin, begin), 0)
+        # begin_j < end 且 end_j > begin；end_j <= begin 的必然满足前者
+        return bisect_left(self._begins, end) \
+            - bisect_right(self._ends, begin) - 1
+
+    def duplicate_count(self, begin: int, end: int) -> int:
+        """Number of other indexed intervals equal to ``[begin, end)``"""
+        return max(self._pairs.get((begin, end), 0) - 1, 0)
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]],
+                    adjacent: bool = True) -> List[Tuple[int, int]]:
+    """Sorted union of intervals, touching ones are joined if ``adjacent``"""
+    merged = []
+    for begin, end in sorted(intervals):
+        if merged and (begin < merged[-1][1]
+                       or adjacent and begin == merged[-1][1]):
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((begin, end))
+    return merged
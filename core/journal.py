@@ -0,0 +1,170 @@
+"""Append-only journal of executed jobs, used to resume interrupted runs
+
+One JSON object per line::
+
+    {"event": "start", "key": ..., "argv": [...], "time": ...}
+    {"event": "finish", "key": ..., "status": "done", "returncode": 0,
+     "elapsed": ..., "sources": [<fingerprint>, ...],
+     "outputs": [{"path": ..., "size": ..., "checksum": ...}]}
+
+``key`` identifies the parameters of a job (its argv without the ffmpeg
+executable). A job is complete when its latest finish record is done,
+its sources still have the recorded fingerprints (a source replaced
+under the same path invalidates it) and every output still has the
+recorded size and checksum. A torn last line, left by a killed
+process, is ignored.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.fingerprint import fingerprint, sample_digest
+
+JOURNAL_EXT = '.journal'
+
+
+def journal_path(project_path: str) -> str:
+    """``<project>.journal`` next to a project, inside a directory"""
+    if os.path.isdir(project_path):
+        return os.path.join(project_path, 'vcut' + JOURNAL_EXT)
+    return os.path.splitext(project_path)[0] + JOURNAL_EXT
+
+
+def job_key(job) -> str:
+    argv = job.argv('ffmpeg')[1:]
+    return hashlib.sha1(json.dumps(argv, ensure_ascii=False)
+                        .encode('utf8')).hexdigest()
+
+
+def job_outputs(job) -> List[str]:
+    # 多输出任务的dst_path可能是segment的文件名模板
+    return [cut.dst_path for cut in job.cuts] if hasattr(job, 'cuts') \
+        else [job.dst_path]
+
+
+def job_sources(job) -> List[str]:
+    # 合并任务读取各个片段
+    return [job.src_path] if hasattr(job, 'src_path') \
+        else list(getattr(job, 'parts', []))
+
+
+def source_fingerprints(job) -> Optional[List[str]]:
+    try:
+        return [fingerprint(path) for path in job_sources(job)]
+    except OSError:
+        return None
+
+
+def output_record(path: str) -> Optional[dict]:
+    # 只比较内容，复制或touch过的输出仍然有效
+    try:
+        size, checksum = sample_digest(path)
+    except OSError:
+        return None
+    return {'path': path, 'size': size, 'checksum': checksum}
+
+
+class JobJournal:
+    """Thread safe journal file, replayed on construction
+
+    Every record is flushed right away, so a killed run loses at most
+    the line being written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._starts = set()
+        self._finished = {}  # type: Dict[str, dict]
+        self._lock = threading.Lock()
+        self._file = None
+        self._torn = False
+        self.__replay()
+
+    def __replay(self) -> None:
+        try:
+            f = open(self.path, 'r', encoding='utf8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                self._torn = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                    key = record['key']
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if record.get('event') == 'start':
+                    self._starts.add(key)
+                elif record.get('event') == 'finish':
+                    self._finished[key] = record
+
+    def __len__(self):
+        return len(self._finished)
+
+    def owns(self, job) -> bool:
+        """Whether the outputs of ``job`` were written by a journaled run
+
+        Such outputs may be left over half written and can be
+        overwritten without asking.
+        """
+        return job_key(job) in self._starts
+
+    def is_complete(self, job) -> bool:
+        record = self._finished.get(job_key(job))
+        if record is None or record.get('status') != 'done':
+            return False
+        sources = source_fingerprints(job)
+        if sources is None or record.get('sources') != sources:
+            return False
+        outputs = record.get('outputs', [])
+        if [output.get('path') for output in outputs] != job_outputs(job):
+            return False
+        return all(output_record(output['path']) == output
+                   for output in outputs)
+
+    def start(self, job) -> None:
+        key = job_key(job)
+        self.__append({'event': 'start', 'key': key,
+                       'argv': job.argv('ffmpeg')[1:], 'time': time.time()})
+        with self._lock:
+            self._starts.add(key)
+
+    def finish(self, result) -> None:
+        key = job_key(result.job)
+        record = {'event': 'finish', 'key': key, 'status': result.status,
+                  'returncode': result.returncode,
+                  'elapsed': result.elapsed, 'time': time.time()}
+        if result.ok:
+            sources = source_fingerprints(result.job)
+            outputs = [output_record(path)
+                       for path in job_outputs(result.job)]
+            # 源文件或输出缺失时不记录为完成
+            if sources is None or None in outputs:
+                record['status'] = 'missing'
+            else:
+                record['sources'] = sources
+                record['outputs'] = outputs
+        self.__append(record)
+        with self._lock:
+            self._finished[key] = record
+
+    def __append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf8')
+                if self._torn:
+                    # 上次运行被中断时写了半行
+                    self._file.write('\n')
+                    self._torn = False
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+
+from core.model_data import ModelData
+from core.paths import user_cache_dir
+from core.profiling import timed
+
+
+def format_seconds(t: float) -> str:
+    mins, secs = divmod(t, 60)
+    hour, mins = divmod(int(mins), 60)
+    return '%02d:%02d:%06.3f' % (hour, mins, secs)
+
+
+class KeyframeIndex:
+    """Sorted keyframe timestamps (seconds) of the first video stream
+
+    Stream copy cuts can only start on a keyframe, so ``-ss`` really
+    lands on the last keyframe at or before the requested time.
+    """
+
+    def __init__(self, times: Iterable[float] = ()):
+        self._times = array('d', sorted(times))
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def times(self) -> array:
+        return self._times
+
+    def snap_begin(self, t: float) -> float:
+        i = bisect_right(self._times, t)
+        return self._times[i - 1] if i else 0.0
+
+    def snap_end(self, t: float) -> float:
+        i = bisect_left(self._times, t)
+        return self._times[i] if i < len(self._times) else t
+
+    def snap_interval(self, begin: float, end: float) -> Tuple[float, float]:
+        return self.snap_begin(begin), self.snap_end(end)
+
+    def snap_intervals(self, intervals: Iterable[Tuple[float, float]]) \
+            -> List[Tuple[float, float]]:
+        snap_begin, snap_end = self.snap_begin, self.snap_end
+        return [(snap_begin(begin), snap_end(end))
+                for begin, end in intervals]
+
+    def snap_model_data(self, model_data: ModelData) \
+            -> List[Tuple[float, float]]:
+        return self.snap_intervals(model_data.intervals_secs_iter())
+
+    @classmethod
+    def probe(cls, path: str, ffprobe: str = 'ffprobe') -> 'KeyframeIndex':
+        # 只读取包头的flags，无需解码
+        proc = subprocess.run(
+            [ffprobe, '-v', 'error',
+             '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,flags',
+             '-of', 'csv=p=0',
+             path],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        times = array('d')
+        for line in proc.stdout.splitlines():
+            pts_time, _, flags = line.partition(b',')
+            if flags.startswith(b'K') and pts_time != b'N/A':
+                times.append(float(pts_time))
+        return cls(times)
+
+    @classmethod
+    @timed()
+    def load(cls, path: str, ffprobe: str = 'ffprobe',
+             cache_dir: str = None) -> 'KeyframeIndex':
+        """Probe the file once, later calls read the on-disk cache
+
+        The cache is keyed by absolute path, size and mtime, so it is
+        invalidated whenever the source is replaced or modified.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = hashlib.sha1(('%s\0%d\0%d' % (path,
+                                            stat.st_size,
+                                            stat.st_mtime_ns))
+                           .encode('utf8')).hexdigest()
+        cache_path = os.path.join(cache_dir or user_cache_dir('keyframes'),
+                                  key + '.kfi')
+        try:
+            with open(cache_path, 'rb') as f:
+                index = cls()
+                index._times.frombytes(f.read())
+                return index
+        except (OSError, ValueError):
+            pass
+
+        index = cls.probe(path, ffprobe)
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                index._times.tofile(f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return index
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from core.paths import user_cache_dir
+from core.profiling import profiler
+
+TRACK_FIELDS = ('track_type', 'format', 'duration', 'bit_rate',
+                'width', 'height', 'frame_rate',
+                'sampling_rate', 'channel_s')
+
+
+class MediaMeta:
+    """The part of MediaInfo output the program cares about"""
+
+    def __init__(self, size: int = 0, duration: int = None,
+                 bitrate: int = None, tracks: List[dict] = None):
+        self.size = size
+        self.duration = duration  # 毫秒
+        self.bitrate = bitrate
+        self.tracks = tracks if tracks is not None else []
+
+    def to_dict(self) -> dict:
+        return {
+            'size': self.size,
+            'duration': self.duration,
+            'bitrate': self.bitrate,
+            'tracks': self.tracks,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'MediaMeta':
+        return cls(d.get('size', 0), d.get('duration'),
+                   d.get('bitrate'), d.get('tracks'))
+
+
+def probe_media(path: str) -> MediaMeta:
+    # 延迟导入，命令行等场景不需要pymediainfo
+    from pymediainfo import MediaInfo
+
+    meta = MediaMeta(os.stat(path).st_size)
+    with profiler.span('MediaInfo.parse'):
+        media_info = MediaInfo.parse(path)
+    if media_info is not None and len(media_info.tracks):
+        # Warning: Maybe track 0 is not a video track
+        general = media_info.tracks[0]
+        if general.duration is not None:
+            meta.duration = int(float(general.duration))
+        meta.bitrate = general.overall_bit_rate
+        for track in media_info.tracks:
+            data = track.to_data()
+            meta.tracks.append({k: data[k] for k in TRACK_FIELDS if k in data})
+    return meta
+
+
+class MediaMetaCache:
+    """LRU cache of MediaMeta persisted as JSON
+
+    Entries are keyed by (absolute path, size, mtime_ns), so a modified
+    file is probed again. New entries are only written by ``flush``,
+    call it after a batch of lookups and before exiting. Thread safe.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 1024,
+                 prober: Callable[[str], MediaMeta] = probe_media):
+        self._path = path
+        self._max_entries = max_entries
+        self._prober = prober
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = os.path.join(user_cache_dir('media'), 'meta.json')
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(path: str, stat: os.stat_result) -> str:
+        return '%s\0%d\0%d' % (os.path.abspath(path),
+                               stat.st_size,
+                               stat.st_mtime_ns)
+
+    def lookup(self, path: str) -> Optional[MediaMeta]:
+        """Return the cached meta without probing, None on miss"""
+        key = self.key(path, os.stat(path))
+        with self._lock:
+            d = self._entries.get(key)
+            if d is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return MediaMeta.from_dict(d)
+
+    def get(self, path: str) -> MediaMeta:
+        """Cached meta of the file, probing it on a miss
+
+        Raises OSError if the file cannot be accessed.
+        """
+        key = self.key(path, os.stat(path))
+        with self._lock:
+            d = self._entries.get(key)
+            if d is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return MediaMeta.from_dict(d)
+            self.misses += 1
+
+        meta = self._prober(path)
+        with self._lock:
+            self._entries[key] = meta.to_dict()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return meta
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        """Write the entries if any were added since the last flush"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.items())
+                self._dirty = False
+            # 写文件时不阻塞其他线程的查询
+            self._save(entries)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf8') as f:
+                entries = json.load(f)
+            for key, d in entries[-self._max_entries:]:
+                self._entries[key] = d
+        except (OSError, ValueError, TypeError):
+            self._entries.clear()
+
+    def _save(self, entries: list) -> None:
+        try:
+            tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+            with open(tmp_path, 'w', encoding='utf8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -1,14 +1,69 @@
 import json
-from typing import Iterable, List
-
-import jsonschema
+from array import array
+from typing import Iterable, Iterator, List, Tuple
 
 from core import Moment
+from core.validation import ValidationReport, validate_intervals
+from core.interval_index import IntervalIndex, IntervalStats, \
+    merge_intervals
+from core.profiling import profiler, timed
+
+# 一次增删超过该数量的时间段时，丢弃索引留待下次使用时重建
+_INDEX_BATCH = 64
+
+
+def _split_secs(secs: int) -> List[int]:
+    mins, secs = divmod(secs, 60)
+    hour, mins = divmod(mins, 60)
+    return [hour, mins, secs]
+
+
+def index_ranges(indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """Merge indices into sorted, inclusive ``(first, last)`` ranges"""
+    ranges = []
+    for index in sorted(set(indices)):
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1] = (ranges[-1][0], index)
+        else:
+            ranges.append((index, index))
+    return ranges
+
+
+def move_plan(indices: Iterable[int], offset: int,
+              size: int) -> List[Tuple[int, int, int]]:
+    """Plan moving rows at ``indices`` by ``offset`` as whole ranges
+
+    Returns ``(first, last, new_first)`` steps to be applied in order.
+    Ranges stop at the edges and never overtake each other, so the
+    selected rows keep their relative order. Indices outside
+    ``[0, size)`` are ignored.
+    """
+    # 先过滤再合并，越界的行号不会连带丢弃相邻的有效行
+    ranges = index_ranges(index for index in indices if 0 <= index < size)
+    plan = []
+    if offset < 0:
+        limit = 0
+        for first, last in ranges:
+            new_first = max(first + offset, limit)
+            if new_first < first:
+                plan.append((first, last, new_first))
+            limit = new_first + last - first + 1
+    elif offset > 0:
+        limit = size - 1
+        for first, last in reversed(ranges):
+            new_last = min(last + offset, limit)
+            if new_last > last:
+                plan.append((first, last, new_last - last + first))
+            limit = new_last - (last - first + 1)
+    return plan
 
 
 class ModelData:
     """Core data class of program
 
+    Intervals are kept as two parallel arrays of begin/end seconds,
+    the nested ``[[h, m, s], [h, m, s]]`` form only exists in JSON.
+
     Thread unsafe
     """
 
@@ -38,10 +93,21 @@ class ModelData:
         }
     }
 
+    _validator = None
+
     def __init__(self, kv: dict = None, check=True):
+        self._begins = array('q')
+        self._ends = array('q')
+        self._index = None  # type: IntervalIndex
         if isinstance(kv, dict) \
                 and (not check or self.validate(kv)):
-            self._kv = kv
+            self._kv = {k: v for k, v in kv.items() if k != 'intervals'}
+            begins_append = self._begins.append
+            ends_append = self._ends.append
+            for begin, end in kv.get('intervals', ()):
+                # JSON中的1.0也是合法的integer
+                begins_append(int(begin[0] * 3600 + begin[1] * 60 + begin[2]))
+                ends_append(int(end[0] * 3600 + end[1] * 60 + end[2]))
         else:
             self._kv = {
                 'src_filename': '',
@@ -49,51 +115,92 @@ class ModelData:
                 'dst_path_dir': '',
                 # 'src_duration': 0,
                 # 'src_size': 0,
-                'intervals': []
             }
 
+    @classmethod
+    def _schema_validator(cls):
+        # 每次调用jsonschema.validate都会重新检查schema并构造验证器，故缓存之
+        if cls._validator is None:
+            # 大多数文档不需要通用验证器，导入jsonschema推迟到第一次使用
+            import jsonschema
+            validator_cls = jsonschema.validators.validator_for(cls.schema)
+            cls._validator = validator_cls(cls.schema)
+        return cls._validator
+
+    @classmethod
+    @timed()
+    def check(cls, kv: dict, max_errors: int = 10) -> ValidationReport:
+        """Validate a document, reporting up to ``max_errors`` problems"""
+        report = ValidationReport(max_errors)
+        if not isinstance(kv, dict):
+            report.add(-1, 'expected an object')
+            return report
+        intervals = kv.get('intervals')
+        # 时间段交给validate_intervals逐个检查，schema只负责其余字段
+        document = dict(kv)
+        if isinstance(intervals, list):
+            document['intervals'] = []
+        for error in cls._schema_validator().iter_errors(document):
+            if report.add(-1, error.message):
+                return report
+        if isinstance(intervals, list):
+            for index, message in validate_intervals(
+                    intervals, max_errors - len(report.errors)).errors:
+                report.add(index, message)
+        return report
+
     @classmethod
     def validate(cls, kv: dict) -> bool:
-        try:
-            if not isinstance(kv, dict):
-                return False
-            # 验证JSON数据是否合法
-            jsonschema.validate(instance=kv,
-                                schema=cls.schema)
-            # 验证时间是否合法
-            for interval in kv['intervals']:
-                begin, end = interval
-                begin = Moment.from_list(begin)
-                end = Moment.from_list(end)
-                if begin is None \
-                        or end is None \
-                        or begin > end:
-                    return False
-            return True
-        except jsonschema.ValidationError:
-            return False
-        except:
-            return False
+        return cls.check(kv, max_errors=1).ok
+
+    @classmethod
+    def from_arrays(cls, kv: dict, begins: array, ends: array):
+        """Adopt already validated seconds arrays, ``kv`` is not checked"""
+        model_data = ModelData()
+        model_data._kv = {k: v for k, v in kv.items() if k != 'intervals'}
+        model_data._begins = begins
+        model_data._ends = ends
+        return model_data
 
     @classmethod
-    def from_json(cls, str_json, *args, **kwargs):
-        if 'encoding' not in kwargs:
-            kwargs['encoding'] = 'utf8'
+    @timed()
+    def from_json(cls, str_json, *args,
+                  report: ValidationReport = None, **kwargs):
+        """Parse and validate a document, None if it is invalid
+
+        The reason is added to ``report`` when one is given.
+        """
+        # json.loads自Python 3.9起不再接受encoding参数
+        kwargs.pop('encoding', None)
+        if report is None:
+            report = ValidationReport(1)
         try:
             kv = json.loads(str_json, *args, **kwargs)
-            if cls.validate(kv):
-                return ModelData(kv, check=False)
-            else:
-                return None
-        except:
-            # TODO JSON解析失败
+        except ValueError as e:
+            report.add(-1, 'invalid JSON: %s' % e)
             return None
+        for index, message in cls.check(kv, report.max_errors).errors:
+            report.add(index, message)
+        return ModelData(kv, check=False) if report.ok else None
+
+    def to_arrays(self) -> Tuple[dict, array, array]:
+        """Non-interval keys and the begin/end seconds arrays (not copied)"""
+        return dict(self._kv), self._begins, self._ends
 
+    @timed()
+    def to_dict(self) -> dict:
+        """The JSON document as nested lists"""
+        kv = dict(self._kv)
+        kv['intervals'] = [[_split_secs(begin), _split_secs(end)]
+                           for begin, end in zip(self._begins, self._ends)]
+        return kv
+
+    @timed()
     def to_json(self, *args, **kwargs):
         if 'ensure_ascii' not in kwargs:
             kwargs['ensure_ascii'] = False
         return json.dumps(
-            self._kv,
+            self.to_dict(),
             # indent=2,
             *args,
             **kwargs,
@@ -145,83 +252,206 @@ class ModelData:
     #         self._kv['src_duration'] = value
 
     def intervals_iter(self) -> Iterable[List[List[int]]]:
-        return iter(self._kv.get('intervals', []))
+        for begin, end in zip(self._begins, self._ends):
+            yield [_split_secs(begin), _split_secs(end)]
+
+    def intervals_secs_iter(self) -> Iterator[Tuple[int, int]]:
+        return zip(self._begins, self._ends)
 
     def intervals_size(self) -> int:
-        return len(self._kv.get('intervals', ()))
+        return len(self._begins)
 
     def clear_intervals(self) -> None:
-        self._kv.get('intervals', []).clear()
+        del self._begins[:]
+        del self._ends[:]
+        self._index = None
+
+    def interval_index(self) -> IntervalIndex:
+        """Overlap index of the intervals, built on first use
+
+        Kept up to date by the mutating methods afterwards.
+        """
+        if self._index is None:
+            with profiler.span('ModelData.interval_index build'):
+                self._index = IntervalIndex(zip(self._begins, self._ends))
+        return self._index
+
+    def interval_stats(self) -> IntervalStats:
+        """Count, total/union/longest/shortest seconds of the intervals"""
+        return self.interval_index().stats()
+
+    @timed()
+    def merge_overlapping(self, adjacent: bool = True) -> int:
+        """Replace intervals by their sorted union, returns rows removed"""
+        merged = merge_intervals(zip(self._begins, self._ends), adjacent)
+        removed = len(self._begins) - len(merged)
+        self._begins = array('q', (begin for begin, _ in merged))
+        self._ends = array('q', (end for _, end in merged))
+        self._index = None
+        return removed
 
     def get_interval(self, row: int, col: int = -1):
-        row = self._kv['intervals'][row]
         if col == -1:
-            row_0, row_1 = row[0], row[1]
-            return [Moment(row_0[0], row_0[1].row_0[2]),
-                    Moment(row_1[0], row_1[1].row_1[2])]
+            return [Moment.from_secs(self._begins[row]),
+                    Moment.from_secs(self._ends[row])]
         else:
-            row_x = row[0 if col == 0 else 1]
-            return Moment(row_x[0], row_x[1], row_x[2])
+            return Moment.from_secs(
+                self._begins[row] if col == 0 else self._ends[row]
+            )
 
     def get_interval_unwrap(self, row: int, col: int = -1):
-        row = self._kv['intervals'][row]
         if col == -1:
-            return [row[0], row[1]]
+            return [_split_secs(self._begins[row]),
+                    _split_secs(self._ends[row])]
         else:
-            return row[0 if col == 0 else 1]
+            return _split_secs(
+                self._begins[row] if col == 0 else self._ends[row]
+            )
+
+    def get_interval_secs(self, row: int, col: int = -1):
+        if col == -1:
+            return self._begins[row], self._ends[row]
+        else:
+            return self._begins[row] if col == 0 else self._ends[row]
 
     def add_interval(self, begin: Moment = None, end: Moment = None) -> bool:
-        intervals = self._kv['intervals']
-        if intervals is not None:
-            intervals.append([
-                [begin.hour, begin.mins, begin.secs],
-                [end.hour, end.mins, end.secs]
-            ])
-            return True
-        return False
+        self._begins.append(begin.to_secs())
+        self._ends.append(end.to_secs())
+        if self._index is not None:
+            self._index.add(self._begins[-1], self._ends[-1])
+        return True
 
     def del_interval(self, index: int = 0) -> bool:
-        intervals = self._kv['intervals']
-        if intervals and 0 <= index < len(intervals):
-            del intervals[index]
+        if 0 <= index < len(self._begins):
+            if self._index is not None:
+                self._index.remove(self._begins[index], self._ends[index])
+            del self._begins[index]
+            del self._ends[index]
             return True
         return False
 
     def set_interval(self, index: int = 0, begin: Moment = None, end: Moment = None) -> bool:
-        intervals = self._kv['intervals']
-        if intervals and 0 <= index < len(intervals):
-            interval = intervals[index]
+        if 0 <= index < len(self._begins):
+            if self._index is not None:
+                self._index.remove(self._begins[index], self._ends[index])
             if begin is not None:
-                interval[0] = [begin.hour, begin.mins, begin.secs]
+                self._begins[index] = begin.to_secs()
             if end is not None:
-                interval[1] = [end.hour, end.mins, end.secs]
+                self._ends[index] = end.to_secs()
+            if self._index is not None:
+                self._index.add(self._begins[index], self._ends[index])
             return True
         return False
 
     def move_interval(self, index: int = 0, offset: int = 0) -> bool:
-        intervals = self._kv['intervals']
-        if intervals \
-                and 0 <= index < len(intervals) \
-                and 0 <= index + offset < len(intervals):
-            interval = intervals[index]
-            if offset > 0:
-                for i in range(index, index + offset):
-                    intervals[i] = intervals[i + 1]
-                intervals[index + offset] = interval
-            elif offset < 0:
-                for i in range(index, index + offset, -1):
-                    intervals[i] = intervals[i - 1]
-                intervals[index + offset] = interval
+        size = len(self._begins)
+        if 0 <= index < size and 0 <= index + offset < size:
+            if offset != 0:
+                self._begins.insert(index + offset, self._begins.pop(index))
+                self._ends.insert(index + offset, self._ends.pop(index))
             return True
         return False
 
     def insert_interval(self, index: int = 0, begin: Moment = None, end: Moment = None) -> bool:
-        intervals = self._kv['intervals']
-        if intervals:
-            intervals.insert(index,
-                             [
-                                 [begin.hour, begin.mins, begin.secs],
-                                 [end.hour, end.mins, end.secs]
-                             ])
+        if 0 <= index <= len(self._begins):
+            self._begins.insert(index, begin.to_secs())
+            self._ends.insert(index, end.to_secs())
+            if self._index is not None:
+                self._index.add(self._begins[index], self._ends[index])
             return True
         return False
+
+    @timed()
+    def insert_intervals(self, index: int,
+                         intervals: Iterable[Tuple[Moment, Moment]]) -> int:
+        """Insert many ``(begin, end)`` pairs before ``index`` at once"""
+        if not 0 <= index <= len(self._begins):
+            return 0
+        begins, ends = array('q'), array('q')
+        for begin, end in intervals:
+            begins.append(begin.to_secs())
+            ends.append(end.to_secs())
+        self._begins[index:index] = begins
+        self._ends[index:index] = ends
+        self.__index_add(begins, ends)
+        return len(begins)
+
+    def del_interval_range(self, index: int, count: int) -> bool:
+        if 0 <= index and count > 0 and index + count <= len(self._begins):
+            self.__index_remove(self._begins[index:index + count],
+                                self._ends[index:index + count])
+            del self._begins[index:index + count]
+            del self._ends[index:index + count]
+            return True
+        return False
+
+    @timed()
+    def del_intervals(self, indices: Iterable[int]) -> int:
+        """Delete intervals at ``indices`` in a single pass
+
+        Indices outside the interval list are ignored.
+        """
+        size = len(self._begins)
+        ranges = index_ranges(index for index in indices
+                              if 0 <= index < size)
+        if not ranges:
+            return 0
+        begins, ends = array('q'), array('q')
+        prev = 0
+        for first, last in ranges:
+            begins.extend(self._begins[prev:first])
+            ends.extend(self._ends[prev:first])
+            prev = last + 1
+        begins.extend(self._begins[prev:])
+        ends.extend(self._ends[prev:])
+        if self._index is not None:
+            if size - len(begins) > _INDEX_BATCH:
+                self._index = None
+            else:
+                for first, last in ranges:
+                    self.__index_remove(self._begins[first:last + 1],
+                                        self._ends[first:last + 1])
+        self._begins, self._ends = begins, ends
+        return size - len(begins)
+
+    def __index_add(self, begins, ends) -> None:
+        if self._index is not None:
+            if len(begins) > _INDEX_BATCH:
+                self._index = None
+            else:
+                for begin, end in zip(begins, ends):
+                    self._index.add(begin, end)
+
+    def __index_remove(self, begins, ends) -> None:
+        if self._index is not None:
+            if len(begins) > _INDEX_BATCH:
+                self._index = None
+            else:
+                for begin, end in zip(begins, ends):
+                    self._index.remove(begin, end)
+
+    def move_interval_range(self, first: int, last: int,
+                            new_first: int) -> bool:
+        """Move rows ``first..last`` so that ``first`` lands on ``new_first``"""
+        size = len(self._begins)
+        new_last = new_first + last - first
+        if not (0 <= first <= last < size and 0 <= new_first
+                and new_last < size):
+            return False
+        # 只旋转受影响的片段，与表的总长度无关
+        lo, hi = min(first, new_first), max(last, new_last) + 1
+        for column in (self._begins, self._ends):
+            if new_first < first:
+                column[lo:hi] = column[first:last + 1] + column[new_first:first]
+            elif new_first > first:
+                column[lo:hi] = column[last + 1:new_last + 1] \
+                    + column[first:last + 1]
+        return True
+
+    @timed()
+    def move_intervals(self, indices: Iterable[int], offset: int) -> int:
+        """Move rows at ``indices`` by ``offset``, see ``move_plan``"""
+        plan = move_plan(indices, offset, len(self._begins))
+        for first, last, new_first in plan:
+            self.move_interval_range(first, last, new_first)
+        return len(plan)
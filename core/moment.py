@@ -1,67 +1,129 @@
-from functools import reduce, total_ordering
+class Moment:
+    """Immutable point of time, stored as total seconds
 
+    hour/mins/secs are derived on access.
+    """
+    __slots__ = ('_secs',)
 
-@total_ordering
-class Moment:
     def __init__(self, hour: int = 0, mins: int = 0, secs: int = 0):
-        self.hour = hour
-        self.mins = mins
-        self.secs = secs
+        _set_secs(self, (hour * 60 + mins) * 60 + secs)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Moment is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Moment is immutable')
+
+    @property
+    def hour(self) -> int:
+        return self._secs // 3600
+
+    @property
+    def mins(self) -> int:
+        return self._secs // 60 % 60
+
+    @property
+    def secs(self) -> int:
+        return self._secs % 60
 
     def __add__(self, other):
-        x, y = self.to_secs(), other.to_secs()
-        z = x + y
-        secs = z % 60
-        z //= 60
-        mins = z % 60
-        z //= 60
-        hour = z
-        return Moment(hour, mins, secs)
+        return _from_total(self._secs + other._secs)
 
     def __sub__(self, other):
-        x, y = self.to_secs(), other.to_secs()
-        z = x - y if x > y else 0
-        secs = z % 60
-        z //= 60
-        mins = z % 60
-        z //= 60
-        hour = z
-        return Moment(hour, mins, secs)
+        x, y = self._secs, other._secs
+        return _from_total(x - y if x > y else 0)
 
     def __lt__(self, other):
-        return self.to_secs() < other.to_secs()
+        try:
+            return self._secs < other._secs
+        except AttributeError:
+            return NotImplemented
+
+    def __le__(self, other):
+        try:
+            return self._secs <= other._secs
+        except AttributeError:
+            return NotImplemented
+
+    def __gt__(self, other):
+        try:
+            return self._secs > other._secs
+        except AttributeError:
+            return NotImplemented
+
+    def __ge__(self, other):
+        try:
+            return self._secs >= other._secs
+        except AttributeError:
+            return NotImplemented
 
     def __eq__(self, other):
-        return self.to_secs() == other.to_secs()
+        try:
+            return self._secs == other._secs
+        except AttributeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        try:
+            return self._secs != other._secs
+        except AttributeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self._secs)
+
+    def __repr__(self):
+        return 'Moment(%d, %d, %d)' % (self.hour, self.mins, self.secs)
+
+    def __reduce__(self):
+        if type(self) is Moment:
+            return _from_total, (self._secs,)
+        return type(self)._from_total, (self._secs,)
 
     @staticmethod
     def validate(hour: int, mins: int, secs: int) -> bool:
         return hour >= 0 and 0 <= mins <= 59 and 0 <= secs <= 59
 
+    @classmethod
+    def _from_total(cls, secs: int):
+        moment = _new(cls)
+        _set_secs(moment, secs)
+        return moment
+
     @classmethod
     def from_args(cls, hour: int, mins: int, secs: int):
-        return Moment(hour, mins, secs) \
-            if cls.validate(hour, mins, secs) \
+        return cls._from_total((hour * 60 + mins) * 60 + secs) \
+            if hour >= 0 and 0 <= mins <= 59 and 0 <= secs <= 59 \
             else None
 
     @classmethod
     def from_list(cls, lst):
-        return cls.from_args(*lst) \
-            if len(lst) == 3 \
+        if len(lst) != 3:
+            return None
+        hour, mins, secs = lst
+        return cls._from_total((hour * 60 + mins) * 60 + secs) \
+            if hour >= 0 and 0 <= mins <= 59 and 0 <= secs <= 59 \
             else None
 
     @classmethod
     def from_secs(cls, secs: int):
-        z = secs
-        secs = z % 60
-        z //= 60
-        mins = z % 60
-        z //= 60
-        hour = z
-        return Moment(hour, mins, secs)
+        return cls._from_total(secs)
 
     def to_secs(self) -> int:
-        return reduce(
-            lambda x, y: x * 60 + y,
-            (self.hour, self.mins, self.secs)
-        )
+        return self._secs
+
+    def to_hms(self):
+        mins, secs = divmod(self._secs, 60)
+        return mins // 60, mins % 60, secs
+
+
+_new = object.__new__
+# 绕过__setattr__直接写入slot
+_set_secs = Moment._secs.__set__
+
+
+# 运算结果总是Moment，省去classmethod的绑定开销
+def _from_total(secs: int) -> Moment:
+    moment = _new(Moment)
+    _set_secs(moment, secs)
+    return moment
@@ -0,0 +1,201 @@
+"""Content addressed cache of cut outputs
+
+Outputs are named by row index, so inserting or moving a row renames
+every output after it although the segments did not change. The cache
+keys a segment by what it is made of: a fingerprint of the source and
+the ffmpeg arguments with the paths taken out (position, duration,
+codec options), plus the output extension. A cached segment is hard
+linked to the new output name instead of being cut again, the copy
+fallback is used when the cache and the output are on different
+devices.
+
+Every entry is recorded with its size and the sampled digest of
+``core.fingerprint``, and verified against both before it is linked:
+a hard linked entry shares its contents with the user's output, an
+output edited in place changes the entry without changing its size.
+
+Entries are evicted least recently used first once the cache grows
+beyond ``max_bytes``. The LRU order is kept in ``index.json`` because
+the mtime of a hard linked entry is shared with the user's output.
+For the same reason an output has to be unlinked before ffmpeg
+overwrites it, truncating it would truncate the entry as well.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from core.fingerprint import fingerprint, sample_digest
+from core.paths import user_cache_dir
+
+INDEX_NAME = 'index.json'
+
+
+def _segments(job) -> List[Tuple[list, str]]:
+    """``(argv without paths, output path)`` of every output of a job"""
+    if hasattr(job, 'cuts'):
+        # 多输出任务的分割方式与单独切割不同，键中保留任务的完整参数
+        shared = [arg for arg in job.argv('ffmpeg')[1:]
+                  if arg not in (job.src_path, job.dst_path)
+                  and arg not in [cut.dst_path for cut in job.cuts]]
+        return [(['multi', cut.index - job.index] + shared, cut.dst_path)
+                for cut in job.cuts]
+    return [([arg for arg in job.argv('ffmpeg')[1:]
+              if arg not in (job.src_path, job.dst_path)], job.dst_path)]
+
+
+class OutputCache:
+    """Thread safe cache directory with an LRU size cap"""
+
+    def __init__(self, root: str = None, max_bytes: int = 20 << 30):
+        self.root = root or user_cache_dir('outputs')
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        # 条目名 -> (大小, 抽样摘要)
+        self._entries = OrderedDict()  # type: OrderedDict[str, tuple]
+        self._lock = threading.Lock()
+        self.__load_index()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(size for size, _ in self._entries.values())
+
+    def __load_index(self) -> None:
+        try:
+            with open(os.path.join(self.root, INDEX_NAME), 'r',
+                      encoding='utf8') as f:
+                entries = [(str(name), int(size), str(checksum))
+                           for name, size, checksum in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            # 索引损坏或缺少摘要时从空缓存开始，未登记的条目之后会被覆盖
+            return
+        for name, size, checksum in entries:
+            if os.path.isfile(os.path.join(self.root, name)):
+                self._entries[name] = (size, checksum)
+
+    def save_index(self) -> None:
+        with self._lock:
+            entries = [[name, size, checksum] for name, (size, checksum)
+                       in self._entries.items()]
+        path = os.path.join(self.root, INDEX_NAME)
+        with open(path + '.tmp', 'w', encoding='utf8') as f:
+            json.dump(entries, f)
+        os.replace(path + '.tmp', path)
+
+    def entries(self, job) -> Optional[List[Tuple[str, str]]]:
+        """``(entry name, output path)`` of every output
+
+        None when the job cannot be cached or its source is inaccessible.
+        """
+        # 合并任务没有单一的源文件，不缓存
+        if not hasattr(job, 'src_path'):
+            return None
+        try:
+            source = fingerprint(job.src_path)
+        except OSError:
+            return None
+        names = []
+        for args, dst_path in _segments(job):
+            digest = hashlib.sha1(json.dumps([source] + args)
+                                  .encode('utf8')).hexdigest()
+            names.append((os.path.join(digest[:2], digest
+                                       + os.path.splitext(dst_path)[1]),
+                          dst_path))
+        return names
+
+    def fetch(self, job, overwrite: bool = False) -> bool:
+        """Link every output of ``job`` from the cache
+
+        False when an output is not cached or already exists and
+        ``overwrite`` is off, then the job has to run.
+        """
+        names = self.entries(job)
+        if names is None:
+            return False
+        with self._lock:
+            records = [self._entries.get(name) for name, _ in names]
+        for (name, _), record in zip(names, records):
+            # 条目可能被原地修改过
+            if record is None or not self.__valid(name, record):
+                return False
+        if not overwrite and any(os.path.lexists(dst_path)
+                                 for _, dst_path in names):
+            return False
+        for name, dst_path in names:
+            try:
+                if os.path.lexists(dst_path):
+                    os.remove(dst_path)
+                elif os.path.dirname(dst_path):
+                    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                self.__link(os.path.join(self.root, name), dst_path)
+            except OSError:
+                return False
+        with self._lock:
+            for name, _ in names:
+                self._entries.move_to_end(name)
+            self.hits += 1
+        return True
+
+    def __valid(self, name: str, record: tuple) -> bool:
+        try:
+            if sample_digest(os.path.join(self.root, name)) == record:
+                return True
+        except OSError:
+            pass
+        with self._lock:
+            self._entries.pop(name, None)
+        return False
+
+    def store(self, job) -> None:
+        """Add the outputs of a finished job and evict old entries
+
+        Only call it when the job wrote its outputs, not when ffmpeg
+        kept existing files.
+        """
+        names = self.entries(job)
+        if names is None:
+            return
+        for name, dst_path in names:
+            with self._lock:
+                if name in self._entries:
+                    self._entries.move_to_end(name)
+                    continue
+            path = os.path.join(self.root, name)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if os.path.lexists(path):
+                    os.remove(path)
+                self.__link(dst_path, path)
+                record = sample_digest(path)
+            except OSError:
+                continue
+            with self._lock:
+                self._entries[name] = record
+        self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            total = sum(size for size, _ in self._entries.values())
+            victims = []
+            while total > self.max_bytes and self._entries:
+                name, (size, _) = self._entries.popitem(last=False)
+                victims.append(name)
+                total -= size
+        for name in victims:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def __link(src: str, dst: str) -> None:
+        # 硬链接不占用额外空间，跨设备时复制
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
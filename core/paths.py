@@ -0,0 +1,16 @@
+import os
+
+APP_NAME = 'video_cut_cmd_generator'
+
+
+def user_cache_dir(*names: str) -> str:
+    """Per-user cache directory of the program, created on demand"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') \
+               or os.path.expanduser('~\\AppData\\Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') \
+               or os.path.expanduser('~/.cache')
+    path = os.path.join(base, APP_NAME, *names)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,176 @@
+"""Timing instrumentation of hot paths
+
+``timed`` decorates a function, ``profiler.span(name)`` times a block.
+Both only check one flag while the profiler is disabled, which is the
+default unless the ``VCUT_PROFILE`` environment variable is set to
+something other than empty, ``0``, ``false`` or ``no``.
+
+Per name the profiler keeps the call count, the cumulative time and
+the latest ``samples`` durations for p50/p99. The latest ``max_events``
+calls are kept as a trace that can be dumped as JSON or CSV.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Deque, Dict, List, NamedTuple, Tuple
+
+
+class TimingStats(NamedTuple):
+    name: str
+    count: int
+    total: float
+    p50: float
+    p99: float
+    max: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    # 最近秩法，样本已排序
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Entry:
+    __slots__ = ('count', 'total', 'samples')
+
+    def __init__(self, samples: int):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=samples)  # type: Deque[float]
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.record(self._name, self._start,
+                              time.perf_counter() - self._start)
+        return False
+
+
+class Profiler:
+    """Thread safe recorder of named durations"""
+
+    def __init__(self, enabled: bool = False, samples: int = 4096,
+                 max_events: int = 65536):
+        self.enabled = enabled
+        self._samples = samples
+        self._entries = {}  # type: Dict[str, _Entry]
+        self._events = deque(maxlen=max_events)  # type: Deque[tuple]
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name: str, start: float, elapsed: float) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry(self._samples)
+            entry.count += 1
+            entry.total += elapsed
+            entry.samples.append(elapsed)
+            self._events.append((name, start - self._origin, elapsed,
+                                 threading.current_thread().name))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._events.clear()
+            self._origin = time.perf_counter()
+
+    def stats(self) -> List[TimingStats]:
+        """Stats of every name, largest cumulative time first"""
+        with self._lock:
+            entries = [(name, entry.count, entry.total,
+                        sorted(entry.samples))
+                       for name, entry in self._entries.items()]
+        stats = [TimingStats(name, count, total,
+                             _percentile(ordered, 0.5),
+                             _percentile(ordered, 0.99),
+                             ordered[-1] if ordered else 0.0)
+                 for name, count, total, ordered in entries]
+        stats.sort(key=lambda s: s.total, reverse=True)
+        return stats
+
+    def events(self) -> List[Tuple[str, float, float, str]]:
+        """``(name, start, elapsed, thread)``, start relative to reset"""
+        with self._lock:
+            return list(self._events)
+
+    def dump(self, path: str) -> None:
+        """Write the trace as CSV when ``path`` ends with .csv, else JSON"""
+        if os.path.splitext(path)[1].lower() == '.csv':
+            with open(path, 'w', encoding='utf8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(('name', 'start', 'elapsed', 'thread'))
+                writer.writerows(self.events())
+            return
+        with open(path, 'w', encoding='utf8') as f:
+            json.dump({
+                'stats': [dict(s._asdict(), mean=s.mean)
+                          for s in self.stats()],
+                'events': [{'name': name, 'start': start,
+                            'elapsed': elapsed, 'thread': thread}
+                           for name, start, elapsed, thread
+                           in self.events()],
+            }, f, ensure_ascii=False, indent=1)
+
+
+def env_enabled(name: str) -> bool:
+    """Whether an environment flag is set, ``VCUT_PROFILE=0`` disables"""
+    return os.environ.get(name, '').strip().lower() \
+        not in ('', '0', 'false', 'no')
+
+
+profiler = Profiler(enabled=env_enabled('VCUT_PROFILE'))
+
+
+def timed(name: str = None):
+    """Record every call of the decorated function under ``name``
+
+    Defaults to the qualified name of the function.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(label, start, time.perf_counter() - start)
+        return wrapper
+    return decorate
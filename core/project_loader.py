@@ -0,0 +1,267 @@
+import codecs
+import json
+import os
+import re
+import threading
+from array import array
+from typing import Callable, Optional
+
+from core.model_data import ModelData
+from core.profiling import timed
+from core.vcut import is_vcut_path, load_vcut, dump_vcut
+from core.validation import ValidationReport, check_intervals, \
+    interval_totals
+
+_WS = re.compile(r'[ \t\n\r]*')
+# 被块末尾截断的记号（数字、true、\uXXXX转义等）在距末尾这么多字符之内出错
+_TRUNCATED_TAIL = 16
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def save_project(model_data: ModelData, path: str, indent: int = None):
+    """Write ``.vcut`` or JSON depending on the extension of ``path``"""
+    if is_vcut_path(path):
+        dump_vcut(model_data, path)
+    else:
+        with open(path, 'w', encoding='utf8') as f:
+            f.write(model_data.to_json(indent=indent))
+
+
+class ProjectLoader:
+    """Load a project file without building the nested interval lists
+
+    ``.vcut`` files are handed to ``load_vcut``, anything else is JSON.
+
+    The file is decoded chunk by chunk. Intervals are parsed in batches
+    cut at element boundaries, validated and packed into the seconds
+    arrays of ``ModelData`` as they arrive, so memory stays close to the
+    size of the packed arrays instead of several times the file size.
+    Other keys are small and decoded as usual.
+
+    ``on_progress(bytes_read, bytes_total)`` is called after every chunk;
+    ``cancel`` may be called from another thread.
+    """
+    chunk_size = 1 << 20
+
+    def __init__(self, path: str, max_errors: int = 10,
+                 on_progress: Callable[[int, int], None] = None):
+        self.path = path
+        self.report = ValidationReport(max_errors)
+        self.model_data = None  # type: ModelData
+        self.bytes_read = 0
+        self.bytes_total = 0
+        self._on_progress = on_progress
+        self._cancel = threading.Event()
+        self._file = None
+        self._decoder = None
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._begins = array('q')
+        self._ends = array('q')
+        self._count = 0
+        self._batch_from = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @timed()
+    def load(self) -> Optional[ModelData]:
+        if is_vcut_path(self.path):
+            return self.__load_vcut()
+        try:
+            with open(self.path, 'rb') as f:
+                self._file = f
+                self._decoder = codecs.getincrementaldecoder('utf8')()
+                self.bytes_total = os.fstat(f.fileno()).st_size
+                kv = self.__parse_document()
+        except OSError as e:
+            self.report.add(-1, str(e))
+            return None
+        except LoadCancelled:
+            return None
+        except ValueError as e:
+            # JSON语法错误以及UTF-8解码错误
+            self.report.add(-1, 'invalid JSON: %s' % e)
+            return None
+        finally:
+            self._file = None
+            self._buf = ''
+        if kv is None:
+            return None
+        for index, message in ModelData.check(kv).errors:
+            self.report.add(index, message)
+        if not self.report.ok:
+            return None
+        self.model_data = ModelData.from_arrays(kv, self._begins, self._ends)
+        return self.model_data
+
+    def __load_vcut(self) -> Optional[ModelData]:
+        # 二进制格式无需解析，直接映射读取
+        try:
+            self.model_data = load_vcut(self.path)
+        except (OSError, ValueError) as e:
+            self.report.add(-1, str(e))
+            return None
+        self.bytes_read = self.bytes_total = os.path.getsize(self.path)
+        if self._on_progress is not None:
+            self._on_progress(self.bytes_read, self.bytes_total)
+        return self.model_data
+
+    def __fill(self) -> bool:
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        if self._eof:
+            return False
+        chunk = self._file.read(self.chunk_size)
+        self._eof = not chunk
+        self.bytes_read += len(chunk)
+        # 丢弃已经解析过的部分
+        self._buf = self._buf[self._pos:] \
+            + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+        if self._on_progress is not None:
+            self._on_progress(self.bytes_read, self.bytes_total)
+        return not self._eof
+
+    def __peek(self) -> str:
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self.__fill() and self._pos >= len(self._buf):
+                return ''
+
+    def __expect(self, chars: str) -> str:
+        char = self.__peek()
+        if not char or char not in chars:
+            raise ValueError('expected %s'
+                             % ' or '.join(repr(c) for c in chars))
+        self._pos += 1
+        return char
+
+    def __decode_value(self):
+        self.__peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+                # 数字可能被截断在块末尾，例如1.5只读到了1.
+                if end + _TRUNCATED_TAIL < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                # 错误离缓冲区末尾较远时，再读入更多内容也不会改变结果，
+                # 不必把文件剩余部分都读进缓冲区；未闭合的字符串除外
+                if self._eof or (e.pos < len(self._buf) - _TRUNCATED_TAIL
+                                 and not e.msg.startswith('Unterminated')):
+                    raise
+            self.__fill()
+
+    def __parse_document(self) -> Optional[dict]:
+        kv = {}
+        self.__expect('{')
+        if self.__peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self.__decode_value()
+                if not isinstance(key, str):
+                    raise ValueError('expected a string key')
+                self.__expect(':')
+                if key == 'intervals' and self.__peek() == '[':
+                    self._pos += 1
+                    if not self.__parse_intervals():
+                        return None
+                    kv[key] = []
+                else:
+                    kv[key] = self.__decode_value()
+                if self.__expect(',}') == '}':
+                    break
+        if self.__peek():
+            raise ValueError('extra data after the document')
+        return kv
+
+    def __batch_end(self) -> int:
+        """Position of the last ``]],`` separator in the buffer, or -1"""
+        buf, pos = self._buf, self._pos
+        comma = buf.rfind(',', pos)
+        # 合法的时间段中，分隔符前最多只有几个逗号
+        for _ in range(8):
+            if comma <= pos:
+                break
+            prev = comma - 1
+            while buf[prev] in ' \t\n\r':
+                prev -= 1
+            if buf[prev] == ']':
+                prev -= 1
+                while buf[prev] in ' \t\n\r':
+                    prev -= 1
+                if buf[prev] == ']':
+                    return comma
+            comma = buf.rfind(',', pos, prev)
+        return -1
+
+    def __parse_intervals(self) -> bool:
+        """Parse the array after its ``[``, False once errors are full"""
+        # 重复的intervals键以最后一个为准，与json.loads一致
+        self._begins, self._ends, self._count = array('q'), array('q'), 0
+        self._batch_from = 0
+        if self.__peek() == ']':
+            self._pos += 1
+            return True
+        while True:
+            cut = self.__batch_end() \
+                if self.bytes_read >= self._batch_from else -1
+            batch = None
+            if cut != -1:
+                try:
+                    # 只要能整体解析，这一段就恰好是若干个完整的元素
+                    batch = json.loads('[%s]' % self._buf[self._pos:cut])
+                except ValueError:
+                    # 在读入下一块之前逐个解析，以免反复尝试同一段
+                    self._batch_from = self.bytes_read + 1
+            if batch is not None:
+                self._pos = cut + 1
+                if not self.__add_batch(batch):
+                    return False
+                continue
+            if not self.__add_batch([self.__decode_value()]):
+                return False
+            if self.__expect(',]') == ']':
+                return True
+
+    def __add_batch(self, batch: list) -> bool:
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        start = self._count
+        self._count += len(batch)
+        if self.report.ok:
+            totals = interval_totals(batch)
+            if totals is not None:
+                try:
+                    self._begins.extend(totals[0::2])
+                    self._ends.extend(totals[1::2])
+                    return True
+                except OverflowError:
+                    self.report.add(start, 'out of range')
+                    return not self.report.full
+        check_intervals(batch, self.report, start)
+        if self.report.ok:
+            # 例如1.0这样的浮点数，合法但需要逐个换算
+            try:
+                for begin, end in batch:
+                    self._begins.append(
+                        int((begin[0] * 60 + begin[1]) * 60 + begin[2]))
+                    self._ends.append(
+                        int((end[0] * 60 + end[1]) * 60 + end[2]))
+            except OverflowError:
+                self.report.add(start, 'out of range')
+        return not self.report.full
@@ -0,0 +1,131 @@
+"""Job order and per-device concurrency of the executor
+
+Stream copy cuts are bound by disk throughput: several jobs on one
+spinning disk make it seek between them, while jobs on different
+disks do not slow each other down. A job counts against the devices
+(``st_dev``) of its source and of its destination directory, at most
+``per_device`` jobs run on one device. Among the jobs allowed to
+start, the longest one goes first so short jobs fill the gaps at the
+end instead of a long one starting last.
+"""
+import os
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, FrozenSet, Iterable, List, Optional
+
+UNKNOWN_DEVICE = -1
+
+
+def device_of(path: str) -> int:
+    """``st_dev`` of ``path`` or of its nearest existing parent"""
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return UNKNOWN_DEVICE
+            path = parent
+
+
+def job_dirs(job) -> List[str]:
+    """Directories a job reads from and writes to"""
+    # 输出文件还不存在，取所在目录；合并任务读取各个片段
+    sources = [job.src_path] if hasattr(job, 'src_path') \
+        else getattr(job, 'parts', [])
+    return [os.path.dirname(os.path.abspath(path))
+            for path in [job.dst_path] + list(sources)]
+
+
+def job_cost(job) -> float:
+    duration = getattr(job, 'duration', None)
+    return float(duration.to_secs()) if duration is not None else 0.0
+
+
+class DeviceScheduler:
+    """Hand out executor results longest job first, limited per device
+
+    ``per_device`` 0 means no limit, ``limits`` overrides it for single
+    devices. Pending results are bucketed by their set of devices, so
+    picking the next one only looks at the head of every bucket.
+    Thread safe.
+    """
+
+    def __init__(self, results: Iterable, per_device: int = 0,
+                 limits: Dict[int, int] = None,
+                 device_of: Callable[[str], int] = device_of):
+        self._per_device = max(0, per_device)
+        self._limits = dict(limits or {})
+        self._running = {}  # type: Dict[int, int]
+        self._devices = {}  # type: Dict[int, FrozenSet[int]]
+        self._buckets = {}  # type: Dict[FrozenSet[int], Deque]
+        self._cond = threading.Condition()
+        self._cancelled = False
+        # 同一目录只stat一次
+        dir_devices = {}  # type: Dict[str, int]
+        ordered = sorted(enumerate(results),
+                         key=lambda item: (-job_cost(item[1].job), item[0]))
+        for _, result in ordered:
+            devices = []
+            for path in job_dirs(result.job):
+                if path not in dir_devices:
+                    dir_devices[path] = device_of(path)
+                devices.append(dir_devices[path])
+            devices = frozenset(devices)
+            self._devices[id(result)] = devices
+            self._buckets.setdefault(devices, deque()).append(result)
+
+    def limit(self, device: int) -> int:
+        return self._limits.get(device, self._per_device)
+
+    def running(self) -> Dict[int, int]:
+        with self._cond:
+            return {device: count
+                    for device, count in self._running.items() if count}
+
+    def __allowed(self, devices: FrozenSet[int]) -> bool:
+        for device in devices:
+            limit = self.limit(device)
+            if limit and self._running.get(device, 0) >= limit:
+                return False
+        return True
+
+    def __pick(self) -> Optional[deque]:
+        best = None
+        for devices, bucket in self._buckets.items():
+            if bucket and (self._cancelled or self.__allowed(devices)) \
+                    and (best is None or job_cost(bucket[0].job)
+                         > job_cost(best[0].job)):
+                best = bucket
+        return best
+
+    def acquire(self):
+        """Next result to run, blocks while all devices are busy
+
+        Returns None when nothing is pending. After ``cancel`` the
+        remaining results are returned without limits.
+        """
+        with self._cond:
+            while True:
+                if not any(self._buckets.values()):
+                    return None
+                bucket = self.__pick()
+                if bucket is not None:
+                    result = bucket.popleft()
+                    for device in self._devices[id(result)]:
+                        self._running[device] = \
+                            self._running.get(device, 0) + 1
+                    return result
+                self._cond.wait()
+
+    def release(self, result) -> None:
+        with self._cond:
+            for device in self._devices[id(result)]:
+                self._running[device] -= 1
+            self._cond.notify_all()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
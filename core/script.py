@@ -0,0 +1,178 @@
+"""Export jobs as a self-contained bash script running them in parallel
+
+The script keeps at most ``JOBS`` ffmpeg processes running with a pure
+bash semaphore (``wait -n`` on bash 4.3+, polling otherwise), writes
+one log and one exit status file per job, and prints a summary at the
+end. Stages run one after another, a stage only starts when every job
+of the previous one succeeded, the jobs of skipped stages are counted
+as not run. ``JOBS``, ``FFMPEG`` and ``LOG_DIR`` can
+be overridden from the environment.
+
+Nothing has to be prepared on the machine running the script: every
+stage creates the output directories of its jobs and writes the list
+files of its concat jobs, and the logs and status files of an earlier
+run are removed at the start.
+"""
+import os
+import shlex
+import stat
+from typing import Iterable, List, Sequence, Tuple
+
+_HEADER = '''#!/usr/bin/env bash
+# %(count)d ffmpeg jobs in %(stages)d stage(s)
+#   JOBS=8 ./%(name)s    run 8 jobs at a time
+set -u
+JOBS=${JOBS:-%(jobs)d}
+FFMPEG=${FFMPEG:-%(ffmpeg)s}
+LOG_DIR=${LOG_DIR:-%(log_dir)s}
+mkdir -p "$LOG_DIR" || exit 1
+for ((id = 0; id < %(count)d; id++)); do
+    rm -f -- "$LOG_DIR/$id.status" "$LOG_DIR/$id.log"
+done
+
+run() {
+    local id=$1 overwrite=$2
+    shift 2
+    "$FFMPEG" -nostdin "$overwrite" "$@" >"$LOG_DIR/$id.log" 2>&1
+    echo $? >"$LOG_DIR/$id.status"
+}
+
+acquire() {
+    while [ "$(jobs -rp | wc -l)" -ge "$JOBS" ]; do
+        wait -n 2>/dev/null || sleep 0.2
+    done
+}
+
+failed=0
+skipped=0
+check() {
+    local code
+    code=$(cat "$LOG_DIR/$1.status" 2>/dev/null || echo skipped)
+    if [ "$code" != 0 ]; then
+        failed=$((failed + 1))
+        echo "[$code] $2 (log: $LOG_DIR/$1.log)" >&2
+    fi
+}
+'''
+
+_STAGE = '''
+if [ "$failed" -eq 0 ]; then
+%(prepare)s
+%(runs)s
+    wait
+%(checks)s
+else
+    skipped=$((skipped + %(count)d))
+fi
+'''
+
+_FOOTER = '''
+%(cleanup)s
+echo "$((%(count)d - failed - skipped))/%(count)d jobs succeeded, $failed failed, \
+$skipped not run" >&2
+[ "$failed" -eq 0 ] && [ "$skipped" -eq 0 ]
+'''
+
+
+def render_script(stages: Sequence[Sequence], jobs: int = 4,
+                  ffmpeg: str = 'ffmpeg', overwrite: bool = False,
+                  log_dir: str = 'logs', name: str = 'run.sh',
+                  cleanup: Iterable[str] = ()) -> str:
+    """Text of the script, ``stages`` are lists of jobs with ``argv``
+
+    ``cleanup`` paths are intermediate files, they are always
+    overwritten and deleted when every job succeeded, together with
+    their directories once these are empty. Relative
+    paths of the jobs are resolved against the working directory the
+    script is started from.
+    """
+    q = shlex.quote
+    cleanup = list(cleanup)
+    scratch = frozenset(cleanup)
+    parts = []
+    count = 0
+    for stage in stages:
+        runs, checks, lists = [], [], []
+        dirs = set()
+        for job in stage:
+            dirs.update(os.path.dirname(cut.dst_path)
+                        for cut in getattr(job, 'cuts', (job,)))
+            if hasattr(job, 'list_lines'):
+                dirs.add(os.path.dirname(job.list_path))
+                lists.append('    printf \'%%s\\n\' %s >%s'
+                             % (' '.join(map(q, job.list_lines())),
+                                q(job.list_path)))
+            # 第一个参数是ffmpeg本身，由脚本中的$FFMPEG代替
+            args = ' '.join(q(arg) for arg in job.argv()[1:])
+            flag = '-y' if overwrite or all(
+                cut.dst_path in scratch
+                for cut in getattr(job, 'cuts', (job,))) else '-n'
+            runs.append('    acquire\n    run %d %s %s &'
+                        % (count, flag, args))
+            checks.append('    check %d %s' % (count, q(job.dst_path)))
+            count += 1
+        if runs:
+            dirs.discard('')
+            prepare = ['    mkdir -p -- %s' % ' '.join(map(q, sorted(dirs)))] \
+                if dirs else []
+            parts.append(_STAGE % {'prepare': '\n'.join(prepare + lists),
+                                   'runs': '\n'.join(runs),
+                                   'checks': '\n'.join(checks),
+                                   'count': len(runs)})
+    if not os.path.isabs(log_dir):
+        # 相对于脚本所在的目录
+        log_dir = '"$(dirname "$0")"/' + q(log_dir)
+    else:
+        log_dir = q(log_dir)
+    # rmdir只删除空目录，其他文件所在的目录会保留
+    dirs = ' '.join(q(path) for path in sorted({
+        os.path.dirname(path) for path in cleanup} - {''}))
+    cleanup = ' '.join(map(q, cleanup))
+    header = _HEADER % {
+        'count': count, 'stages': len(parts), 'name': name,
+        'jobs': max(1, jobs), 'ffmpeg': q(ffmpeg), 'log_dir': log_dir,
+    }
+    footer = _FOOTER % {
+        'count': count,
+        'cleanup': 'if [ "$failed" -eq 0 ]; then\n    rm -f -- %s\n%sfi'
+                   % (cleanup, '    rmdir -- %s 2>/dev/null\n' % dirs
+                      if dirs else '') if cleanup else '',
+    }
+    return header + ''.join(parts) + footer
+
+
+def write_script(path: str, stages: Sequence[Sequence],
+                 log_dir: str = None, **kwargs) -> None:
+    """Write ``render_script`` to ``path`` and make it executable
+
+    The log directory defaults to ``<script name>_logs`` next to it,
+    a relative ``log_dir`` is relative to the script too.
+    """
+    name = os.path.basename(path)
+    if log_dir is None:
+        log_dir = os.path.splitext(name)[0] + '_logs'
+    # bash脚本必须使用LF换行
+    with open(path, 'w', encoding='utf8', newline='\n') as f:
+        f.write(render_script(stages, log_dir=log_dir, name=name,
+                              **kwargs))
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def script_stages(builders: Iterable) -> Tuple[List[List], List[str]]:
+    """Stages and intermediate files of CommandBuilders/ConcatStages
+
+    All cuts form the first stage, all joins the second one. The
+    script writes the list files of the joins itself.
+    """
+    cuts, joins, cleanup = [], [], []
+    for builder in builders:
+        if hasattr(builder, 'concat_job'):
+            if not builder.model_data.intervals_size():
+                continue
+            cuts.extend(builder.cut_jobs())
+            joins.append(builder.concat_job())
+            cleanup.extend(builder.parts() + [builder.list_path])
+        else:
+            cuts.extend(builder.jobs())
+    return [cuts, joins], cleanup
@@ -0,0 +1,173 @@
+"""Interval validation of project documents
+
+The generic schema validator and one ``Moment`` per endpoint used to
+cost most of the loading time of large projects. ``validate_intervals``
+gives the same accept/reject answer: a flat pass built from C-level
+``map``/``min``/``max`` calls (or NumPy when it is installed) handles
+the common all-``int`` document, anything unusual falls back to an
+exact per-interval pass that also names the offending intervals.
+NumPy is only imported once a document is large enough to use it.
+"""
+from functools import lru_cache
+from itertools import chain, repeat
+from operator import add, gt, mul
+from typing import List, Optional, Tuple
+
+_NUMPY_MAX_HOUR = (1 << 62) // 3600
+_NUMPY_MIN_SIZE = 6 * 256
+
+
+class ValidationReport:
+    """Offending ``(index, message)`` pairs, index -1 is the document"""
+
+    def __init__(self, max_errors: int = 10):
+        self.max_errors = max_errors
+        self.errors = []  # type: List[Tuple[int, str]]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __bool__(self):
+        return not self.errors
+
+    @property
+    def full(self) -> bool:
+        return len(self.errors) >= self.max_errors
+
+    @property
+    def indices(self) -> List[int]:
+        return [index for index, _ in self.errors if index >= 0]
+
+    def add(self, index: int, message: str) -> bool:
+        """Record an error, returns whether the report is full"""
+        if not self.full:
+            self.errors.append((index, message))
+        return self.full
+
+    def __str__(self):
+        return '; '.join(message if index < 0
+                         else 'interval %d: %s' % (index, message)
+                         for index, message in self.errors)
+
+
+def _is_integer(value) -> bool:
+    # 与jsonschema (draft 2020-12) 的integer一致：排除bool，接受1.0这样的浮点数
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, int)
+
+
+def _flatten(intervals: list) -> Optional[list]:
+    """``[h, m, s, h, m, s, ...]`` for exactly-typed input, else None"""
+    if not set(map(type, intervals)) <= {list} \
+            or not set(map(len, intervals)) <= {2}:
+        return None
+    moments = list(chain.from_iterable(intervals))
+    if not set(map(type, moments)) <= {list} \
+            or not set(map(len, moments)) <= {3}:
+        return None
+    flat = list(chain.from_iterable(moments))
+    if not set(map(type, flat)) <= {int}:
+        return None
+    return flat
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    # 导入NumPy本身要花费上百毫秒，小项目用不到
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _flat_totals_numpy(numpy, flat: list) -> Optional[list]:
+    values = numpy.array(flat, dtype=numpy.int64).reshape(-1, 2, 3)
+    if (values < 0).any() or (values[:, :, 1:] > 59).any():
+        return None
+    totals = values @ numpy.array([3600, 60, 1], dtype=numpy.int64)
+    if (totals[:, 0] > totals[:, 1]).any():
+        return None
+    return totals.ravel().tolist()
+
+
+def _flat_totals(flat: list) -> Optional[list]:
+    if not flat:
+        return []
+    # 数据量小时NumPy的固定开销不划算；小时数过大时乘以3600可能溢出int64
+    if len(flat) >= _NUMPY_MIN_SIZE and max(flat) <= _NUMPY_MAX_HOUR \
+            and _numpy() is not None:
+        return _flat_totals_numpy(_numpy(), flat)
+    if min(flat) < 0 or max(flat[1::3]) > 59 or max(flat[2::3]) > 59:
+        return None
+    totals = list(map(add,
+                      map(add,
+                          map(mul, flat[0::3], repeat(3600)),
+                          map(mul, flat[1::3], repeat(60))),
+                      flat[2::3]))
+    if any(map(gt, totals[0::2], totals[1::2])):
+        return None
+    return totals
+
+
+def interval_totals(intervals: list) -> Optional[list]:
+    """``[begin, end, begin, end, ...]`` in seconds if all intervals are
+    plain valid ``int`` lists, None if any needs a closer look"""
+    flat = _flatten(intervals)
+    return None if flat is None else _flat_totals(flat)
+
+
+def _moment_error(moment) -> Optional[str]:
+    if not isinstance(moment, list) or len(moment) != 3:
+        return 'expected [hour, mins, secs]'
+    if not all(map(_is_integer, moment)):
+        return 'expected integers'
+    hour, mins, secs = moment
+    if hour < 0 or not 0 <= mins <= 59 or not 0 <= secs <= 59:
+        return 'out of range'
+    return None
+
+
+def interval_error(interval) -> Optional[str]:
+    """Why ``interval`` is invalid, None if it is valid"""
+    if not isinstance(interval, list) or len(interval) != 2:
+        return 'expected [begin, end]'
+    begin, end = interval
+    message = _moment_error(begin)
+    if message is not None:
+        return 'begin: ' + message
+    message = _moment_error(end)
+    if message is not None:
+        return 'end: ' + message
+    if (begin[0] * 60 + begin[1]) * 60 + begin[2] \
+            > (end[0] * 60 + end[1]) * 60 + end[2]:
+        return 'begin is after end'
+    return None
+
+
+def check_intervals(intervals: list, report: ValidationReport,
+                    start: int = 0) -> None:
+    """Exact pass, ``start`` is the index of the first interval"""
+    for index, interval in enumerate(intervals, start):
+        message = interval_error(interval)
+        if message is not None and report.add(index, message):
+            return
+
+
+def validate_intervals(intervals: list,
+                       max_errors: int = 10) -> ValidationReport:
+    """Check shape, ranges and ``begin <= end`` of every interval
+
+    At most ``max_errors`` offending intervals are reported, in order.
+    """
+    report = ValidationReport(max_errors)
+    if not isinstance(intervals, list):
+        report.add(-1, 'intervals: expected an array')
+        return report
+    if interval_totals(intervals) is None:
+        check_intervals(intervals, report)
+    return report
@@ -0,0 +1,120 @@
+"""Binary project format (``.vcut``)
+
+Layout, all integers little-endian::
+
+    header   8s magic, u16 version, u16 reserved, u32 string count,
+             u64 interval count, u64 offset of the begin column
+    strings  per entry: u8 kind, u32 key size, key, u32 value size, value
+             (kind 0: UTF-8 string, kind 1: JSON text of other values)
+    columns  int64 begins[count], int64 ends[count], 8-byte aligned
+
+Loading maps the file and copies the columns into the ``ModelData``
+arrays as raw bytes, nothing is parsed per interval.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from operator import gt
+
+from core.model_data import ModelData
+from core.profiling import timed
+
+VCUT_EXT = '.vcut'
+VCUT_MAGIC = b'VCUTPRJ\0'
+VCUT_VERSION = 1
+
+_HEADER = struct.Struct('<8sHHIQQ')
+_ENTRY = struct.Struct('<BI')
+_SIZE = struct.Struct('<I')
+_KIND_STR = 0
+_KIND_JSON = 1
+
+
+def is_vcut_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() == VCUT_EXT
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder != 'little':
+        column = array('q', column)
+        column.byteswap()
+    return column
+
+
+def dump_vcut(model_data: ModelData, path: str) -> None:
+    kv, begins, ends = model_data.to_arrays()
+    strings = []
+    for key, value in kv.items():
+        kind, text = (_KIND_STR, value) if isinstance(value, str) \
+            else (_KIND_JSON, json.dumps(value, ensure_ascii=False))
+        key, text = key.encode('utf8'), text.encode('utf8')
+        strings.append(_ENTRY.pack(kind, len(key)) + key
+                       + _SIZE.pack(len(text)) + text)
+    strings = b''.join(strings)
+    offset = _HEADER.size + len(strings)
+    padding = -offset % 8
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(VCUT_MAGIC, VCUT_VERSION, 0, len(kv),
+                             len(begins), offset + padding))
+        f.write(strings)
+        f.write(b'\0' * padding)
+        _little_endian(begins).tofile(f)
+        _little_endian(ends).tofile(f)
+
+
+@timed()
+def load_vcut(path: str) -> ModelData:
+    """Raises ValueError when the file is not a valid project"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError('not a %s file' % VCUT_EXT)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, _, string_count, count, offset = \
+                _HEADER.unpack_from(mm, 0)
+            if magic != VCUT_MAGIC:
+                raise ValueError('not a %s file' % VCUT_EXT)
+            if version != VCUT_VERSION:
+                raise ValueError('unsupported %s version %d'
+                                 % (VCUT_EXT, version))
+            if offset % 8 or offset + count * 16 != size:
+                raise ValueError('truncated or corrupted file')
+
+            kv = {}
+            pos = _HEADER.size
+            try:
+                for _ in range(string_count):
+                    kind, key_size = _ENTRY.unpack_from(mm, pos)
+                    if kind not in (_KIND_STR, _KIND_JSON) or pos > offset:
+                        raise ValueError('truncated or corrupted file')
+                    pos += _ENTRY.size
+                    key = mm[pos:pos + key_size].decode('utf8')
+                    pos += key_size
+                    value_size, = _SIZE.unpack_from(mm, pos)
+                    pos += _SIZE.size
+                    value = mm[pos:pos + value_size].decode('utf8')
+                    pos += value_size
+                    kv[key] = value if kind == _KIND_STR else json.loads(value)
+            except struct.error:
+                raise ValueError('truncated or corrupted file')
+            if pos > offset:
+                raise ValueError('truncated or corrupted file')
+
+            begins, ends = array('q'), array('q')
+            with memoryview(mm) as view:
+                begins.frombytes(view[offset:offset + count * 8])
+                ends.frombytes(view[offset + count * 8:offset + count * 16])
+    if sys.byteorder != 'little':
+        begins.byteswap()
+        ends.byteswap()
+
+    report = ModelData.check(dict(kv, intervals=[]))
+    if not report.ok:
+        raise ValueError(str(report))
+    # 与JSON相同的约束：时间非负且begin <= end
+    if count and (min(begins) < 0 or any(map(gt, begins, ends))):
+        raise ValueError('invalid intervals')
+    return ModelData.from_arrays(kv, begins, ends)
@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import ingest
+from core.batch import output_collisions
+
+
+class IngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.out = os.path.join(self.root, 'out')
+        self.paths = []
+        for cam in ('cam1', 'cam2'):
+            os.makedirs(os.path.join(self.root, cam))
+            self.paths.append(os.path.join(self.root, cam, 'clip.mp4'))
+            open(self.paths[-1], 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_same_name_gets_subdirectory_without_creating_it(self):
+        batch, failures = ingest(self.paths, dst_path_dir=self.out)
+        self.assertEqual(failures, [])
+        self.assertEqual([source.dst_path_dir for source in batch.sources],
+                         [self.out, os.path.join(self.out, 'cam2')])
+        self.assertEqual(output_collisions(batch.sources), [])
+        self.assertFalse(os.path.exists(self.out))
@@ -0,0 +1,55 @@
+import os
+import unittest
+
+from core import CommandBuilder, ModelData, Moment, MultiCutJob
+from core.command import MODE_MULTI_OUTPUT
+
+
+def model_data(intervals) -> ModelData:
+    data = ModelData()
+    data.src_path_dir = 'src'
+    data.src_filename = 'a.mp4'
+    data.dst_path_dir = 'dst'
+    for begin, end in intervals:
+        data.add_interval(Moment.from_secs(begin), Moment.from_secs(end))
+    return data
+
+
+def multi_job(intervals) -> MultiCutJob:
+    jobs = list(CommandBuilder(model_data(intervals),
+                               MODE_MULTI_OUTPUT).jobs())
+    assert len(jobs) == 1
+    return jobs[0]
+
+
+class MultiCutJobTest(unittest.TestCase):
+
+    def test_gapped_cuts_share_one_input(self):
+        self.assertEqual(multi_job([(5, 7), (1, 3)]).argv(), [
+            'ffmpeg',
+            '-ss', '00:00:01', '-i', os.path.join('src', 'a.mp4'),
+            '-ss', '00:00:04', '-t', '00:00:02',
+            '-vcodec', 'copy', '-acodec', 'copy', '-copyinkf',
+            os.path.join('dst', 'a_0.mp4'),
+            '-ss', '00:00:00', '-t', '00:00:02',
+            '-vcodec', 'copy', '-acodec', 'copy', '-copyinkf',
+            os.path.join('dst', 'a_1.mp4'),
+        ])
+
+    def test_contiguous_cuts_use_the_segment_muxer(self):
+        argv = multi_job([(1, 3), (3, 5), (5, 6)]).argv()
+        self.assertEqual(argv.count('-i'), 1)
+        self.assertEqual(argv[argv.index('-f') + 1], 'segment')
+        self.assertEqual(argv[argv.index('-segment_times') + 1], '2,4')
+
+    def test_zero_length_cut_falls_back_to_one_output_per_cut(self):
+        for intervals in ([(1, 3), (3, 3), (3, 5)], [(1, 1), (1, 3)],
+                          [(1, 3), (3, 3)]):
+            job = multi_job(intervals)
+            self.assertFalse(job.is_contiguous(), intervals)
+            self.assertNotIn('-segment_times', job.argv())
+            self.assertEqual(job.argv().count('-copyinkf'), len(intervals))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import random
+import unittest
+
+from core import CommandBuilder, Moment
+from tests.test_model_data import model_data
+
+# 无显示器时也能创建QApplication
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+try:
+    from PyQt5.QtWidgets import QApplication, QTextEdit
+    from ui.command_output import CommandOutputRenderer
+    from ui.durations_list_model import DurationsListModel
+except ImportError:
+    QApplication = None
+
+
+@unittest.skipIf(QApplication is None, 'PyQt5 is not installed')
+class CommandOutputRendererTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.data = model_data(40)
+        self.model = DurationsListModel(self.data)
+        self.view = QTextEdit()
+        self.output = CommandOutputRenderer(self.view)
+        self.output.reset(CommandBuilder(self.data))
+        self.model.dataChanged.connect(
+            lambda top_left, bottom_right, roles: self.output.update_rows(
+                top_left.row(), bottom_right.row()))
+        self.model.rowsInserted.connect(
+            lambda parent, first, last: self.output.insert_rows(first, last))
+        self.model.rowsRemoved.connect(
+            lambda parent, first, last: self.output.remove_rows(first, last))
+        self.model.rowsMoved.connect(
+            lambda parent, start, end, destination, row:
+            self.output.move_rows(start, end, row))
+
+    def assertInSync(self):
+        expected = list(CommandBuilder(self.data).commands())
+        self.assertEqual(self.output.lines, expected)
+        self.assertEqual(self.view.toPlainText(), '\n'.join(expected))
+
+    def test_flush_reflows_once_from_the_smallest_row(self):
+        self.model.insert_intervals(30, [(Moment.from_secs(7),
+                                          Moment.from_secs(9))])
+        self.model.insert_intervals(10, [(Moment.from_secs(7),
+                                          Moment.from_secs(9))])
+        self.assertTrue(self.output.pending)
+        self.output.flush()
+        self.assertFalse(self.output.pending)
+        self.assertInSync()
+
+    def test_random_edits_between_flushes(self):
+        rng = random.Random(3)
+        for _ in range(60):
+            for _ in range(rng.randrange(1, 6)):
+                size = self.model.rowCount()
+                op = rng.randrange(4)
+                rows = rng.sample(range(size), rng.randrange(1, 4))
+                if op == 0:
+                    self.model.insert_intervals(
+                        rng.randrange(size + 1),
+                        [(Moment.from_secs(7), Moment.from_secs(9))])
+                elif op == 1 and size > 10:
+                    self.model.remove_intervals(rows[:1])
+                elif op == 2:
+                    self.model.move_intervals(rows, rng.choice((-2, 1)))
+                else:
+                    row = rng.randrange(size)
+                    self.model.setData(self.model.index(row, 1),
+                                       '01:00:%02d' % rng.randrange(60))
+            self.output.flush()
+            self.assertInSync()
+
+
+if __name__ == '__main__':
+    unittest.main()
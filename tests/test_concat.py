@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import ConcatStage, ModelData, Moment
+
+
+def model_data(src_path_dir: str, dst_path_dir: str) -> ModelData:
+    data = ModelData()
+    data.src_path_dir = src_path_dir
+    data.src_filename = 'clip.mp4'
+    data.dst_path_dir = dst_path_dir
+    data.add_interval(Moment.from_secs(1), Moment.from_secs(2))
+    data.add_interval(Moment.from_secs(3), Moment.from_secs(4))
+    return data
+
+
+class ConcatStageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.root)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def test_stage_dir_is_stable_per_source(self):
+        stage = ConcatStage(model_data('cam1', 'out'), scratch_dir='s')
+        self.assertEqual(list(stage.commands()),
+                         list(ConcatStage(model_data('cam1', 'out'),
+                                          scratch_dir='s').commands()))
+        self.assertNotEqual(stage.stage_dir,
+                            ConcatStage(model_data('cam2', 'out'),
+                                        scratch_dir='s').stage_dir)
+
+    def test_relative_scratch_dir_lists_absolute_parts(self):
+        stage = ConcatStage(model_data('cam1', 'out'), scratch_dir='s')
+        self.assertTrue(os.path.isabs(stage.list_path))
+        stage.prepare()
+        with open(stage.list_path, encoding='utf8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, ["file '%s'" % os.path.abspath(part)
+                                 for part in stage.parts()])
+        stage.cleanup()
+        self.assertFalse(os.path.exists(stage.stage_dir))
+        self.assertTrue(os.path.isdir('s'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from tests.test_model_data import begins, model_data
+
+try:
+    from ui.durations_list_model import DurationsListModel
+except ImportError:
+    DurationsListModel = None
+
+
+@unittest.skipIf(DurationsListModel is None, 'PyQt5 is not installed')
+class RemoveIntervalsTest(unittest.TestCase):
+
+    def test_out_of_range_row_keeps_valid_rows(self):
+        data = model_data(3)
+        model = DurationsListModel(data)
+        self.assertEqual(model.remove_intervals([0, 1, 2, 3]), 3)
+        self.assertEqual(model.rowCount(), 0)
+
+    def test_contiguous_range_emits_one_removal(self):
+        data = model_data(6)
+        model = DurationsListModel(data)
+        removed, resets = [], []
+        model.rowsRemoved.connect(
+            lambda parent, first, last: removed.append((first, last)))
+        model.modelReset.connect(lambda: resets.append(True))
+        self.assertEqual(model.remove_intervals([3, 1, 2]), 3)
+        self.assertEqual((removed, resets), ([(1, 3)], []))
+        self.assertEqual(begins(data), [0, 4, 5])
+
+    def test_fragmented_selection_is_reset(self):
+        data = model_data(6)
+        model = DurationsListModel(data)
+        removed, resets = [], []
+        model.rowsRemoved.connect(
+            lambda parent, first, last: removed.append((first, last)))
+        model.modelReset.connect(lambda: resets.append(True))
+        self.assertEqual(model.remove_intervals([-1, 0, 2, 4, 6]), 3)
+        self.assertEqual((removed, resets), ([], [True]))
+        self.assertEqual(begins(data), [1, 3, 5])
+
+
+@unittest.skipIf(DurationsListModel is None, 'PyQt5 is not installed')
+class MoveIntervalsTest(unittest.TestCase):
+
+    def test_out_of_range_row_keeps_valid_rows(self):
+        data = model_data(3)
+        model = DurationsListModel(data)
+        self.assertEqual(model.move_intervals([1, 2, 3], -1), 1)
+        self.assertEqual(begins(data), [1, 2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
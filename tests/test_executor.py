@@ -0,0 +1,221 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core import CommandBuilder, JobExecutor, JobJournal, ModelData, Moment
+from core.executor import JOB_CANCELLED, JOB_DONE, JOB_SKIPPED
+from core.journal import job_key, journal_path
+
+# 模拟的ffmpeg记录每次运行的输出，按-n/-y处理已有文件
+FAKE_FFMPEG = '''#!%(python)s
+import os
+import sys
+import time
+
+argv = sys.argv[1:]
+with open(os.environ['VCUT_FAKE_LOG'], 'a') as f:
+    f.write(argv[-1] + '\\n')
+time.sleep(float(os.environ.get('VCUT_FAKE_SLEEP', '0')))
+if '-n' in argv and os.path.exists(argv[-1]):
+    sys.exit(1)
+with open(argv[-1], 'w') as f:
+    f.write(' '.join(argv[argv.index('-ss'):argv.index('-i')]))
+'''
+
+
+class JobExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ffmpeg = os.path.join(self.root, 'ffmpeg')
+        with open(self.ffmpeg, 'w', encoding='utf8') as f:
+            f.write(FAKE_FFMPEG % {'python': sys.executable})
+        os.chmod(self.ffmpeg, os.stat(self.ffmpeg).st_mode | stat.S_IXUSR)
+        self.log = os.path.join(self.root, 'runs.log')
+        env = mock.patch.dict(os.environ, {'VCUT_FAKE_LOG': self.log})
+        env.start()
+        self.addCleanup(env.stop)
+        self.journal_path = journal_path(
+            os.path.join(self.root, 'project.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def jobs(self, disk: str = 'disk0', count: int = 3) -> list:
+        data = ModelData()
+        data.src_path_dir = os.path.join(self.root, disk)
+        data.src_filename = 'clip.mp4'
+        data.dst_path_dir = os.path.join(self.root, disk, 'out')
+        os.makedirs(data.dst_path_dir, exist_ok=True)
+        src_path = os.path.join(data.src_path_dir, data.src_filename)
+        # 重写源文件会改变指纹，只创建一次
+        if not os.path.exists(src_path):
+            with open(src_path, 'wb') as f:
+                f.write(b'source')
+        for i in range(count):
+            data.add_interval(Moment.from_secs(10 * i),
+                              Moment.from_secs(10 * i + i + 1))
+        return list(CommandBuilder(data).jobs())
+
+    def runs(self) -> list:
+        try:
+            with open(self.log, encoding='utf8') as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def run_jobs(self, jobs, **kwargs) -> list:
+        journal = JobJournal(self.journal_path)
+        try:
+            return JobExecutor(jobs, ffmpeg=self.ffmpeg, journal=journal,
+                               **kwargs).run()
+        finally:
+            journal.close()
+
+    def test_runs_every_job(self):
+        jobs = self.jobs()
+        results = JobExecutor(jobs, workers=2, ffmpeg=self.ffmpeg).run()
+        self.assertEqual([r.status for r in results], [JOB_DONE] * 3)
+        self.assertEqual(sorted(self.runs()),
+                         sorted(job.dst_path for job in jobs))
+        self.assertTrue(all(os.path.isfile(job.dst_path) for job in jobs))
+
+    def test_creates_output_directory(self):
+        job, = self.jobs(count=1)
+        job.dst_path = os.path.join(self.root, 'new', 'dir', 'clip_0.mp4')
+        result, = JobExecutor([job], ffmpeg=self.ffmpeg).run()
+        self.assertEqual(result.status, JOB_DONE)
+        self.assertTrue(os.path.isfile(job.dst_path))
+
+    def test_existing_output_fails_without_overwrite(self):
+        jobs = self.jobs(count=1)
+        open(jobs[0].dst_path, 'w').close()
+        result, = JobExecutor(jobs, ffmpeg=self.ffmpeg).run()
+        self.assertFalse(result.ok)
+        self.assertEqual(result.returncode, 1)
+
+    def test_resume_skips_completed_jobs(self):
+        jobs = self.jobs()
+        self.run_jobs(jobs)
+        os.remove(self.log)
+        results = self.run_jobs(self.jobs())
+        self.assertEqual([r.status for r in results], [JOB_SKIPPED] * 3)
+        self.assertEqual(self.runs(), [])
+
+    def test_resume_after_crash(self):
+        jobs = self.jobs()
+        self.run_jobs([jobs[0], jobs[2]])
+        # 第二个任务运行时被杀死：输出只写了一半，完成记录只写了半行
+        journal = JobJournal(self.journal_path)
+        journal.start(jobs[1])
+        journal.close()
+        with open(self.journal_path, 'a', encoding='utf8') as f:
+            f.write('{"event": "finish", "key": "%s", "sta'
+                    % job_key(jobs[1]))
+        with open(jobs[1].dst_path, 'w') as f:
+            f.write('half')
+        os.remove(self.log)
+        results = self.run_jobs(self.jobs())
+        self.assertEqual([r.status for r in results],
+                         [JOB_SKIPPED, JOB_DONE, JOB_SKIPPED])
+        # 日志中开始过的任务不需要overwrite也覆盖半截输出
+        self.assertEqual(self.runs(), [jobs[1].dst_path])
+        with open(jobs[1].dst_path, encoding='utf8') as f:
+            self.assertNotEqual(f.read(), 'half')
+        journal = JobJournal(self.journal_path)
+        self.assertTrue(all(journal.is_complete(job) for job in jobs))
+        journal.close()
+
+    def test_changed_source_reruns_jobs(self):
+        jobs = self.jobs()
+        self.run_jobs(jobs)
+        os.remove(self.log)
+        with open(jobs[0].src_path, 'wb') as f:
+            f.write(b'SOURCE')
+        results = self.run_jobs(self.jobs())
+        self.assertEqual([r.status for r in results], [JOB_DONE] * 3)
+        self.assertEqual(sorted(self.runs()),
+                         sorted(job.dst_path for job in jobs))
+
+    def test_changed_output_reruns_only_that_job(self):
+        jobs = self.jobs()
+        self.run_jobs(jobs)
+        os.remove(self.log)
+        with open(jobs[2].dst_path, 'w') as f:
+            f.write('edited')
+        results = self.run_jobs(self.jobs())
+        self.assertEqual([r.status for r in results],
+                         [JOB_SKIPPED, JOB_SKIPPED, JOB_DONE])
+        self.assertEqual(self.runs(), [jobs[2].dst_path])
+
+    def test_cancel_terminates_running_jobs(self):
+        jobs = self.jobs(count=4)
+        finished = []
+        with mock.patch.dict(os.environ, {'VCUT_FAKE_SLEEP': '30'}):
+            journal = JobJournal(self.journal_path)
+            executor = JobExecutor(jobs, workers=2, ffmpeg=self.ffmpeg,
+                                   journal=journal,
+                                   on_finish=finished.append)
+            executor.start()
+            deadline = time.monotonic() + 10
+            while len(self.runs()) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            begin = time.monotonic()
+            executor.cancel()
+            self.assertTrue(executor.wait(10))
+            journal.close()
+        self.assertLess(time.monotonic() - begin, 10)
+        self.assertTrue(executor.cancelled)
+        self.assertEqual([r.status for r in executor.results],
+                         [JOB_CANCELLED] * 4)
+        self.assertEqual(len(finished), 4)
+        self.assertEqual(len(self.runs()), 2)
+        # 被取消的任务没有完成记录，下次运行时重做
+        journal = JobJournal(self.journal_path)
+        self.assertEqual(len(journal), 0)
+        self.assertTrue(any(journal.owns(job) for job in jobs))
+        journal.close()
+
+    def test_cancel_before_start(self):
+        executor = JobExecutor(self.jobs(), ffmpeg=self.ffmpeg)
+        executor.cancel()
+        results = executor.run()
+        self.assertEqual([r.status for r in results], [JOB_CANCELLED] * 3)
+        self.assertEqual(self.runs(), [])
+
+    def test_per_device_limit(self):
+        jobs = self.jobs('disk0') + self.jobs('disk1')
+        lock = threading.Lock()
+        running = {}
+        peak = {}
+        overall = []
+
+        def device_of(path):
+            return os.path.relpath(path, self.root).split(os.sep)[0]
+
+        def on_start(result):
+            with lock:
+                disk = device_of(result.job.src_path)
+                running[disk] = running.get(disk, 0) + 1
+                peak[disk] = max(peak.get(disk, 0), running[disk])
+                overall.append(sum(running.values()))
+
+        def on_finish(result):
+            with lock:
+                running[device_of(result.job.src_path)] -= 1
+
+        with mock.patch.dict(os.environ, {'VCUT_FAKE_SLEEP': '0.2'}):
+            results = JobExecutor(jobs, workers=4, ffmpeg=self.ffmpeg,
+                                  per_device=1, device_of=device_of,
+                                  on_start=on_start,
+                                  on_finish=on_finish).run()
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(peak, {'disk0': 1, 'disk1': 1})
+        # 两个磁盘上的任务同时运行
+        self.assertEqual(max(overall), 2)
@@ -0,0 +1,156 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import (CommandBuilder, CutJob, JobJournal, JobResult, ModelData,
+                  Moment)
+from core.executor import JOB_DONE, JOB_FAILED
+from core.journal import job_key, journal_path
+
+
+def model_data(root: str, src_filename: str = 'clip.mp4') -> ModelData:
+    data = ModelData()
+    data.src_path_dir = root
+    data.src_filename = src_filename
+    data.dst_path_dir = os.path.join(root, 'out')
+    data.add_interval(Moment.from_secs(1), Moment.from_secs(2))
+    data.add_interval(Moment.from_secs(3), Moment.from_secs(5))
+    return data
+
+
+def write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+class JobKeyTest(unittest.TestCase):
+
+    def test_same_parameters_same_key(self):
+        first = list(CommandBuilder(model_data('/v', '片段.mp4')).jobs())
+        second = list(CommandBuilder(model_data('/v', '片段.mp4')).jobs())
+        self.assertEqual([job_key(job) for job in first],
+                         [job_key(job) for job in second])
+        self.assertEqual(len({job_key(job) for job in first}), 2)
+
+    def test_ignores_ffmpeg_executable(self):
+        job = next(CommandBuilder(model_data('/v')).jobs())
+
+        class Bundled(CutJob):
+            def argv(self, ffmpeg='ffmpeg'):
+                return super().argv('/opt/bin/ffmpeg')
+
+        bundled = Bundled(job.index, job.begin, job.end, job.src_path,
+                          job.dst_path)
+        self.assertEqual(job_key(job), job_key(bundled))
+
+    def test_changed_parameters_change_key(self):
+        job = CutJob(0, Moment.from_secs(1), Moment.from_secs(2),
+                     '/v/clip.mp4', '/v/out/clip_0.mp4')
+        moved = CutJob(0, Moment.from_secs(1), Moment.from_secs(3),
+                       '/v/clip.mp4', '/v/out/clip_0.mp4')
+        renamed = CutJob(0, Moment.from_secs(1), Moment.from_secs(2),
+                         '/v/clip.mp4', '/v/out2/clip_0.mp4')
+        self.assertEqual(len({job_key(job), job_key(moved),
+                              job_key(renamed)}), 3)
+
+
+class JobJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = journal_path(os.path.join(self.root, 'project.json'))
+        write(os.path.join(self.root, 'clip.mp4'), b'source' * 100)
+        self.jobs = list(CommandBuilder(model_data(self.root)).jobs())
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def finish(self, journal: JobJournal, job, status=JOB_DONE) -> None:
+        journal.start(job)
+        write(job.dst_path, b'cut ' + job.dst_path.encode())
+        result = JobResult(job)
+        result.status = status
+        result.returncode = 0 if status == JOB_DONE else 1
+        journal.finish(result)
+
+    def test_journal_path(self):
+        self.assertEqual(self.path, os.path.join(self.root, 'project.journal'))
+        self.assertEqual(journal_path(self.root),
+                         os.path.join(self.root, 'vcut.journal'))
+
+    def test_finished_job_is_complete_after_replay(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0])
+        journal.close()
+        replayed = JobJournal(self.path)
+        self.assertEqual(len(replayed), 1)
+        self.assertTrue(replayed.is_complete(self.jobs[0]))
+        self.assertFalse(replayed.is_complete(self.jobs[1]))
+
+    def test_started_job_is_owned_but_not_complete(self):
+        journal = JobJournal(self.path)
+        journal.start(self.jobs[0])
+        journal.close()
+        replayed = JobJournal(self.path)
+        self.assertTrue(replayed.owns(self.jobs[0]))
+        self.assertFalse(replayed.owns(self.jobs[1]))
+        self.assertFalse(replayed.is_complete(self.jobs[0]))
+
+    def test_failed_job_is_not_complete(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0], JOB_FAILED)
+        self.assertFalse(journal.is_complete(self.jobs[0]))
+
+    def test_missing_output_is_not_recorded_as_done(self):
+        journal = JobJournal(self.path)
+        result = JobResult(self.jobs[0])
+        result.status = JOB_DONE
+        journal.finish(result)
+        journal.close()
+        with open(self.path, encoding='utf8') as f:
+            self.assertEqual(json.loads(f.readline())['status'], 'missing')
+        self.assertFalse(JobJournal(self.path).is_complete(self.jobs[0]))
+
+    def test_replaced_source_invalidates_entry(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0])
+        # 同一路径换成大小相同、内容不同的文件
+        write(self.jobs[0].src_path, b'SOURCE' * 100)
+        self.assertFalse(journal.is_complete(self.jobs[0]))
+
+    def test_changed_output_invalidates_entry(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0])
+        write(self.jobs[0].dst_path, b'truncated')
+        self.assertFalse(journal.is_complete(self.jobs[0]))
+        os.remove(self.jobs[0].dst_path)
+        self.assertFalse(journal.is_complete(self.jobs[0]))
+
+    def test_touched_output_stays_complete(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0])
+        os.utime(self.jobs[0].dst_path, (0, 0))
+        self.assertTrue(journal.is_complete(self.jobs[0]))
+
+    def test_torn_last_line_is_ignored_and_terminated(self):
+        journal = JobJournal(self.path)
+        self.finish(journal, self.jobs[0])
+        journal.close()
+        with open(self.path, 'a', encoding='utf8') as f:
+            f.write('{"event": "finish", "key": "%s", "sta'
+                    % job_key(self.jobs[1]))
+        resumed = JobJournal(self.path)
+        self.assertTrue(resumed.is_complete(self.jobs[0]))
+        self.assertFalse(resumed.is_complete(self.jobs[1]))
+        self.finish(resumed, self.jobs[1])
+        resumed.close()
+        # 半行单独成行，之后的记录不受影响
+        with open(self.path, encoding='utf8') as f:
+            lines = f.read().split('\n')
+        self.assertTrue(lines[-4].endswith('"sta'))
+        replayed = JobJournal(self.path)
+        self.assertTrue(replayed.is_complete(self.jobs[0]))
+        self.assertTrue(replayed.is_complete(self.jobs[1]))
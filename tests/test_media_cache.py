@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import MediaMeta, MediaMetaCache, ModelData
+from core.batch import probe_sources
+
+
+class MediaMetaCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'meta.json')
+        self.probed = []
+        self.media = []
+        for i in range(3):
+            self.media.append(os.path.join(self.root, 'clip%d.mp4' % i))
+            with open(self.media[-1], 'wb') as f:
+                f.write(b'x' * i)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def probe(self, path: str) -> MediaMeta:
+        self.probed.append(path)
+        return MediaMeta(os.path.getsize(path), duration=1000)
+
+    def cache(self) -> MediaMetaCache:
+        return MediaMetaCache(self.path, prober=self.probe)
+
+    def test_miss_is_written_on_flush(self):
+        cache = self.cache()
+        self.assertEqual(cache.get(self.media[1]).size, 1)
+        self.assertFalse(os.path.exists(self.path))
+        cache.flush()
+        reopened = self.cache()
+        self.assertEqual(reopened.get(self.media[1]).duration, 1000)
+        self.assertEqual((reopened.hits, reopened.misses), (1, 0))
+        self.assertEqual(self.probed, [self.media[1]])
+
+    def test_flush_without_changes_does_not_write(self):
+        cache = self.cache()
+        cache.get(self.media[0])
+        cache.flush()
+        os.remove(self.path)
+        cache.get(self.media[0])
+        cache.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_clear_is_written(self):
+        cache = self.cache()
+        cache.get(self.media[0])
+        cache.flush()
+        cache.clear()
+        self.assertEqual(len(self.cache()), 0)
+
+    def test_probe_sources_flushes(self):
+        sources = []
+        for path in self.media + [os.path.join(self.root, 'missing.mp4')]:
+            source = ModelData()
+            source.src_path_dir, source.src_filename = os.path.split(path)
+            sources.append(source)
+        metas = probe_sources(sources, self.cache(), workers=2)
+        self.assertEqual([meta and meta.size for meta in metas],
+                         [0, 1, 2, None])
+        self.assertEqual(len(self.cache()), 3)
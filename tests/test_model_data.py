@@ -0,0 +1,72 @@
+import unittest
+
+from core import ModelData, Moment
+from core.model_data import index_ranges, move_plan
+
+
+def model_data(size: int) -> ModelData:
+    """Intervals ``[i, i + 1]`` in seconds, row ``i`` begins at ``i``"""
+    data = ModelData()
+    for i in range(size):
+        data.add_interval(Moment.from_secs(i), Moment.from_secs(i + 1))
+    return data
+
+
+def begins(data: ModelData) -> list:
+    return [begin for begin, _ in data.intervals_secs_iter()]
+
+
+class IndexRangesTest(unittest.TestCase):
+
+    def test_merges_sorted_unique_indices(self):
+        self.assertEqual(index_ranges([5, 1, 2, 2, 0, 7, 6]),
+                         [(0, 2), (5, 7)])
+
+    def test_empty(self):
+        self.assertEqual(index_ranges([]), [])
+
+
+class MovePlanTest(unittest.TestCase):
+
+    def test_out_of_range_index_keeps_valid_rows(self):
+        self.assertEqual(move_plan([1, 2, 3], -1, 3), [(1, 2, 0)])
+        self.assertEqual(move_plan([-1, 0, 1], 1, 3), [(0, 1, 1)])
+
+    def test_stops_at_edges(self):
+        self.assertEqual(move_plan([0, 1], -1, 3), [])
+        self.assertEqual(move_plan([2], 5, 3), [])
+
+
+class DelIntervalsTest(unittest.TestCase):
+
+    def test_deletes_ranges(self):
+        data = model_data(6)
+        self.assertEqual(data.del_intervals([4, 0, 1]), 3)
+        self.assertEqual(begins(data), [2, 3, 5])
+
+    def test_out_of_range_index_keeps_valid_rows(self):
+        data = model_data(3)
+        self.assertEqual(data.del_intervals([0, 1, 2, 3]), 3)
+        self.assertEqual(data.intervals_size(), 0)
+
+    def test_negative_index_is_ignored(self):
+        data = model_data(3)
+        self.assertEqual(data.del_intervals([-1, 0]), 1)
+        self.assertEqual(begins(data), [1, 2])
+
+
+class MoveIntervalsTest(unittest.TestCase):
+
+    def test_out_of_range_index_keeps_valid_rows(self):
+        data = model_data(3)
+        self.assertEqual(data.move_intervals([1, 2, 3], -1), 1)
+        self.assertEqual(begins(data), [1, 2, 0])
+
+    def test_keeps_relative_order(self):
+        data = model_data(5)
+        data.move_intervals([1, 3], 2)
+        self.assertEqual(begins(data), [0, 2, 4, 1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import copy
+import pickle
+import unittest
+
+from core import Moment
+
+
+class Timecode(Moment):
+    __slots__ = ()
+
+
+class MomentTest(unittest.TestCase):
+
+    def test_fields(self):
+        moment = Moment(1, 2, 3)
+        self.assertEqual((moment.hour, moment.mins, moment.secs), (1, 2, 3))
+        self.assertEqual(moment.to_secs(), 3723)
+        self.assertEqual(moment.to_hms(), (1, 2, 3))
+        self.assertEqual(Moment.from_secs(3723), moment)
+        self.assertEqual(Moment(secs=90).to_hms(), (0, 1, 30))
+
+    def test_immutable(self):
+        moment = Moment(0, 0, 1)
+        with self.assertRaises(AttributeError):
+            moment.secs = 2
+        with self.assertRaises(AttributeError):
+            moment._secs = 2
+        with self.assertRaises(AttributeError):
+            del moment._secs
+        self.assertFalse(hasattr(moment, '__dict__'))
+        self.assertEqual(moment.to_secs(), 1)
+
+    def test_from_args_and_list(self):
+        self.assertEqual(Moment.from_args(1, 2, 3), Moment(1, 2, 3))
+        self.assertEqual(Moment.from_list([1, 2, 3]), Moment(1, 2, 3))
+        for args in ((-1, 0, 0), (0, 60, 0), (0, 0, 60), (0, -1, 0)):
+            with self.subTest(args=args):
+                self.assertFalse(Moment.validate(*args))
+                self.assertIsNone(Moment.from_args(*args))
+                self.assertIsNone(Moment.from_list(list(args)))
+        self.assertIsNone(Moment.from_list([1, 2]))
+
+    def test_arithmetic(self):
+        a, b = Moment(0, 1, 30), Moment(0, 0, 45)
+        self.assertEqual(a + b, Moment(0, 2, 15))
+        self.assertEqual(a - b, Moment(0, 0, 45))
+        # 不会出现负的时间
+        self.assertEqual(b - a, Moment())
+        self.assertIsInstance(a + b, Moment)
+
+    def test_ordering(self):
+        moments = [Moment(0, 0, 3), Moment(1, 0, 0), Moment(0, 2, 0)]
+        self.assertEqual(sorted(moments),
+                         [Moment(0, 0, 3), Moment(0, 2, 0), Moment(1, 0, 0)])
+        a, b = Moment(0, 0, 1), Moment(0, 0, 2)
+        self.assertTrue(a < b and a <= b and b > a and b >= a and a != b)
+        self.assertTrue(a <= Moment(0, 0, 1) and a >= Moment(0, 0, 1))
+        self.assertFalse(a == 1)
+        self.assertTrue(a != 1)
+        with self.assertRaises(TypeError):
+            a < 1
+
+    def test_hash(self):
+        self.assertEqual(hash(Moment(0, 1, 0)), hash(Moment.from_secs(60)))
+        self.assertEqual(len({Moment(0, 1, 0), Moment.from_secs(60),
+                              Moment(0, 0, 1)}), 2)
+        self.assertEqual({Moment(0, 1, 0): 'x'}[Moment.from_secs(60)], 'x')
+
+    def test_pickle_and_copy(self):
+        moment = Moment(2, 3, 4)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            with self.subTest(protocol=protocol):
+                loaded = pickle.loads(pickle.dumps(moment, protocol))
+                self.assertIs(type(loaded), Moment)
+                self.assertEqual(loaded, moment)
+        self.assertEqual(copy.copy(moment), moment)
+        self.assertEqual(copy.deepcopy([moment]), [moment])
+
+    def test_subclass_constructors(self):
+        for moment in (Timecode.from_args(0, 1, 2),
+                       Timecode.from_list([0, 1, 2]),
+                       Timecode.from_secs(62)):
+            self.assertIs(type(moment), Timecode)
+            self.assertEqual(moment, Moment(0, 1, 2))
+        loaded = pickle.loads(pickle.dumps(Timecode.from_secs(62)))
+        self.assertIs(type(loaded), Timecode)
+        self.assertEqual(loaded.to_secs(), 62)
@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import CommandBuilder, ModelData, Moment, OutputCache
+from core.command import MODE_MULTI_OUTPUT, MODE_PER_INTERVAL
+from core.output_cache import INDEX_NAME
+
+
+class OutputCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root, 'cache')
+        self.src_path = os.path.join(self.root, 'clip.mp4')
+        with open(self.src_path, 'wb') as f:
+            f.write(b'source')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def jobs(self, intervals, dst: str = 'out',
+             mode: str = MODE_PER_INTERVAL) -> list:
+        data = ModelData()
+        data.src_path_dir = self.root
+        data.src_filename = 'clip.mp4'
+        data.dst_path_dir = os.path.join(self.root, dst)
+        os.makedirs(data.dst_path_dir, exist_ok=True)
+        for begin, end in intervals:
+            data.add_interval(Moment.from_secs(begin), Moment.from_secs(end))
+        return list(CommandBuilder(data, mode).jobs())
+
+    def cut(self, job, content: bytes = None) -> None:
+        # 代替ffmpeg写出每个输出
+        for path in [cut.dst_path for cut in job.cuts] \
+                if hasattr(job, 'cuts') else [job.dst_path]:
+            with open(path, 'wb') as f:
+                f.write(content or path.encode())
+
+    def read(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_hit_links_output_of_moved_row(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache.store(job)
+        # 前面插入一行后同一片段的输出编号变为1
+        _, moved = self.jobs([(0, 1), (1, 2)], dst='moved')
+        self.assertTrue(cache.fetch(moved))
+        self.assertEqual(self.read(moved.dst_path), self.read(job.dst_path))
+        self.assertEqual(cache.hits, 1)
+
+    def test_miss(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache.store(job)
+        other, = self.jobs([(1, 3)], dst='other')
+        self.assertFalse(cache.fetch(other))
+        self.assertFalse(os.path.exists(other.dst_path))
+        self.assertEqual(cache.hits, 0)
+
+    def test_changed_source_misses(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache.store(job)
+        with open(self.src_path, 'wb') as f:
+            f.write(b'SOURCE')
+        again, = self.jobs([(1, 2)], dst='again')
+        self.assertFalse(cache.fetch(again))
+
+    def test_existing_output_needs_overwrite(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache.store(job)
+        self.assertFalse(cache.fetch(job))
+        self.assertTrue(cache.fetch(job, overwrite=True))
+
+    def test_entry_edited_in_place_is_dropped(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job, b'abcd')
+        cache.store(job)
+        # 输出与条目是硬链接，原地修改且大小不变
+        with open(job.dst_path, 'r+b') as f:
+            f.write(b'ABCD')
+        again, = self.jobs([(1, 2)], dst='again')
+        self.assertFalse(cache.fetch(again))
+        self.assertEqual(cache.size, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = OutputCache(self.cache_dir, max_bytes=8)
+        first, second, third = self.jobs([(1, 2), (3, 4), (5, 6)])
+        for job in (first, second):
+            self.cut(job, b'1234')
+            cache.store(job)
+        _, moved = self.jobs([(0, 1), (1, 2)], dst='moved')
+        self.assertTrue(cache.fetch(moved))
+        self.cut(third, b'1234')
+        cache.store(third)
+        self.assertEqual(cache.size, 8)
+        # first刚被使用过，second被淘汰
+        self.assertFalse(cache.fetch(second, overwrite=True))
+        self.assertTrue(cache.fetch(first, overwrite=True))
+        self.assertTrue(cache.fetch(third, overwrite=True))
+
+    def test_index_survives_reopen(self):
+        cache = OutputCache(self.cache_dir)
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache.store(job)
+        cache.save_index()
+        reopened = OutputCache(self.cache_dir)
+        self.assertEqual(reopened.size, cache.size)
+        self.assertTrue(reopened.fetch(job, overwrite=True))
+
+    def test_malformed_index_starts_empty(self):
+        job, = self.jobs([(1, 2)])
+        self.cut(job)
+        cache = OutputCache(self.cache_dir)
+        cache.store(job)
+        index = os.path.join(self.cache_dir, INDEX_NAME)
+        for content in ('{"broken', '{"a": 1}', '[["name", 3]]',
+                        '[["name", "x", "y"]]', '[1]'):
+            with open(index, 'w', encoding='utf8') as f:
+                f.write(content)
+            reopened = OutputCache(self.cache_dir)
+            self.assertEqual(reopened.size, 0, content)
+            # 未登记的条目被重新写入
+            reopened.store(job)
+            self.assertTrue(reopened.fetch(job, overwrite=True), content)
+
+    def test_multi_output_keys(self):
+        single, = self.jobs([(1, 2)])
+        multi, = self.jobs([(1, 2), (2, 3)], mode=MODE_MULTI_OUTPUT)
+        cache = OutputCache(self.cache_dir)
+        names = [name for name, _ in cache.entries(multi)]
+        self.assertEqual(len(set(names)), 2)
+        # 分段输出与单独切割的结果不同，不共用条目
+        self.assertNotIn(cache.entries(single)[0][0], names)
+        self.cut(multi)
+        cache.store(multi)
+        again, = self.jobs([(1, 2), (2, 3)], dst='again',
+                           mode=MODE_MULTI_OUTPUT)
+        self.assertEqual([name for name, _ in cache.entries(again)], names)
+        self.assertTrue(cache.fetch(again))
+        self.assertEqual([self.read(cut.dst_path) for cut in again.cuts],
+                         [self.read(cut.dst_path) for cut in multi.cuts])
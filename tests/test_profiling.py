@@ -0,0 +1,22 @@
+import os
+import unittest
+from unittest import mock
+
+from core.profiling import env_enabled
+
+
+class EnvEnabledTest(unittest.TestCase):
+
+    def test_values(self):
+        for value, enabled in (('', False), ('0', False), ('false', False),
+                               ('False', False), ('NO', False),
+                               (' no ', False), ('1', True), ('yes', True),
+                               ('true', True), ('on', True)):
+            with self.subTest(value=value), \
+                    mock.patch.dict(os.environ, {'VCUT_TEST_FLAG': value}):
+                self.assertEqual(env_enabled('VCUT_TEST_FLAG'), enabled)
+
+    def test_unset(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('VCUT_TEST_FLAG', None)
+            self.assertFalse(env_enabled('VCUT_TEST_FLAG'))
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+
+from core.project_loader import ProjectLoader
+
+
+class ProjectLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def load(self, text: str, chunk_size: int) -> ProjectLoader:
+        with open(self.path, 'w', encoding='utf8') as f:
+            f.write(text)
+        loader = ProjectLoader(self.path)
+        loader.chunk_size = chunk_size
+        loader.load()
+        return loader
+
+    def test_syntax_error_stops_reading(self):
+        text = '{"src_filename": [1 2], "pad": "%s"}' % ('x' * (1 << 20))
+        loader = self.load(text, 1 << 12)
+        self.assertIsNone(loader.model_data)
+        self.assertEqual(loader.bytes_read, 1 << 12)
+
+    def test_values_split_at_every_chunk_boundary(self):
+        kv = {'src_filename': 'a.mp4', 'src_path_dir': 'src',
+              'dst_path_dir': 'dést', 'speed': 1.5e-3,
+              'note': [1.5e-3, True, None],
+              'intervals': [[[0, 0, 1], [0, 0, 2]], [[0, 1, 0], [1, 0, 0]]]}
+        text = json.dumps(kv)
+        for chunk_size in range(1, 24):
+            loader = self.load(text, chunk_size)
+            self.assertIsNotNone(loader.model_data, chunk_size)
+            self.assertEqual(list(loader.model_data.intervals_secs_iter()),
+                             [(1, 2), (60, 3600)])
+            self.assertEqual(loader.model_data.dst_path_dir, 'dést')
+
+
+if __name__ == '__main__':
+    unittest.main()
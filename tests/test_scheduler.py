@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from core import CutJob, DeviceScheduler, JobResult, Moment
+from core.scheduler import device_of
+
+
+def result(src_disk: str, dst_disk: str, secs: int) -> JobResult:
+    return JobResult(CutJob(0, Moment.from_secs(0), Moment.from_secs(secs),
+                            '/%s/src.mp4' % src_disk,
+                            '/%s/out/clip_0.mp4' % dst_disk))
+
+
+def disk_of(path: str) -> str:
+    # 以顶层目录模拟设备
+    return path.split('/')[1]
+
+
+def durations(results) -> list:
+    return [int(r.job.duration.to_secs()) for r in results]
+
+
+class DeviceSchedulerTest(unittest.TestCase):
+
+    def drain(self, scheduler: DeviceScheduler) -> list:
+        order = []
+        while True:
+            r = scheduler.acquire()
+            if r is None:
+                return order
+            order.append(r)
+            scheduler.release(r)
+
+    def test_longest_first_without_limit(self):
+        results = [result('a', 'a', 10), result('b', 'b', 30),
+                   result('a', 'a', 20), result('b', 'b', 30)]
+        order = self.drain(DeviceScheduler(results, device_of=disk_of))
+        self.assertEqual(durations(order), [30, 30, 20, 10])
+        # 时长相同的按原顺序
+        self.assertIs(order[0], results[1])
+
+    def test_limit_per_device_picks_another_disk(self):
+        results = [result('a', 'a', 30), result('a', 'a', 20),
+                   result('b', 'b', 10)]
+        scheduler = DeviceScheduler(results, per_device=1, device_of=disk_of)
+        self.assertIs(scheduler.acquire(), results[0])
+        # a已满，较短的b任务先开始
+        self.assertIs(scheduler.acquire(), results[2])
+        self.assertEqual(scheduler.running(), {'a': 1, 'b': 1})
+
+    def test_job_counts_against_source_and_destination(self):
+        results = [result('a', 'b', 30), result('b', 'b', 20),
+                   result('c', 'c', 10)]
+        scheduler = DeviceScheduler(results, per_device=1, device_of=disk_of)
+        self.assertIs(scheduler.acquire(), results[0])
+        self.assertIs(scheduler.acquire(), results[2])
+        self.assertEqual(scheduler.running(), {'a': 1, 'b': 1, 'c': 1})
+
+    def test_device_limit_overrides_per_device(self):
+        results = [result('a', 'a', 30), result('a', 'a', 20),
+                   result('b', 'b', 10), result('b', 'b', 5)]
+        scheduler = DeviceScheduler(results, per_device=1,
+                                    limits={'a': 2}, device_of=disk_of)
+        self.assertEqual(durations([scheduler.acquire() for _ in range(3)]),
+                         [30, 20, 10])
+        self.assertEqual(scheduler.running(), {'a': 2, 'b': 1})
+
+    def test_acquire_blocks_until_release(self):
+        results = [result('a', 'a', 30), result('a', 'a', 20)]
+        scheduler = DeviceScheduler(results, per_device=1, device_of=disk_of)
+        first = scheduler.acquire()
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(scheduler.acquire()))
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        scheduler.release(first)
+        thread.join(5)
+        self.assertEqual(acquired, [results[1]])
+        self.assertIsNone(scheduler.acquire())
+
+    def test_cancel_hands_out_remaining_without_limit(self):
+        results = [result('a', 'a', 30), result('a', 'a', 20),
+                   result('a', 'a', 10)]
+        scheduler = DeviceScheduler(results, per_device=1, device_of=disk_of)
+        scheduler.acquire()
+        waiting = []
+        thread = threading.Thread(
+            target=lambda: waiting.append(scheduler.acquire()))
+        thread.start()
+        thread.join(0.2)
+        scheduler.cancel()
+        thread.join(5)
+        self.assertEqual(durations(waiting), [20])
+        self.assertEqual(durations([scheduler.acquire()]), [10])
+        self.assertIsNone(scheduler.acquire())
+
+    def test_stats_each_directory_once(self):
+        calls = []
+
+        def counting(path):
+            calls.append(path)
+            return disk_of(path)
+
+        DeviceScheduler([result('a', 'b', 10), result('a', 'b', 20)],
+                        device_of=counting)
+        self.assertEqual(sorted(calls), ['/a', '/b/out'])
+
+
+class DeviceOfTest(unittest.TestCase):
+
+    def test_missing_path_uses_existing_parent(self):
+        root = tempfile.mkdtemp()
+        try:
+            self.assertEqual(device_of(os.path.join(root, 'x', 'y.mp4')),
+                             os.stat(root).st_dev)
+        finally:
+            os.rmdir(root)
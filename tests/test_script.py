@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from core import ConcatStage, ModelData, Moment, script_stages, write_script
+
+# 把-i之后的列表文件复制到输出，切割时创建空文件；FAIL_ON匹配输出时失败
+FAKE_FFMPEG = '''#!/usr/bin/env bash
+for last; do :; done
+case "$last" in *"$FAIL_ON"*) exit 1 ;; esac
+while [ $# -gt 1 ]; do
+    if [ "$1" = -i ] && [ "${2##*.}" = txt ]; then
+        exec cp -- "$2" "$last"
+    fi
+    shift
+done
+: >"$last"
+'''
+
+
+@unittest.skipIf(shutil.which('bash') is None, 'bash is not installed')
+class ScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.ffmpeg = os.path.join(self.root, 'ffmpeg')
+        with open(self.ffmpeg, 'w') as f:
+            f.write(FAKE_FFMPEG)
+        os.chmod(self.ffmpeg, 0o755)
+        data = ModelData()
+        data.src_path_dir = self.root
+        data.src_filename = 'clip.mp4'
+        data.dst_path_dir = os.path.join(self.root, 'out')
+        data.add_interval(Moment.from_secs(1), Moment.from_secs(2))
+        data.add_interval(Moment.from_secs(3), Moment.from_secs(4))
+        self.stage = ConcatStage(data,
+                                 scratch_dir=os.path.join(self.root, 's'))
+        self.script = os.path.join(self.root, 'run.sh')
+        stages, cleanup = script_stages([self.stage])
+        write_script(self.script, stages, ffmpeg=self.ffmpeg,
+                     cleanup=cleanup)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def run_script(self, fail_on: str) -> subprocess.CompletedProcess:
+        return subprocess.run(['bash', self.script],
+                              env=dict(os.environ, FAIL_ON=fail_on),
+                              stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def test_script_writes_directories_and_list_files(self):
+        # 导出时不写入任何文件
+        self.assertFalse(os.path.exists(self.stage.scratch_dir))
+        self.assertFalse(os.path.exists(os.path.dirname(
+            self.stage.dst_path)))
+        result = self.run_script('no such output')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('3/3 jobs succeeded', result.stderr)
+        with open(self.stage.dst_path, encoding='utf8') as f:
+            self.assertEqual(f.read().splitlines(),
+                             self.stage.concat_job().list_lines())
+        self.assertFalse(os.path.exists(self.stage.stage_dir))
+
+    def test_skipped_stage_counts_as_not_run(self):
+        result = self.run_script('clip_1.mp4')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('1/3 jobs succeeded, 1 failed, 1 not run',
+                      result.stderr)
+        # 再次运行时不沿用上次的状态文件
+        log_dir = os.path.join(self.root, 'run_logs')
+        with open(os.path.join(log_dir, '2.status'), 'w') as f:
+            f.write('0\n')
+        result = self.run_script('clip_1.mp4')
+        self.assertIn('1/3 jobs succeeded, 1 failed, 1 not run',
+                      result.stderr)
+        self.assertFalse(os.path.exists(os.path.join(log_dir, '2.status')))
+
+
+if __name__ == '__main__':
+    unittest.main()
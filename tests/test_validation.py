@@ -0,0 +1,139 @@
+import unittest
+from unittest import mock
+
+from core import ModelData, Moment
+from core import validation
+from core.validation import ValidationReport, check_intervals, \
+    interval_totals, validate_intervals
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+BIG_HOUR = validation._NUMPY_MAX_HOUR + 1
+
+# (名称, intervals)，每一项都与原先的schema + Moment检查比较
+FIXTURES = [
+    ('empty', []),
+    ('valid', [[[0, 0, 1], [0, 0, 2]], [[1, 59, 59], [2, 0, 0]]]),
+    ('zero length', [[[0, 1, 0], [0, 1, 0]]]),
+    ('begin after end', [[[0, 0, 2], [0, 0, 1]]]),
+    ('begin after end by an hour', [[[1, 0, 0], [0, 59, 59]]]),
+    ('negative hour', [[[-1, 0, 0], [0, 0, 1]]]),
+    ('negative minutes', [[[0, -1, 0], [0, 0, 1]]]),
+    ('negative seconds', [[[0, 0, 0], [0, 0, -1]]]),
+    ('60 minutes', [[[0, 60, 0], [1, 0, 0]]]),
+    ('60 seconds', [[[0, 0, 0], [0, 0, 60]]]),
+    ('59 minutes 59 seconds', [[[0, 59, 59], [0, 59, 59]]]),
+    ('bool', [[[0, 0, True], [0, 0, 2]]]),
+    ('false hour', [[[False, 0, 0], [0, 0, 2]]]),
+    ('integral float', [[[0, 0, 1.0], [0, 0, 2]]]),
+    ('fractional float', [[[0, 0, 1.5], [0, 0, 2]]]),
+    ('float after end', [[[0, 0, 3.0], [0, 0, 2]]]),
+    ('string', [[[0, 0, '1'], [0, 0, 2]]]),
+    ('null', [[[0, 0, None], [0, 0, 2]]]),
+    ('short moment', [[[0, 1], [0, 0, 2]]]),
+    ('long moment', [[[0, 0, 1, 0], [0, 0, 2]]]),
+    ('short interval', [[[0, 0, 1]]]),
+    ('long interval', [[[0, 0, 1], [0, 0, 2], [0, 0, 3]]]),
+    ('tuple moment', [[(0, 0, 1), [0, 0, 2]]]),
+    ('interval is a dict', [{'begin': [0, 0, 1]}]),
+    ('huge hour', [[[BIG_HOUR, 0, 0], [BIG_HOUR, 0, 1]]]),
+    ('huge hour after end', [[[BIG_HOUR, 0, 1], [BIG_HOUR, 0, 0]]]),
+    ('huge hour before a small one', [[[BIG_HOUR, 0, 0], [0, 0, 1]]]),
+    ('error after valid ones', [[[0, 0, 1], [0, 0, 2]]] * 3
+     + [[[0, 0, 2], [0, 0, 1]]]),
+]
+
+
+def legacy_validate(intervals: list) -> bool:
+    """The former check: the schema, then two ``Moment`` per interval"""
+    try:
+        ModelData._schema_validator().validate(
+            {'src_filename': '', 'src_path_dir': '', 'intervals': intervals})
+    except jsonschema.ValidationError:
+        return False
+    for begin, end in intervals:
+        begin, end = Moment.from_list(begin), Moment.from_list(end)
+        if begin is None or end is None or begin > end:
+            return False
+    return True
+
+
+def exact_validate(intervals: list) -> bool:
+    report = ValidationReport()
+    check_intervals(intervals, report)
+    return report.ok
+
+
+@unittest.skipIf(jsonschema is None, 'jsonschema is not installed')
+class EquivalenceTest(unittest.TestCase):
+    """Every path gives the answer of the former implementation"""
+
+    def assertPaths(self, intervals: list, expected: bool, name: str):
+        self.assertEqual(validate_intervals(intervals).ok, expected, name)
+        self.assertEqual(exact_validate(intervals), expected, name)
+        # 快速路径只对合法的纯int文档给出结果，其余交给逐个检查
+        totals = interval_totals(intervals)
+        if totals is not None:
+            self.assertTrue(expected, name)
+            self.assertEqual(totals, [
+                (moment[0] * 60 + moment[1]) * 60 + moment[2]
+                for interval in intervals for moment in interval], name)
+
+    def test_pure_python_path(self):
+        with mock.patch.object(validation, '_numpy', lambda: None):
+            for name, intervals in FIXTURES:
+                self.assertPaths(intervals, legacy_validate(intervals), name)
+
+    @unittest.skipIf(validation._numpy() is None, 'NumPy is not installed')
+    def test_numpy_path(self):
+        with mock.patch.object(validation, '_NUMPY_MIN_SIZE', 0):
+            for name, intervals in FIXTURES:
+                self.assertPaths(intervals, legacy_validate(intervals), name)
+
+    def test_pure_int_fixtures_give_a_flat_answer(self):
+        # 纯int文档不应退回逐个检查，合法时必须得到秒数
+        for name, intervals in FIXTURES:
+            flat = validation._flatten(intervals)
+            if flat is not None and legacy_validate(intervals):
+                self.assertIsNotNone(interval_totals(intervals), name)
+
+    def test_report_names_offending_intervals(self):
+        intervals = [[[0, 0, 1], [0, 0, 2]], [[0, 0, 2], [0, 0, 1]],
+                     [[0, 60, 0], [1, 0, 0]], [[0, 0, True], [0, 0, 1]]]
+        self.assertEqual(validate_intervals(intervals).errors, [
+            (1, 'begin is after end'),
+            (2, 'begin: out of range'),
+            (3, 'begin: expected integers'),
+        ])
+        self.assertEqual(validate_intervals(intervals, 2).indices, [1, 2])
+        self.assertEqual(validate_intervals({}).errors,
+                         [(-1, 'intervals: expected an array')])
+
+
+class FromJsonTest(unittest.TestCase):
+
+    def test_valid_document(self):
+        model_data = ModelData.from_json(
+            '{"src_filename": "a", "src_path_dir": "b", '
+            '"intervals": [[[0, 0, 1], [0, 0, 2]]]}')
+        self.assertEqual(list(model_data.intervals_secs_iter()), [(1, 2)])
+
+    def test_syntax_error_is_reported(self):
+        report = ValidationReport()
+        self.assertIsNone(ModelData.from_json('{"src_filename": ', report=report))
+        self.assertEqual(len(report.errors), 1)
+        self.assertTrue(report.errors[0][1].startswith('invalid JSON: '))
+
+    def test_invalid_document_is_reported(self):
+        report = ValidationReport()
+        self.assertIsNone(ModelData.from_json(
+            '{"src_filename": "a", "src_path_dir": "b", '
+            '"intervals": [[[0, 0, 2], [0, 0, 1]]]}', report=report))
+        self.assertEqual(report.errors, [(0, 'begin is after end')])
+
+
+if __name__ == '__main__':
+    unittest.main()
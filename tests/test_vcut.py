@@ -0,0 +1,90 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from core import ModelData, Moment
+from core.vcut import VCUT_MAGIC, VCUT_VERSION, dump_vcut, load_vcut
+
+from tests.test_model_data import model_data
+
+
+class VcutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'project.vcut')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def project(self) -> ModelData:
+        data = model_data(5)
+        data.src_path_dir = '/视频/源'
+        data.src_filename = 'clip.mp4'
+        data.dst_path_dir = '/out'
+        data.add_interval(Moment.from_secs(7), Moment.from_secs(7))
+        return data
+
+    def dumped(self) -> bytes:
+        dump_vcut(self.project(), self.path)
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def assert_invalid(self, content: bytes, message: str = '') -> None:
+        with open(self.path, 'wb') as f:
+            f.write(content)
+        with self.assertRaisesRegex(ValueError, message):
+            load_vcut(self.path)
+
+    def test_round_trip(self):
+        data = self.project()
+        dump_vcut(data, self.path)
+        loaded = load_vcut(self.path)
+        self.assertEqual(loaded.to_arrays(), data.to_arrays())
+        self.assertEqual(loaded.to_dict(), data.to_dict())
+
+    def test_round_trip_without_intervals(self):
+        data = ModelData()
+        data.src_filename = 'clip.mp4'
+        dump_vcut(data, self.path)
+        self.assertEqual(load_vcut(self.path).to_dict(), data.to_dict())
+
+    def test_truncated(self):
+        content = self.dumped()
+        for size in range(len(content)):
+            with self.subTest(size=size):
+                self.assert_invalid(content[:size])
+
+    def test_trailing_bytes(self):
+        self.assert_invalid(self.dumped() + b'\0' * 8)
+
+    def test_wrong_magic(self):
+        content = self.dumped()
+        self.assert_invalid(b'VCUTPRJ2' + content[len(VCUT_MAGIC):],
+                            'not a')
+        self.assert_invalid(b'{"intervals": []}'.ljust(len(content)),
+                            'not a')
+
+    def test_wrong_version(self):
+        content = self.dumped()
+        version = struct.pack('<H', VCUT_VERSION + 1)
+        self.assert_invalid(content[:8] + version + content[10:], 'version')
+
+    def test_corrupted_string_table(self):
+        content = self.dumped()
+        # 第一个条目的类型和键长度
+        self.assert_invalid(content[:32] + b'\x07' + content[33:])
+        self.assert_invalid(content[:33] + b'\xff\xff\xff\x7f'
+                            + content[37:])
+        # 条目数超出字符串区
+        self.assert_invalid(content[:12] + struct.pack('<I', 1 << 20)
+                            + content[16:])
+
+    def test_invalid_intervals(self):
+        data = self.project()
+        data.add_interval(Moment.from_secs(3), Moment.from_secs(2))
+        dump_vcut(data, self.path)
+        with self.assertRaises(ValueError):
+            load_vcut(self.path)
@@ -1,9 +1,13 @@
+import os
+
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QLabel
 
 
 class FileDropLabel(QLabel):
     changeFile = pyqtSignal(str)
+    # 拖入多个文件或目录时发出，参数为本地路径列表
+    changeFiles = pyqtSignal(list)
 
     def __init__(self, *__args):
         super().__init__(*__args)
@@ -13,6 +17,8 @@ class FileDropLabel(QLabel):
             event.acceptProposedAction()
 
     def dropEvent(self, event):
-        urls = event.mimeData().urls()
-        if len(urls):
-            self.changeFile.emit(urls[0].toLocalFile())
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        if len(paths) == 1 and not os.path.isdir(paths[0]):
+            self.changeFile.emit(paths[0])
+        elif len(paths):
+            self.changeFiles.emit(paths)
@@ -1,14 +1,26 @@
 import os
-from typing import Iterable
-
-from PyQt5.QtCore import Qt, pyqtSlot, QDir, QModelIndex
-from PyQt5.QtWidgets import QMainWindow, QMessageBox, QFileDialog
-from pymediainfo import MediaInfo
-
-from core import Moment, ModelData
-from ui import DurationsListModel
+from typing import Iterable, Optional
+
+from PyQt5.QtCore import Qt, pyqtSlot, QModelIndex, QThreadPool
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QFileDialog, QInputDialog, \
+    QLabel, QProgressDialog
+
+from core import Moment, ModelData, CommandBuilder, JobResult, MediaMetaCache, \
+    ProjectLoader, save_project, ConcatStage, BatchProject, ingest, \
+    load_batch, save_batch, profiler, timed, script_stages, write_script, \
+    JobJournal, journal_path, OutputCache
+from core.batch import BATCH_EXT, PROJECT_EXTS, is_batch_path, \
+    output_collisions, collision_message
+from core.command import MODE_PER_INTERVAL, MODE_MULTI_OUTPUT, format_moment
+from core.executor import JOB_FAILED, JOB_SKIPPED, JOB_CACHED
+from ui import DurationsListModel, JobRunner, ProbeTask, ProbeResult, \
+    CommandOutputRenderer, RefreshScheduler, LoadTask, ProfileDialog, \
+    stats_summary
 from ui.layout.Ui_MainWindow import Ui_MainWindow
 
+PROJECT_FILTER = "JSON File (*.json);;Binary Project (*.vcut)"
+BATCH_FILTER = "Batch Project (*%s)" % BATCH_EXT
+
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
@@ -18,17 +30,54 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self._model = DurationsListModel(ModelData(),
                                          self.tabv_intervals)
         self._json_path = None
+        self._workers = 4
+        self._per_device = 0
+        self._meta_cache = MediaMetaCache()
+        self._probe_pool = QThreadPool(self)
+        self._probe_pool.setMaxThreadCount(2)
+        self._probe_generation = 0
+        self._batch = None  # type: BatchProject
+        self._batch_generation = 0
+        self._batch_probed = 0
+        self._job_runner = JobRunner(self)
+        self._output = CommandOutputRenderer(self.txtbrw_output)
+        self._load_task = None
+        self._load_dialog = None
+        self._scratch_dir = None
+        self._profile_dialog = None
+        self._concat_stages = None
+        self._concat_results = None
+        self._output_cache = None  # type: OutputCache
+        self._refresh = RefreshScheduler(self, interval=20)
+        self._refresh.register('source', self.update_source)
+        self._refresh.register('output', self.update_output)
+        self._refresh.register('output_rows', self._output.flush)
+        self._refresh.register('overlap', self.update_overlap)
+        self._refresh.register('savings', self.update_savings)
+        self.lbl_savings = QLabel(self.statusBar)
+        self.statusBar.addPermanentWidget(self.lbl_savings)
+        self.lbl_overlap = QLabel(self.statusBar)
+        self.statusBar.addPermanentWidget(self.lbl_overlap)
+        self.lbl_refresh = QLabel(self.statusBar)
+        self.statusBar.addPermanentWidget(self.lbl_refresh)
         self.tabv_intervals.setModel(self._model)
 
         self.lbl_file_drop.changeFile.connect(
             self.on_lbl_file_drop_change_file
         )
+        self.lbl_file_drop.changeFiles.connect(
+            self.on_lbl_file_drop_change_files
+        )
         self._model.dataChanged.connect(self.on_model_data_changed)
         self._model.rowsInserted.connect(self.on_model_rows_inserted)
         self._model.rowsMoved.connect(self.on_model_rows_moved)
         self._model.rowsRemoved.connect(self.on_model_rows_removed)
         self._model.modelReset.connect(self.on_model_model_reset)
+        self._job_runner.jobFinished.connect(self.on_job_runner_job_finished)
+        self._job_runner.finished.connect(self.on_job_runner_finished)
+        self._refresh.flushed.connect(self.on_refresh_flushed)
 
+        self.__set_batch(None)
         self.update_source()
         self.update_output()
 
@@ -40,36 +89,174 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.spin_interval_end_mins.setValue(0)
         self.spin_interval_end_secs.setValue(0)
 
+    def __command_builder(self, model_data: ModelData = None) \
+            -> CommandBuilder:
+        return CommandBuilder(
+            model_data or self._model.model_data,
+            MODE_MULTI_OUTPUT
+            if self.act_setting_multi_output.isChecked()
+            else MODE_PER_INTERVAL
+        )
+
+    def __concat_stage(self, model_data: ModelData = None) -> ConcatStage:
+        return ConcatStage(
+            model_data or self._model.model_data,
+            MODE_MULTI_OUTPUT
+            if self.act_setting_multi_output.isChecked()
+            else MODE_PER_INTERVAL,
+            scratch_dir=self._scratch_dir
+        )
+
+    def __sources(self) -> Iterable[ModelData]:
+        return self._batch.sources if self._batch is not None \
+            else [self._model.model_data]
+
+    def __set_batch(self, batch: Optional[BatchProject], current: int = 0):
+        # 批量项目中的源通过下拉框切换，编辑区始终只显示一个源
+        self._batch = batch
+        self._batch_generation += 1
+        self._batch_probed = 0
+        self.lbl_source.setVisible(batch is not None)
+        self.cbox_source.setVisible(batch is not None)
+        self.cbox_source.blockSignals(True)
+        self.cbox_source.clear()
+        if batch is not None:
+            self.cbox_source.addItems([source.src_filename
+                                       for source in batch.sources])
+            self.cbox_source.setCurrentIndex(current)
+        self.cbox_source.blockSignals(False)
+        if batch is not None:
+            self.on_cbox_source_current_index_changed(current)
+
+    def __probe_batch(self, sources: Iterable[ModelData]):
+        # 元数据在线程池中并发探测，结果写入缓存，切换源时直接命中
+        for source in sources:
+            task = ProbeTask(self._batch_generation,
+                             os.path.join(source.src_path_dir,
+                                          source.src_filename),
+                             self._meta_cache,
+                             is_current=self.__is_current_batch)
+            task.signals.finished.connect(self.on_batch_probe_finished)
+            self._probe_pool.start(task)
+
+    def __is_current_batch(self, generation: int) -> bool:
+        return generation == self._batch_generation
+
+    def __show_model_data(self, model_data: ModelData):
+        self._model.set_model_data(model_data)
+        self.ledt_src_filename.setText(self._model.src_filename)
+        self.ledt_src_path_dir.setText(self._model.src_path_dir)
+        self.ledt_dst_path_dir.setText(self._model.dst_path_dir)
+        self.txtbrw_output.clear()
+        self.txtbrw_source.clear()
+        self.__clear_add_interval()
+
+        self.refresh_src_meta()
+        self._refresh.mark('output')
+        self.__mark_intervals_changed()
+
+    def __output_builder(self):
+        return self.__concat_stage() \
+            if self.act_setting_concat.isChecked() \
+            else self.__command_builder()
+
+    def __save_project(self, path: str):
+        indent = 4 if self.act_setting_format.isChecked() else None
+        if self._batch is not None:
+            save_batch(self._batch, path, indent=indent)
+        else:
+            save_project(self._model.model_data, path, indent=indent)
+
+    def __is_current_probe(self, generation: int) -> bool:
+        return generation == self._probe_generation
+
+    def __mark_intervals_changed(self):
+        self._refresh.mark('source')
+        self._refresh.mark('overlap')
+        self._refresh.mark('savings')
+
+    def __update_output_rows(self, method, *args):
+        # 已有待执行的整体刷新时，逐行更新没有意义
+        if not self._refresh.is_pending('output'):
+            method(*args)
+            # 行号变化的部分推迟到下次刷新时统一重排
+            if self._output.pending:
+                self._refresh.mark('output_rows')
+
     @pyqtSlot(name='on_tbtn_src_meta_refresh_clicked')
+    @timed()
     def refresh_src_meta(self):
         src_path = os.path.join(self._model.src_path_dir,
                                 self._model.src_filename)
-        try:
-            stat = os.stat(src_path)
-            media_info = MediaInfo.parse(src_path)
-            if media_info is not None and len(media_info.tracks):
-                # Warning: Maybe track 0 is not a video track
-                self.spin_src_duration.setValue(media_info.tracks[0].duration)
-            size_src = stat.st_size
-            self.spin_src_size.setValue(size_src)
-
-            duration_src = self.spin_src_duration.value()
-            duration_dst = 0
-            for interval in self._model.iter_intervals():
-                begin, end = interval
-                delta = Moment.from_list(end) - Moment.from_list(begin)
-                duration_dst += delta.to_secs() * 1000
+        # 探测在线程池中进行，递增代数使尚未返回的旧结果失效
+        self._probe_generation += 1
+        self._model.set_keyframe_index(None)
+        task = ProbeTask(self._probe_generation, src_path, self._meta_cache,
+                         keyframes=self.act_setting_keyframes.isChecked(),
+                         is_current=self.__is_current_probe)
+        task.signals.finished.connect(self.on_probe_finished)
+        self._probe_pool.start(task)
+
+    def closeEvent(self, event):
+        # 探测结果只在内存中累积，退出前写入缓存文件
+        self._meta_cache.flush()
+        super(MainWindow, self).closeEvent(event)
+
+    @pyqtSlot(int, object)
+    @timed()
+    def on_probe_finished(self, generation: int, result: ProbeResult):
+        if generation != self._probe_generation:
+            return
+        if result.keyframe_index is not None:
+            self._model.set_keyframe_index(result.keyframe_index)
+        elif result.keyframe_error is not None:
+            self.statusBar.showMessage("读取关键帧失败：请确认ffprobe可用且文件存在")
+        meta = result.meta
+        if meta is None:
+            return
+        if meta.duration is not None:
+            self.spin_src_duration.setValue(meta.duration)
+        self.spin_src_size.setValue(meta.size)
+        self.grp_meta.setToolTip("元数据缓存：命中 %d 次，未命中 %d 次"
+                                 % (self._meta_cache.hits,
+                                    self._meta_cache.misses))
+        self.update_savings()
+
+    @timed()
+    def update_savings(self):
+        # 统计量由ModelData随每次修改增量维护，这里不再遍历时间段
+        stats = self._model.model_data.interval_stats()
+        texts = []
+        if stats.count:
+            texts.append("保留：%s（去重 %s），最长：%s，最短：%s"
+                         % tuple(format_moment(Moment.from_secs(secs))
+                                 for secs in (stats.total, stats.union,
+                                              stats.longest, stats.shortest)))
+        duration_src = self.spin_src_duration.value()
+        size_src = self.spin_src_size.value()
+        if duration_src > 0:
+            duration_dst = stats.total * 1000
             save_rate = 1.0 - duration_dst / duration_src
             save_time = Moment.from_secs((duration_src - duration_dst) // 1000)
-            self.statusBar \
-                .showMessage("删减时长：%02d:%02d:%02d，节约率：%.2f %%，估计可节省空间：%.2f MiB"
-                             % (save_time.hour, save_time.mins, save_time.secs,
-                                save_rate * 100.0,
-                                (size_src * save_rate) / 1048576))
-        except OSError:
-            pass
+            texts.append("删减时长：%02d:%02d:%02d，节约率：%.2f %%，估计可节省空间：%.2f MiB"
+                         % (save_time.hour, save_time.mins, save_time.secs,
+                            save_rate * 100.0,
+                            (size_src * save_rate) / 1048576))
+        self.lbl_savings.setText("；".join(texts))
+
+    @timed()
+    def update_overlap(self):
+        interval_index = self._model.model_data.interval_index()
+        overlap = interval_index.overlap_length
+        self.lbl_overlap.setText(
+            "重叠：%02d:%02d:%02d" % (overlap // 3600, overlap // 60 % 60,
+                                    overlap % 60)
+            if overlap else ""
+        )
+        self.lbl_overlap.setToolTip("重复剪辑的总时长，可使用“合并”消除")
 
     @pyqtSlot(name='on_tbtn_refresh_source_clicked')
+    @timed()
     def update_source(self):
         self.txtbrw_source.setText(
             self._model.export_to_json(indent=4)
@@ -78,58 +265,81 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         )
 
     @pyqtSlot(name='on_tbtn_refresh_commands_clicked')
+    @timed()
     def update_output(self):
-        src_filename = self._model.src_filename
-        src_path_dir = self._model.src_path_dir
-        src_path = QDir.toNativeSeparators(
-            os.path.join(src_path_dir, src_filename)
-        )
-        dst_path_dir = QDir.toNativeSeparators(self._model.dst_path_dir)
-        dst_prefix, dst_suffix = os.path.splitext(src_filename)
-        cmd = 'ffmpeg -ss %02d:%02d:%02d -t %02d:%02d:%02d ' \
-              '-i %s ' \
-              '-vcodec copy -acodec copy ' \
-              '%s'
-
-        self.txtbrw_output.clear()
-
-        for index, interval in enumerate(self._model.iter_intervals()):
-            begin, end = interval
-            begin = Moment(begin[0], begin[1], begin[2])
-            end = Moment(end[0], end[1], end[2])
-            delta = end - begin
-            self.txtbrw_output.append(cmd % (
-                begin.hour, begin.mins, begin.secs,
-                delta.hour, delta.mins, delta.secs,
-                src_path,
-                os.path.join(
-                    dst_path_dir,
-                    '%s_%d%s' % (dst_prefix,
-                                 index,
-                                 dst_suffix)
-                )
-            ))
-
-    def open_json(self, json_path: str) -> bool:
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf8') as f:
-                if self._model.import_from_json(f.read()):
-                    self.ledt_src_filename.setText(self._model.src_filename)
-                    self.ledt_src_path_dir.setText(self._model.src_path_dir)
-                    self.ledt_dst_path_dir.setText(self._model.dst_path_dir)
-                    self.txtbrw_output.clear()
-                    self.txtbrw_source.clear()
-                    self.__clear_add_interval()
-
-                    self._json_path = json_path
+        self._output.reset(self.__output_builder())
+
+    def open_json(self, json_path: str):
+        """Load a project on a pool thread, see on_load_finished"""
+        if self._load_task is not None:
+            return
+        task = LoadTask(json_path)
+        task.signals.finished.connect(self.on_load_finished)
+        # 读取较快时不会弹出进度对话框
+        dialog = QProgressDialog("正在读取：%s" % json_path, "取消",
+                                 0, 1000, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(task.cancel)
+        task.signals.progress.connect(dialog.setValue)
+        self._load_task, self._load_dialog = task, dialog
+        QThreadPool.globalInstance().start(task)
+
+    @pyqtSlot(object)
+    @timed()
+    def on_load_finished(self, loader: ProjectLoader):
+        self._load_dialog.deleteLater()
+        self._load_task, self._load_dialog = None, None
+        if loader.model_data is None:
+            if loader.cancelled:
+                self.statusBar.showMessage("已取消读取：%s" % loader.path)
+            else:
+                self.statusBar \
+                    .showMessage("解析配置时出错：%s" % loader.report)
+            return
 
-                    self.refresh_src_meta()
-                    self.update_output()
-                    self.update_source()
+        self.__set_batch(None)
+        self.__show_model_data(loader.model_data)
+        self._json_path = loader.path
+        self.statusBar.showMessage("解析配置已成功：%s" % loader.path)
 
-                    return True
-                else:
-                    return False
+    def open_batch(self, path: str):
+        try:
+            batch = load_batch(path, max_errors=5)
+        except (OSError, ValueError) as e:
+            self.statusBar.showMessage("解析配置时出错：%s" % e)
+            return
+        if not len(batch):
+            self.statusBar.showMessage("批量项目中没有源文件：%s" % path)
+            return
+        collisions = output_collisions(batch.sources)
+        if collisions:
+            QMessageBox.warning(self, "输出文件冲突",
+                                "\n".join(collision_message(batch.sources,
+                                                             first, other)
+                                          for first, other in collisions))
+        self.__set_batch(batch)
+        self._json_path = path
+        self.__probe_batch(batch.sources)
+        self.statusBar.showMessage("解析配置已成功：%s（%d 个源文件）"
+                                   % (path, len(batch)))
+
+    @pyqtSlot(int, object)
+    def on_batch_probe_finished(self, generation: int, result: ProbeResult):
+        if generation != self._batch_generation:
+            return
+        self._batch_probed += 1
+        self.statusBar.showMessage("探测元数据：%d/%d"
+                                   % (self._batch_probed, len(self._batch)))
+        if self._batch_probed == len(self._batch):
+            self._meta_cache.flush()
+
+    @pyqtSlot(int, name='on_cbox_source_currentIndexChanged')
+    @timed()
+    def on_cbox_source_current_index_changed(self, index: int):
+        if self._batch is not None and 0 <= index < len(self._batch):
+            self.__show_model_data(self._batch.sources[index])
 
     @pyqtSlot()
     def on_act_file_new_triggered(self):
@@ -141,28 +351,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.txtbrw_output.clear()
         self.txtbrw_source.clear()
 
+        self.__set_batch(None)
         self._model.reset_data()
         self.__clear_add_interval()
 
         self._json_path = None
 
-        self.update_output()
-        self.update_source()
+        self._refresh.mark('output')
+        self.__mark_intervals_changed()
 
     @pyqtSlot()
     def on_act_file_open_triggered(self):
         json_path, _ = QFileDialog.getOpenFileName(
             parent=self,
             caption="打开JSON文件",
-            filter="JSON File (*.json)"
+            filter=PROJECT_FILTER + ";;" + BATCH_FILTER
         )
         if len(json_path):
-            if self.open_json(json_path):
-                self.statusBar \
-                    .showMessage("解析配置已成功：%s" % json_path)
+            if is_batch_path(json_path):
+                self.open_batch(json_path)
             else:
-                self.statusBar \
-                    .showMessage("解析配置时出错：JSON解析出错或者存在不合法的参数")
+                self.open_json(json_path)
 
     @pyqtSlot()
     def on_act_file_save_triggered(self):
@@ -170,14 +379,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.on_act_file_save_as_triggered()
         else:
             try:
-                with open(self._json_path, 'w', encoding='utf8') as f:
-                    f.write(
-                        self._model.export_to_json(indent=4)
-                        if self.act_setting_format.isChecked()
-                        else self._model.export_to_json()
-                    )
-                    self.statusBar \
-                        .showMessage("保存成功：%s" % self._json_path)
+                self.__save_project(self._json_path)
+                self.statusBar \
+                    .showMessage("保存成功：%s" % self._json_path)
             except IOError:
                 QMessageBox.critical(
                     parent=self,
@@ -187,26 +391,24 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     @pyqtSlot()
     def on_act_file_save_as_triggered(self):
-        json_path, _ = QFileDialog.getSaveFileName(
+        json_path, selected_filter = QFileDialog.getSaveFileName(
             parent=self,
             caption="另存为",
             directory=os.path.join(
                 self._model.src_path_dir,
                 os.path.splitext(self._model.src_filename)[0]
             ),
-            filter="JSON File (*.json)"
+            filter=BATCH_FILTER if self._batch is not None else PROJECT_FILTER
         )
         if len(json_path):
+            if not os.path.splitext(json_path)[1]:
+                json_path += BATCH_EXT if self._batch is not None \
+                    else '.vcut' if '.vcut' in selected_filter else '.json'
             try:
-                with open(json_path, 'w', encoding='utf8') as f:
-                    f.write(
-                        self._model.export_to_json(indent=4)
-                        if self.act_setting_format.isChecked()
-                        else self._model.export_to_json()
-                    )
-                    self._json_path = json_path
-                    self.statusBar \
-                        .showMessage("另存为成功：%s" % self._json_path)
+                self.__save_project(json_path)
+                self._json_path = json_path
+                self.statusBar \
+                    .showMessage("另存为成功：%s" % self._json_path)
             except IOError:
                 QMessageBox.critical(
                     parent=self,
@@ -216,6 +418,205 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 )
 
     @pyqtSlot()
+    def on_act_file_export_script_triggered(self):
+        if self.act_setting_concat.isChecked():
+            builders = [self.__concat_stage(source)
+                        for source in self.__sources()]
+        else:
+            builders = [self.__command_builder(source)
+                        for source in self.__sources()]
+        stages, cleanup = script_stages(builders)
+        if not any(stages):
+            self.statusBar.showMessage("没有需要运行的命令")
+            return
+        script_path, _ = QFileDialog.getSaveFileName(
+            parent=self,
+            caption="导出脚本",
+            directory=os.path.join(
+                self._model.dst_path_dir,
+                os.path.splitext(self._model.src_filename)[0] + '.sh'
+            ),
+            filter="Shell Script (*.sh)"
+        )
+        if not len(script_path):
+            return
+        try:
+            write_script(script_path, stages, jobs=self._workers,
+                         cleanup=cleanup)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
+            return
+        self.statusBar.showMessage("已导出脚本：%s（%d 个任务）"
+                                   % (script_path, sum(map(len, stages))))
+
+    @pyqtSlot()
+    def on_act_task_run_triggered(self):
+        if self._job_runner.is_running():
+            return
+        # 批量项目中所有源的任务放在同一个列表中统一调度
+        if self.act_setting_concat.isChecked():
+            stages = [self.__concat_stage(source)
+                      for source in self.__sources()
+                      if source.intervals_size()]
+            jobs = [job for stage in stages for job in stage.cut_jobs()]
+        else:
+            stages = None
+            jobs = [job for source in self.__sources()
+                    for job in self.__command_builder(source).jobs()]
+        if not jobs:
+            self.statusBar.showMessage("没有需要运行的命令")
+            return
+        if stages is not None:
+            try:
+                for stage in stages:
+                    stage.prepare()
+            except OSError as e:
+                QMessageBox.warning(self, "运行失败",
+                                    "无法写入临时目录：%s" % e)
+                return
+            self._concat_stages = stages
+            self._concat_results = None
+        # 已保存的项目在旁边记录任务日志，再次运行时跳过已完成的任务
+        journal = None
+        if stages is None and self._json_path is not None:
+            journal = JobJournal(journal_path(self._json_path))
+        if self.act_setting_cache.isChecked() and self._output_cache is None:
+            try:
+                self._output_cache = OutputCache()
+            except OSError as e:
+                self.statusBar.showMessage("无法使用片段缓存：%s" % e)
+        # 临时目录中的残留文件总是覆盖
+        self._job_runner.start(jobs, workers=self._workers,
+                               overwrite=stages is not None,
+                               per_device=self._per_device,
+                               journal=journal,
+                               output_cache=self._output_cache
+                               if self.act_setting_cache.isChecked()
+                               else None)
+        self.act_task_run.setEnabled(False)
+        self.act_task_cancel.setEnabled(True)
+        self.statusBar.showMessage("运行中：0/%d" % len(jobs))
+
+    @pyqtSlot()
+    def on_act_task_cancel_triggered(self):
+        self._job_runner.cancel()
+
+    @pyqtSlot()
+    def on_act_setting_workers_triggered(self):
+        workers, ok = QInputDialog.getInt(self, "并行任务数",
+                                          "同时运行的ffmpeg进程数：",
+                                          self._workers, 1, 64)
+        if ok:
+            self._workers = workers
+
+    @pyqtSlot()
+    def on_act_setting_per_device_triggered(self):
+        # 源与输出所在的磁盘都计数，0表示不限制
+        per_device, ok = QInputDialog.getInt(self, "每个磁盘并行数",
+                                             "同一磁盘上同时运行的进程数"
+                                             "（0为不限制）：",
+                                             self._per_device, 0, 64)
+        if ok:
+            self._per_device = per_device
+
+    @pyqtSlot()
+    def on_act_setting_scratch_triggered(self):
+        path = QFileDialog.getExistingDirectory(
+            self, "临时目录",
+            self._scratch_dir or self._model.dst_path_dir
+        )
+        if path:
+            self._scratch_dir = path
+            self.update_output()
+
+    @pyqtSlot(bool)
+    def on_act_setting_multi_output_toggled(self, checked: bool):
+        self.update_output()
+
+    @pyqtSlot(bool)
+    def on_act_setting_concat_toggled(self, checked: bool):
+        self.update_output()
+
+    @pyqtSlot(bool)
+    def on_act_setting_keyframes_toggled(self, checked: bool):
+        self.refresh_src_meta()
+
+    @pyqtSlot()
+    def on_act_setting_profile_triggered(self):
+        if self._profile_dialog is None:
+            self._profile_dialog = ProfileDialog(profiler, self)
+        self._profile_dialog.show()
+        self._profile_dialog.raise_()
+
+    @pyqtSlot(int)
+    def on_refresh_flushed(self, coalesced: int):
+        self.lbl_refresh.setText("刷新 %d 次（合并 %d 次请求）"
+                                 % (self._refresh.refreshes,
+                                    self._refresh.coalesced))
+        if profiler.enabled:
+            self.lbl_refresh.setToolTip(stats_summary(profiler.stats()))
+
+    @pyqtSlot(object)
+    def on_job_runner_job_finished(self, result: JobResult):
+        self.statusBar.showMessage("运行中：%s [%s]"
+                                   % (result.job.dst_path, result.status))
+
+    @pyqtSlot(list)
+    def on_job_runner_finished(self, results: list):
+        stages = self._concat_stages
+        if stages is not None:
+            if self._concat_results is None \
+                    and all(result.ok for result in results):
+                # 切割全部成功后再合并，合并时不覆盖已有的输出文件
+                self._concat_results = results
+                self._job_runner.start([stage.concat_job()
+                                        for stage in stages],
+                                       workers=self._workers)
+                self.statusBar.showMessage("合并中：%d 个文件" % len(stages))
+                return
+            results = (self._concat_results or []) + results
+            reports = [stage.io_report() for stage in stages]
+            for stage in stages:
+                stage.cleanup()
+            self._concat_stages = None
+            self._concat_results = None
+        self.act_task_run.setEnabled(True)
+        self.act_task_cancel.setEnabled(False)
+        if self._output_cache is not None:
+            try:
+                self._output_cache.save_index()
+            except OSError:
+                pass
+        failed = [result for result in results
+                  if result.status == JOB_FAILED]
+        done = sum(1 for result in results if result.ok)
+        skipped = sum(1 for result in results
+                      if result.status == JOB_SKIPPED)
+        cached = sum(1 for result in results
+                     if result.status == JOB_CACHED)
+        message = "运行结束：成功 %d，失败 %d，取消 %d" \
+                  % (done, len(failed), len(results) - done - len(failed))
+        if skipped:
+            message += "（%d 个此前已完成）" % skipped
+        if cached:
+            message += "（%d 个取自缓存）" % cached
+        if stages is not None:
+            message += "；读写 %.1f MiB（中间文件 %.1f MiB），" \
+                       "重编码约 %.1f MiB" \
+                       % (sum(r.copy_bytes for r in reports) / 1048576,
+                          sum(r.part_bytes for r in reports) / 1048576,
+                          sum(r.reencode_bytes for r in reports) / 1048576)
+        self.statusBar.showMessage(message)
+        if failed:
+            QMessageBox.warning(
+                self, "运行失败",
+                "\n".join("%s (exit %s)" % (result.job.dst_path,
+                                             result.returncode)
+                           for result in failed)
+            )
+
+    @pyqtSlot()
+    @timed()
     def on_pbtn_add_interval_clicked(self):
         begin = Moment.from_args(
             self.spin_interval_begin_hour.value(),
@@ -236,29 +637,36 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.critical(None, "错误", "添加的时间段存在错误", QMessageBox.Ok)
 
     @pyqtSlot()
+    @timed()
     def on_tbtn_move_up_clicked(self):
         rows = set((index.row()
                     for index in self.tabv_intervals.selectedIndexes()))
-        for row in sorted(rows):
-            self._model.move_interval(row, -1)
+        self._model.move_intervals(rows, -1)
 
     @pyqtSlot()
+    @timed()
     def on_tbtn_move_down_clicked(self):
         rows = set((index.row()
                     for index in self.tabv_intervals.selectedIndexes()))
-        for row in sorted(rows, reverse=True):
-            self._model.move_interval(row, 1)
+        self._model.move_intervals(rows, 1)
 
     @pyqtSlot()
+    @timed()
     def on_tbtn_remove_clicked(self):
         self.tabv_intervals.setUpdatesEnabled(False)
         rows = set((index.row()
                     for index in self.tabv_intervals.selectedIndexes()))
-        for row in sorted(rows, reverse=True):
-            self._model.removeRow(row)
+        self._model.remove_intervals(rows)
         self.tabv_intervals.setUpdatesEnabled(True)
 
     @pyqtSlot()
+    @timed()
+    def on_tbtn_merge_clicked(self):
+        removed = self._model.merge_overlapping()
+        self.statusBar.showMessage("合并完成：减少了%d个时间段" % removed)
+
+    @pyqtSlot()
+    @timed()
     def on_tbtn_clear_clicked(self):
         self.tabv_intervals.setUpdatesEnabled(False)
         self._model.clear_intervals()
@@ -303,21 +711,44 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     @pyqtSlot(str)
     def on_lbl_file_drop_change_file(self, url):
         path_dir, filename = os.path.split(url)
-        if os.path.splitext(filename)[-1] == '.json':
-            if self.open_json(url):
-                self.statusBar \
-                    .showMessage("解析配置已成功：%s" % url)
-            else:
-                self.statusBar \
-                    .showMessage("解析配置时出错：JSON解析出错或者存在不合法的参数")
+        if is_batch_path(filename):
+            self.open_batch(url)
+        elif os.path.splitext(filename)[-1].lower() in PROJECT_EXTS:
+            self.open_json(url)
         else:
             self.ledt_src_path_dir.setText(path_dir)
             self.ledt_src_filename.setText(filename)
             self.refresh_src_meta()
-            self.update_source()
-            self.update_output()
+            self.__mark_intervals_changed()
+            self._refresh.mark('output')
+
+    @timed()
+    def on_lbl_file_drop_change_files(self, paths: list):
+        batch = self._batch
+        if batch is None:
+            batch = BatchProject(dst_path_dir=self._model.dst_path_dir)
+            # 正在编辑的源作为批量项目中的第一个源
+            model_data = self._model.model_data
+            if model_data.src_filename or model_data.intervals_size():
+                batch.sources.append(model_data)
+        count = len(batch)
+        batch, failures = ingest(paths, batch,
+                                 dst_path_dir=self._model.dst_path_dir or None)
+        if failures:
+            QMessageBox.warning(self, "部分文件无法导入",
+                                "\n".join("%s: %s" % failure
+                                          for failure in failures))
+        if len(batch) == count:
+            return
+        if self._batch is None:
+            self._json_path = None
+        self.__set_batch(batch, count)
+        self.__probe_batch(batch.sources)
+        self.statusBar.showMessage("已导入 %d 个源文件，共 %d 个"
+                                   % (len(batch) - count, len(batch)))
 
     @pyqtSlot(QModelIndex, QModelIndex, 'QVector<int>')
+    @timed()
     def on_model_data_changed(self,
                               top_left: QModelIndex,
                               bottom_right: QModelIndex,
@@ -329,43 +760,55 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         #          bottom_right.column(),
         #          repr(roles)))
         if Qt.EditRole in roles:
-            self.update_source()
-            self.update_output()
+            self.__mark_intervals_changed()
+            self.__update_output_rows(self._output.update_rows,
+                                      top_left.row(), bottom_right.row())
 
     @pyqtSlot()
+    @timed()
     def on_model_model_reset(self):
-        self.update_source()
-        self.update_output()
+        self.__mark_intervals_changed()
+        self._refresh.mark('output')
 
     @pyqtSlot(QModelIndex, int, int)
+    @timed()
     def on_model_rows_inserted(self,
                                parent: QModelIndex,
                                first: int, last: int):
-        self.update_source()
-        self.update_output()
+        self.__mark_intervals_changed()
+        self.__update_output_rows(self._output.insert_rows, first, last)
 
     @pyqtSlot(QModelIndex, int, int, QModelIndex, int)
+    @timed()
     def on_model_rows_moved(self,
                             parent: QModelIndex, start: int, end: int,
                             destination: QModelIndex, row: int):
-        self.update_source()
-        self.update_output()
+        self.__mark_intervals_changed()
+        self.__update_output_rows(self._output.move_rows, start, end, row)
 
     @pyqtSlot(QModelIndex, int, int)
+    @timed()
     def on_model_rows_removed(self,
                               parent: QModelIndex,
                               first: int, last: int):
-        self.update_source()
-        self.update_output()
+        self.__mark_intervals_changed()
+        self.__update_output_rows(self._output.remove_rows, first, last)
 
     @pyqtSlot(str, name='on_ledt_src_filename_textChanged')
     def on_ledt_src_filename_text_changed(self, text: str):
         self._model.src_filename = text
+        if self._batch is not None:
+            self.cbox_source.setItemText(self.cbox_source.currentIndex(),
+                                         text)
+        # 路径属于全局参数，所有命令都需要重新生成
+        self._refresh.mark('output')
 
     @pyqtSlot(str, name='on_ledt_src_path_dir_textChanged')
     def on_ledt_src_path_dir_text_changed(self, text: str):
         self._model.src_path_dir = text
+        self._refresh.mark('output')
 
     @pyqtSlot(str, name='on_ledt_dst_path_dir_textChanged')
     def on_ledt_dst_path_dir_text_changed(self, text: str):
         self._model.dst_path_dir = text
+        self._refresh.mark('output')
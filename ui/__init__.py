@@ -1 +1,7 @@
 from ui.durations_list_model import DurationsListModel
+from ui.job_runner import JobRunner
+from ui.probe_worker import ProbeTask, ProbeResult
+from ui.command_output import CommandOutputRenderer
+from ui.refresh_scheduler import RefreshScheduler
+from ui.load_worker import LoadTask
+from ui.profile_dialog import ProfileDialog, stats_summary
@@ -0,0 +1,132 @@
+from typing import List
+
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QTextEdit
+
+from core import CommandBuilder
+from core.command import MODE_PER_INTERVAL
+
+
+class CommandOutputRenderer:
+    """Keep a text view in sync with the generated commands
+
+    In per-interval mode every row owns one line. Rendered lines are
+    cached and only rows touched by a model change are re-rendered and
+    spliced into the document. Output names contain the row index, so
+    inserting, removing or moving rows re-renders the shifted rows too.
+    Other modes, including a ConcatStage passed as the builder, are
+    re-rendered as a whole.
+
+    Shifting changes only record the smallest affected row, ``flush``
+    re-renders from there once however many changes came in between.
+    Lines before that row are still valid and updated right away.
+    """
+
+    def __init__(self, view: QTextEdit):
+        self._view = view
+        self._builder = None  # type: CommandBuilder
+        self._lines = []  # type: List[str]
+        self._dirty_from = None  # type: int
+
+    @property
+    def lines(self) -> List[str]:
+        return self._lines
+
+    @property
+    def pending(self) -> bool:
+        return self._dirty_from is not None
+
+    def _incremental(self) -> bool:
+        return self._builder is not None \
+            and self._builder.mode == MODE_PER_INTERVAL
+
+    def _render(self, first: int, last: int) -> List[str]:
+        builder = self._builder
+        model_data = builder.model_data
+        return [builder.job(row, *model_data.get_interval_secs(row)).command()
+                for row in range(first, last + 1)]
+
+    def reset(self, builder: CommandBuilder) -> None:
+        self._builder = builder
+        self._dirty_from = None
+        self._lines = list(builder.commands())
+        self._view.setPlainText('\n'.join(self._lines))
+
+    def update_rows(self, first: int, last: int) -> None:
+        if not self._incremental():
+            return self._mark_from(0)
+        if self._dirty_from is not None:
+            # 待重排的行在flush时一并重新生成
+            last = min(last, self._dirty_from - 1)
+        if first <= last:
+            self._splice(first, last - first + 1, self._render(first, last))
+
+    def insert_rows(self, first: int, last: int) -> None:
+        self._mark_from(first)
+
+    def remove_rows(self, first: int, last: int) -> None:
+        self._mark_from(first)
+
+    def move_rows(self, start: int, end: int, row: int) -> None:
+        if not self._incremental():
+            return self._mark_from(0)
+        # row为移动前的目标位置，移动后[lo, hi]范围内的行号发生了变化
+        lo, hi = min(start, row), max(end, row - 1)
+        if self._dirty_from is not None and hi >= self._dirty_from:
+            return self._mark_from(lo)
+        self._splice(lo, hi - lo + 1, self._render(lo, hi))
+
+    def flush(self) -> None:
+        """Re-render from the smallest row changed since the last flush"""
+        first, self._dirty_from = self._dirty_from, None
+        if first is None:
+            return
+        if not self._incremental():
+            return self.reset(self._builder)
+        size = self._builder.model_data.intervals_size()
+        self._splice(first, len(self._lines) - first,
+                     self._render(first, size - 1))
+
+    def _mark_from(self, first: int) -> None:
+        if self._dirty_from is None or first < self._dirty_from:
+            self._dirty_from = first
+
+    def _splice(self, first: int, count: int, lines: List[str]) -> None:
+        """Replace ``count`` lines starting at ``first`` by ``lines``"""
+        total = len(self._lines)
+        self._lines[first:first + count] = lines
+        if total == 0 or (first == 0 and count == total):
+            self._view.setPlainText('\n'.join(self._lines))
+            return
+
+        document = self._view.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        if count and lines:
+            last_block = document.findBlockByNumber(first + count - 1)
+            cursor.setPosition(document.findBlockByNumber(first).position())
+            cursor.setPosition(last_block.position() + last_block.length() - 1,
+                               QTextCursor.KeepAnchor)
+            cursor.insertText('\n'.join(lines))
+        elif count:
+            if first + count < total:
+                cursor.setPosition(document.findBlockByNumber(first).position())
+                cursor.setPosition(
+                    document.findBlockByNumber(first + count).position(),
+                    QTextCursor.KeepAnchor
+                )
+            else:
+                # 删除末尾的若干行，连同前一行的换行符
+                prev_block = document.findBlockByNumber(first - 1)
+                cursor.setPosition(prev_block.position()
+                                   + prev_block.length() - 1)
+                cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        elif lines:
+            if first < total:
+                cursor.setPosition(document.findBlockByNumber(first).position())
+                cursor.insertText('\n'.join(lines) + '\n')
+            else:
+                cursor.movePosition(QTextCursor.End)
+                cursor.insertText('\n' + '\n'.join(lines))
+        cursor.endEditBlock()
@@ -1,17 +1,23 @@
 import re
+from typing import Iterable, Tuple
 
 from PyQt5.QtCore import QAbstractTableModel, QModelIndex
 from PyQt5.QtCore import Qt, QObject, QVariant
+from PyQt5.QtGui import QBrush, QColor
 
-from core import ModelData, Moment
+from core import ModelData, Moment, KeyframeIndex
+from core.keyframes import format_seconds
+from core.model_data import index_ranges, move_plan
 
 
 class DurationsListModel(QAbstractTableModel):
     __regexp_moment = re.compile(r'([0-9]+):([0-5]?[0-9]):([0-5]?[0-9])')
+    overlap_brush = QBrush(QColor(255, 221, 221))
 
     def __init__(self, model_data: ModelData, parent: QObject = None):
         super(DurationsListModel, self).__init__(parent)
         self._model_data = model_data
+        self._keyframe_index = None
 
     def rowCount(self, parent: QModelIndex = None, *args, **kwargs) -> int:
         return self._model_data.intervals_size()
@@ -39,8 +45,29 @@ class DurationsListModel(QAbstractTableModel):
             if role == Qt.DisplayRole:
                 row, col = index.row(), index.column()
                 if col == 0 or col == 1:
-                    t = self._model_data.get_interval_unwrap(row, col)
-                    return QVariant('%02d:%02d:%02d' % (t[0], t[1], t[2]))
+                    secs = self._model_data.get_interval_secs(row, col)
+                    text = '%02d:%02d:%02d' % (secs // 3600,
+                                               secs // 60 % 60,
+                                               secs % 60)
+                    if self._keyframe_index is not None:
+                        # 附带显示对齐到关键帧后实际的切割位置
+                        snapped = self._keyframe_index.snap_begin(secs) \
+                            if col == 0 \
+                            else self._keyframe_index.snap_end(secs)
+                        if snapped != secs:
+                            text += ' (%s)' % format_seconds(snapped)
+                    return QVariant(text)
+            elif role == Qt.BackgroundRole or role == Qt.ToolTipRole:
+                begin, end = self._model_data.get_interval_secs(index.row())
+                interval_index = self._model_data.interval_index()
+                duplicates = interval_index.duplicate_count(begin, end)
+                overlaps = interval_index.overlap_count(begin, end)
+                if duplicates or overlaps:
+                    if role == Qt.BackgroundRole:
+                        return QVariant(self.overlap_brush)
+                    if duplicates:
+                        return QVariant("另有%d个相同的时间段" % duplicates)
+                    return QVariant("与%d个时间段重叠" % overlaps)
         return QVariant()
 
     def setData(self, index: QModelIndex, value: QVariant, role: int = None) -> bool:
@@ -52,10 +79,11 @@ class DurationsListModel(QAbstractTableModel):
                     match_res = self.__regexp_moment.match(str(value))
                     if match_res:
                         hour, mins, secs = [int(i) for i in match_res.groups()]
-                        interval = self._model_data.get_interval_unwrap(row)
+                        begin, end = self._model_data.get_interval_secs(row)
+                        value_secs = (hour * 60 + mins) * 60 + secs
                         if Moment.validate(hour, mins, secs):
                             if col == 0:
-                                if [hour, mins, secs] > interval[1]:
+                                if value_secs > end:
                                     result = False
                                 else:
                                     self._model_data \
@@ -64,7 +92,7 @@ class DurationsListModel(QAbstractTableModel):
                                                                    mins,
                                                                    secs))
                             elif col == 1:
-                                if [hour, mins, secs] < interval[0]:
+                                if value_secs < begin:
                                     result = False
                                 else:
                                     self._model_data \
@@ -80,6 +108,7 @@ class DurationsListModel(QAbstractTableModel):
                     result = False
                 if result:
                     self.dataChanged.emit(index, index, [role])
+                    self.__overlaps_changed()
             else:
                 result = False
         return result
@@ -94,12 +123,13 @@ class DurationsListModel(QAbstractTableModel):
         return self.insertRows(row, 1, parent, *args, **kwargs)
 
     def insertRows(self, row: int, count: int, parent: QModelIndex = None, *args, **kwargs) -> bool:
+        if not 0 <= row <= self.rowCount() or count <= 0:
+            return False
+        zero = Moment(0, 0, 0)
         self.beginInsertRows(QModelIndex(), row, row + count - 1)
-        for i in range(count):
-            self._model_data.insert_interval(row + i,
-                                             Moment(0, 0, 0),
-                                             Moment(0, 0, 0))
+        self._model_data.insert_intervals(row, [(zero, zero)] * count)
         self.endInsertRows()
+        self.__overlaps_changed()
         return True
 
     def removeRow(self, row: int, parent: QModelIndex = None, *args, **kwargs) -> bool:
@@ -111,11 +141,11 @@ class DurationsListModel(QAbstractTableModel):
         intervals_size = self._model_data.intervals_size()
         if 0 <= row < intervals_size \
                 and count > 0 and row + count <= intervals_size:
-            for i in reversed(range(row, row + count)):
-                self._model_data.del_interval(i)
+            self._model_data.del_interval_range(row, count)
         else:
             result = False
         self.endRemoveRows()
+        self.__overlaps_changed()
         return result
 
     def add_interval(self, begin: Moment, end: Moment):
@@ -124,6 +154,7 @@ class DurationsListModel(QAbstractTableModel):
             self.beginInsertRows(QModelIndex(), index, index)
             self._model_data.add_interval(begin, end)
             self.endInsertRows()
+            self.__overlaps_changed()
 
     def move_interval(self, row: int, offset: int):
         row_src, row_dst = row, row + offset
@@ -138,6 +169,68 @@ class DurationsListModel(QAbstractTableModel):
             self._model_data.move_interval(row, offset)
             self.endMoveRows()
 
+    def __overlaps_changed(self):
+        # 一行的变化可能影响任意其他行的重叠标记
+        row_cnt = self.rowCount()
+        if row_cnt:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(row_cnt - 1, 1),
+                                  [Qt.BackgroundRole, Qt.ToolTipRole])
+
+    def merge_overlapping(self) -> int:
+        self.beginResetModel()
+        removed = self._model_data.merge_overlapping()
+        self.endResetModel()
+        return removed
+
+    def insert_intervals(self, row: int,
+                         intervals: Iterable[Tuple[Moment, Moment]]) -> int:
+        intervals = [(begin, end) for begin, end in intervals
+                     if begin <= end]
+        if not intervals or not 0 <= row <= self.rowCount():
+            return 0
+        self.beginInsertRows(QModelIndex(), row, row + len(intervals) - 1)
+        self._model_data.insert_intervals(row, intervals)
+        self.endInsertRows()
+        self.__overlaps_changed()
+        return len(intervals)
+
+    def remove_intervals(self, rows: Iterable[int]) -> int:
+        """Remove rows, a single beginRemoveRows for a contiguous range
+
+        Any other selection is removed in a single pass behind a model
+        reset. Every removal signal makes the views renumber the whole
+        tail, one signal per range cost far more than one reset.
+        """
+        row_cnt = self.rowCount()
+        ranges = index_ranges(row for row in rows if 0 <= row < row_cnt)
+        if not ranges:
+            return 0
+        if len(ranges) > 1:
+            self.beginResetModel()
+            removed = self._model_data.del_intervals(
+                row for first, last in ranges for row in range(first, last + 1)
+            )
+            self.endResetModel()
+            return removed
+        first, last = ranges[0]
+        self.beginRemoveRows(QModelIndex(), first, last)
+        self._model_data.del_interval_range(first, last - first + 1)
+        self.endRemoveRows()
+        self.__overlaps_changed()
+        return last - first + 1
+
+    def move_intervals(self, rows: Iterable[int], offset: int) -> int:
+        """Move rows by offset, one beginMoveRows per contiguous range"""
+        plan = move_plan(rows, offset, self.rowCount())
+        for first, last, new_first in plan:
+            self.beginMoveRows(QModelIndex(), first, last, QModelIndex(),
+                               new_first if new_first < first
+                               else new_first + last - first + 1)
+            self._model_data.move_interval_range(first, last, new_first)
+            self.endMoveRows()
+        return len(plan)
+
     def clear_intervals(self):
         self.beginRemoveRows(QModelIndex(), 0, self.rowCount() - 1)
         self._model_data.clear_intervals()
@@ -145,9 +238,21 @@ class DurationsListModel(QAbstractTableModel):
         self.beginResetModel()
         self.endResetModel()
 
+    def set_keyframe_index(self, keyframe_index: KeyframeIndex = None):
+        self._keyframe_index = keyframe_index
+        row_cnt = self.rowCount()
+        if row_cnt:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(row_cnt - 1, 1),
+                                  [Qt.DisplayRole])
+
     def iter_intervals(self):
         return self._model_data.intervals_iter()
 
+    @property
+    def model_data(self) -> ModelData:
+        return self._model_data
+
     @property
     def src_filename(self) -> str:
         return self._model_data.src_filename
@@ -190,14 +295,18 @@ class DurationsListModel(QAbstractTableModel):
 
     def reset_data(self):
         self.clear_intervals()
+        self._keyframe_index = None
         self._model_data = ModelData()
 
+    def set_model_data(self, model_data: ModelData):
+        self.beginResetModel()
+        self._model_data = model_data
+        self.endResetModel()
+
     def import_from_json(self, str_json: str) -> bool:
         model_data = ModelData.from_json(str_json)
         if model_data is not None:
-            self.beginResetModel()
-            self._model_data = model_data
-            self.endResetModel()
+            self.set_model_data(model_data)
             return True
         else:
             return False
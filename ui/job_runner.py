@@ -0,0 +1,66 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core import JobExecutor, JobResult, JobJournal, OutputCache
+
+
+class JobRunner(QObject):
+    """Run jobs with a JobExecutor without blocking the Qt event loop
+
+    Executor callbacks arrive on worker threads, they are forwarded
+    through queued signals to the thread owning the runner.
+    """
+    jobStarted = pyqtSignal(object)
+    jobFinished = pyqtSignal(object)
+    finished = pyqtSignal(list)
+    _jobDone = pyqtSignal(object)
+
+    def __init__(self, parent: QObject = None):
+        super(JobRunner, self).__init__(parent)
+        self._executor = None
+        self._journal = None
+        self._remaining = 0
+        self._jobDone.connect(self.__on_job_done)
+
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, jobs, workers: int = 4, ffmpeg: str = 'ffmpeg',
+              overwrite: bool = False, per_device: int = 0,
+              journal: JobJournal = None,
+              output_cache: OutputCache = None) -> bool:
+        """The runner closes ``journal`` when all jobs are finished"""
+        if self._executor is not None:
+            return False
+        jobs = list(jobs)
+        self._remaining = len(jobs)
+        self._journal = journal
+        self._executor = JobExecutor(jobs, workers=workers, ffmpeg=ffmpeg,
+                                     overwrite=overwrite,
+                                     per_device=per_device,
+                                     journal=journal,
+                                     output_cache=output_cache,
+                                     on_start=self.jobStarted.emit,
+                                     on_finish=self._jobDone.emit)
+        if not jobs:
+            self.__finish()
+        else:
+            self._executor.start()
+        return True
+
+    def cancel(self) -> None:
+        if self._executor is not None:
+            self._executor.cancel()
+
+    def __on_job_done(self, result: JobResult):
+        self._remaining -= 1
+        self.jobFinished.emit(result)
+        if self._remaining <= 0:
+            self.__finish()
+
+    def __finish(self):
+        results = self._executor.results
+        self._executor = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.finished.emit(results)
@@ -55,8 +55,11 @@ class Ui_MainWindow(object):
         self.tbtn_clear = QtWidgets.QToolButton(self.grp_intervals)
         self.tbtn_clear.setObjectName("tbtn_clear")
         self.gridLayout_2.addWidget(self.tbtn_clear, 3, 0, 1, 1)
+        self.tbtn_merge = QtWidgets.QToolButton(self.grp_intervals)
+        self.tbtn_merge.setObjectName("tbtn_merge")
+        self.gridLayout_2.addWidget(self.tbtn_merge, 4, 0, 1, 1)
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.gridLayout_2.addItem(spacerItem, 4, 0, 1, 1)
+        self.gridLayout_2.addItem(spacerItem, 5, 0, 1, 1)
         self.verticalLayout.addLayout(self.gridLayout_2)
         self.hlayout_add_interval = QtWidgets.QHBoxLayout()
         self.hlayout_add_interval.setObjectName("hlayout_add_interval")
@@ -129,18 +132,24 @@ class Ui_MainWindow(object):
         self.groupBox.setObjectName("groupBox")
         self.formLayout_3 = QtWidgets.QFormLayout(self.groupBox)
         self.formLayout_3.setObjectName("formLayout_3")
+        self.lbl_source = QtWidgets.QLabel(self.groupBox)
+        self.lbl_source.setObjectName("lbl_source")
+        self.formLayout_3.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.lbl_source)
+        self.cbox_source = QtWidgets.QComboBox(self.groupBox)
+        self.cbox_source.setObjectName("cbox_source")
+        self.formLayout_3.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.cbox_source)
         self.lbl_filename = QtWidgets.QLabel(self.groupBox)
         self.lbl_filename.setObjectName("lbl_filename")
-        self.formLayout_3.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.lbl_filename)
+        self.formLayout_3.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.lbl_filename)
         self.ledt_src_filename = QtWidgets.QLineEdit(self.groupBox)
         self.ledt_src_filename.setObjectName("ledt_src_filename")
-        self.formLayout_3.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.ledt_src_filename)
+        self.formLayout_3.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.ledt_src_filename)
         self.lbl_src_dir = QtWidgets.QLabel(self.groupBox)
         self.lbl_src_dir.setObjectName("lbl_src_dir")
-        self.formLayout_3.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.lbl_src_dir)
+        self.formLayout_3.setWidget(2, QtWidgets.QFormLayout.LabelRole, self.lbl_src_dir)
         self.ledt_src_path_dir = QtWidgets.QLineEdit(self.groupBox)
         self.ledt_src_path_dir.setObjectName("ledt_src_path_dir")
-        self.formLayout_3.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.ledt_src_path_dir)
+        self.formLayout_3.setWidget(2, QtWidgets.QFormLayout.FieldRole, self.ledt_src_path_dir)
         self.horizontalLayout.addWidget(self.groupBox)
         self.grp_output = QtWidgets.QGroupBox(self.centralwidget)
         self.grp_output.setObjectName("grp_output")
@@ -262,13 +271,53 @@ class Ui_MainWindow(object):
         self.act_file_save.setObjectName("act_file_save")
         self.act_file_save_as = QtWidgets.QAction(MainWindow)
         self.act_file_save_as.setObjectName("act_file_save_as")
+        self.act_file_export_script = QtWidgets.QAction(MainWindow)
+        self.act_file_export_script.setObjectName("act_file_export_script")
+        self.act_task_run = QtWidgets.QAction(MainWindow)
+        self.act_task_run.setObjectName("act_task_run")
+        self.act_task_cancel = QtWidgets.QAction(MainWindow)
+        self.act_task_cancel.setEnabled(False)
+        self.act_task_cancel.setObjectName("act_task_cancel")
+        self.act_setting_workers = QtWidgets.QAction(MainWindow)
+        self.act_setting_workers.setObjectName("act_setting_workers")
+        self.act_setting_per_device = QtWidgets.QAction(MainWindow)
+        self.act_setting_per_device.setObjectName("act_setting_per_device")
+        self.act_setting_multi_output = QtWidgets.QAction(MainWindow)
+        self.act_setting_multi_output.setCheckable(True)
+        self.act_setting_multi_output.setObjectName("act_setting_multi_output")
+        self.act_setting_concat = QtWidgets.QAction(MainWindow)
+        self.act_setting_concat.setCheckable(True)
+        self.act_setting_concat.setObjectName("act_setting_concat")
+        self.act_setting_scratch = QtWidgets.QAction(MainWindow)
+        self.act_setting_scratch.setObjectName("act_setting_scratch")
+        self.act_setting_cache = QtWidgets.QAction(MainWindow)
+        self.act_setting_cache.setCheckable(True)
+        self.act_setting_cache.setObjectName("act_setting_cache")
+        self.act_setting_keyframes = QtWidgets.QAction(MainWindow)
+        self.act_setting_keyframes.setCheckable(True)
+        self.act_setting_keyframes.setObjectName("act_setting_keyframes")
+        self.act_setting_profile = QtWidgets.QAction(MainWindow)
+        self.act_setting_profile.setObjectName("act_setting_profile")
         self.action_5 = QtWidgets.QAction(MainWindow)
         self.action_5.setObjectName("action_5")
         self.menu_T.addAction(self.act_file_new)
         self.menu_T.addAction(self.act_file_open)
         self.menu_T.addAction(self.act_file_save)
         self.menu_T.addAction(self.act_file_save_as)
+        self.menu_T.addAction(self.act_file_export_script)
+        self.menu_T.addSeparator()
+        self.menu_T.addAction(self.act_task_run)
+        self.menu_T.addAction(self.act_task_cancel)
         self.menu_S.addAction(self.act_setting_format)
+        self.menu_S.addAction(self.act_setting_workers)
+        self.menu_S.addAction(self.act_setting_per_device)
+        self.menu_S.addAction(self.act_setting_multi_output)
+        self.menu_S.addAction(self.act_setting_concat)
+        self.menu_S.addAction(self.act_setting_scratch)
+        self.menu_S.addAction(self.act_setting_keyframes)
+        self.menu_S.addAction(self.act_setting_cache)
+        self.menu_S.addSeparator()
+        self.menu_S.addAction(self.act_setting_profile)
         self.menuBar.addAction(self.menu_T.menuAction())
         self.menuBar.addAction(self.menu_S.menuAction())
 
@@ -281,6 +330,7 @@ class Ui_MainWindow(object):
         self.spin_interval_end_mins.valueChanged['int'].connect(MainWindow.on_spin_interval_end_value_changed)
         self.spin_interval_end_secs.valueChanged['int'].connect(MainWindow.on_spin_interval_end_value_changed)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
+        MainWindow.setTabOrder(self.cbox_source, self.ledt_src_filename)
         MainWindow.setTabOrder(self.ledt_src_filename, self.ledt_src_path_dir)
         MainWindow.setTabOrder(self.ledt_src_path_dir, self.ledt_dst_path_dir)
         MainWindow.setTabOrder(self.ledt_dst_path_dir, self.spin_src_duration)
@@ -290,7 +340,8 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.tbtn_move_up, self.tbtn_move_down)
         MainWindow.setTabOrder(self.tbtn_move_down, self.tbtn_remove)
         MainWindow.setTabOrder(self.tbtn_remove, self.tbtn_clear)
-        MainWindow.setTabOrder(self.tbtn_clear, self.tabv_intervals)
+        MainWindow.setTabOrder(self.tbtn_clear, self.tbtn_merge)
+        MainWindow.setTabOrder(self.tbtn_merge, self.tabv_intervals)
         MainWindow.setTabOrder(self.tabv_intervals, self.spin_interval_begin_hour)
         MainWindow.setTabOrder(self.spin_interval_begin_hour, self.spin_interval_begin_mins)
         MainWindow.setTabOrder(self.spin_interval_begin_mins, self.spin_interval_begin_secs)
@@ -317,6 +368,8 @@ class Ui_MainWindow(object):
         self.tbtn_remove.setText(_translate("MainWindow", "删除"))
         self.tbtn_remove.setShortcut(_translate("MainWindow", "Del"))
         self.tbtn_clear.setText(_translate("MainWindow", "清空"))
+        self.tbtn_merge.setToolTip(_translate("MainWindow", "合并重叠或相邻的时间段（按开始时间排序）"))
+        self.tbtn_merge.setText(_translate("MainWindow", "合并"))
         self.lbl_interval_begin.setText(_translate("MainWindow", "开始"))
         self.lbl_colon_0.setText(_translate("MainWindow", ":"))
         self.lbl_colon_1.setText(_translate("MainWindow", ":"))
@@ -326,6 +379,7 @@ class Ui_MainWindow(object):
         self.pbtn_add_interval.setText(_translate("MainWindow", "增加该时间段"))
         self.pbtn_add_interval.setShortcut(_translate("MainWindow", "Ctrl+Return"))
         self.groupBox.setTitle(_translate("MainWindow", "输入参数"))
+        self.lbl_source.setText(_translate("MainWindow", "批量源"))
         self.lbl_filename.setText(_translate("MainWindow", "文件名称"))
         self.lbl_src_dir.setText(_translate("MainWindow", "所在目录"))
         self.grp_output.setTitle(_translate("MainWindow", "输出参数"))
@@ -354,6 +408,19 @@ class Ui_MainWindow(object):
         self.act_file_save.setShortcut(_translate("MainWindow", "Ctrl+S"))
         self.act_file_save_as.setText(_translate("MainWindow", "另存为"))
         self.act_file_save_as.setShortcut(_translate("MainWindow", "Ctrl+Shift+S"))
+        self.act_file_export_script.setText(_translate("MainWindow", "导出脚本"))
+        self.act_task_run.setText(_translate("MainWindow", "运行命令"))
+        self.act_task_run.setShortcut(_translate("MainWindow", "F5"))
+        self.act_task_cancel.setText(_translate("MainWindow", "取消运行"))
+        self.act_task_cancel.setShortcut(_translate("MainWindow", "Shift+F5"))
+        self.act_setting_workers.setText(_translate("MainWindow", "并行任务数..."))
+        self.act_setting_per_device.setText(_translate("MainWindow", "每个磁盘并行数..."))
+        self.act_setting_multi_output.setText(_translate("MainWindow", "单次读取多路输出"))
+        self.act_setting_concat.setText(_translate("MainWindow", "合并为一个文件"))
+        self.act_setting_scratch.setText(_translate("MainWindow", "临时目录..."))
+        self.act_setting_cache.setText(_translate("MainWindow", "复用已切割的片段"))
+        self.act_setting_keyframes.setText(_translate("MainWindow", "显示关键帧对齐位置"))
+        self.act_setting_profile.setText(_translate("MainWindow", "性能统计..."))
         self.action_5.setText(_translate("MainWindow", "预览源码"))
         self.action_5.setShortcut(_translate("MainWindow", "Ctrl+R"))
 from ui.FileDropLabel import FileDropLabel
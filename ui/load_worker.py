@@ -0,0 +1,36 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from core import ProjectLoader
+
+
+class LoadSignals(QObject):
+    # 进度以千分比表示，字节数可能超出int的范围
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+
+
+class LoadTask(QRunnable):
+    """Run a ProjectLoader on a pool thread
+
+    ``finished`` carries the loader, its ``model_data`` is None when the
+    file was invalid (see ``report``) or the load was cancelled.
+    """
+
+    def __init__(self, json_path: str):
+        super(LoadTask, self).__init__()
+        self.signals = LoadSignals()
+        self.loader = ProjectLoader(json_path, on_progress=self.__on_progress)
+        self._permille = -1
+
+    def cancel(self) -> None:
+        self.loader.cancel()
+
+    def __on_progress(self, bytes_read: int, bytes_total: int):
+        permille = bytes_read * 1000 // bytes_total if bytes_total else 1000
+        if permille != self._permille:
+            self._permille = permille
+            self.signals.progress.emit(permille)
+
+    def run(self):
+        self.loader.load()
+        self.signals.finished.emit(self.loader)
@@ -0,0 +1,55 @@
+import subprocess
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from core import KeyframeIndex, MediaMeta, MediaMetaCache
+
+
+class ProbeResult:
+    def __init__(self, src_path: str):
+        self.src_path = src_path
+        self.meta = None  # type: MediaMeta
+        self.keyframe_index = None  # type: KeyframeIndex
+        self.error = None  # type: str
+        self.keyframe_error = None  # type: str
+
+
+class ProbeSignals(QObject):
+    # 参数为发起探测时的代数，供接收方丢弃过期的结果
+    finished = pyqtSignal(int, object)
+
+
+class ProbeTask(QRunnable):
+    """Probe media metadata (and optionally keyframes) on a pool thread
+
+    ``is_current`` is checked before the slow work starts, so tasks
+    queued behind a newer request are skipped.
+    """
+
+    def __init__(self, generation: int, src_path: str,
+                 meta_cache: MediaMetaCache, keyframes: bool = False,
+                 is_current: Callable[[int], bool] = None):
+        super(ProbeTask, self).__init__()
+        self.signals = ProbeSignals()
+        self._generation = generation
+        self._src_path = src_path
+        self._meta_cache = meta_cache
+        self._keyframes = keyframes
+        self._is_current = is_current
+
+    def run(self):
+        if self._is_current is not None \
+                and not self._is_current(self._generation):
+            return
+        result = ProbeResult(self._src_path)
+        try:
+            result.meta = self._meta_cache.get(self._src_path)
+        except OSError as e:
+            result.error = str(e)
+        if self._keyframes and result.error is None:
+            try:
+                result.keyframe_index = KeyframeIndex.load(self._src_path)
+            except (OSError, subprocess.SubprocessError) as e:
+                result.keyframe_error = str(e)
+        self.signals.finished.emit(self._generation, result)
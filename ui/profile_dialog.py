@@ -0,0 +1,109 @@
+from PyQt5.QtCore import Qt, QTimer, pyqtSlot
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, \
+    QTableWidget, QTableWidgetItem, QCheckBox, QFileDialog, QMessageBox, \
+    QHeaderView, QWidget
+
+from core import Profiler, TimingStats
+
+COLUMNS = ("名称", "次数", "累计 ms", "平均 ms", "p50 ms", "p99 ms", "最大 ms")
+
+
+def stats_summary(stats, limit: int = 5) -> str:
+    """Lines of the slowest entries, for tooltips"""
+    return "\n".join("%s：%d 次，累计 %.1f ms，p99 %.2f ms"
+                     % (s.name, s.count, s.total * 1000, s.p99 * 1000)
+                     for s in stats[:limit])
+
+
+class ProfileDialog(QDialog):
+    """Table of the profiler stats, refreshed once a second while shown"""
+
+    def __init__(self, profiler: Profiler, parent: QWidget = None):
+        super(ProfileDialog, self).__init__(parent)
+        self._profiler = profiler
+        self.setWindowTitle("性能统计")
+        self.resize(720, 400)
+
+        self.table = QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader() \
+            .setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(2, Qt.DescendingOrder)
+        self.chk_enabled = QCheckBox("记录", self)
+        self.chk_enabled.setChecked(profiler.enabled)
+        self.chk_enabled.toggled.connect(self.on_chk_enabled_toggled)
+        self.pbtn_reset = QPushButton("清空", self)
+        self.pbtn_reset.clicked.connect(self.on_pbtn_reset_clicked)
+        self.pbtn_export = QPushButton("导出...", self)
+        self.pbtn_export.clicked.connect(self.on_pbtn_export_clicked)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.chk_enabled)
+        buttons.addStretch(1)
+        buttons.addWidget(self.pbtn_reset)
+        buttons.addWidget(self.pbtn_export)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.update_stats)
+
+    def showEvent(self, event):
+        self.chk_enabled.setChecked(self._profiler.enabled)
+        self.update_stats()
+        self._timer.start()
+        super(ProfileDialog, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super(ProfileDialog, self).hideEvent(event)
+
+    @pyqtSlot()
+    def update_stats(self):
+        stats = self._profiler.stats()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            self.__set_row(row, s)
+        self.table.setSortingEnabled(True)
+
+    def __set_row(self, row: int, s: TimingStats):
+        self.table.setItem(row, 0, QTableWidgetItem(s.name))
+        values = (s.count, s.total * 1000, s.mean * 1000,
+                  s.p50 * 1000, s.p99 * 1000, s.max * 1000)
+        for col, value in enumerate(values, 1):
+            item = QTableWidgetItem()
+            # 以数值排序
+            item.setData(Qt.DisplayRole,
+                         value if col == 1 else round(value, 3))
+            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, col, item)
+
+    @pyqtSlot(bool)
+    def on_chk_enabled_toggled(self, checked: bool):
+        self._profiler.enabled = checked
+
+    @pyqtSlot()
+    def on_pbtn_reset_clicked(self):
+        self._profiler.reset()
+        self.update_stats()
+
+    @pyqtSlot()
+    def on_pbtn_export_clicked(self):
+        path, selected_filter = QFileDialog.getSaveFileName(
+            parent=self,
+            caption="导出性能记录",
+            filter="JSON File (*.json);;CSV File (*.csv)"
+        )
+        if not path:
+            return
+        if not path.lower().endswith(('.json', '.csv')):
+            path += '.csv' if 'csv' in selected_filter else '.json'
+        try:
+            self._profiler.dump(path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
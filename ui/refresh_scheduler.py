@@ -0,0 +1,62 @@
+from typing import Callable, Dict, List
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core import timed
+
+
+class RefreshScheduler(QObject):
+    """Coalesce refresh requests of named panes
+
+    ``mark`` only flags a pane as dirty; all dirty panes are refreshed
+    once when control returns to the event loop (after ``interval`` ms),
+    however many times they were marked in between.
+    """
+    # 参数为本次刷新所合并掉的请求数
+    flushed = pyqtSignal(int)
+
+    def __init__(self, parent: QObject = None, interval: int = 0):
+        super(RefreshScheduler, self).__init__(parent)
+        self._callbacks = {}  # type: Dict[str, Callable[[], None]]
+        self._order = []  # type: List[str]
+        self._dirty = set()
+        self._pending = 0
+        self.requests = 0
+        self.refreshes = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def coalesced(self) -> int:
+        return self.requests - self.refreshes
+
+    def register(self, name: str, callback: Callable[[], None]) -> None:
+        if name not in self._callbacks:
+            self._order.append(name)
+        self._callbacks[name] = callback
+
+    def mark(self, name: str) -> None:
+        self._dirty.add(name)
+        self._pending += 1
+        self.requests += 1
+        # 不重新计时，持续的请求也不会无限推迟刷新
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def is_pending(self, name: str) -> bool:
+        return name in self._dirty
+
+    @timed()
+    def flush(self) -> None:
+        self._timer.stop()
+        dirty, self._dirty = self._dirty, set()
+        pending, self._pending = self._pending, 0
+        if not dirty:
+            return
+        for name in self._order:
+            if name in dirty:
+                self._callbacks[name]()
+        self.refreshes += len(dirty)
+        self.flushed.emit(pending - len(dirty))